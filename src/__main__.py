@@ -1,4 +1,4 @@
-from modules.gui import main, WINDOW
+from modules.gui import main
 
 if __name__ == "__main__":
-	main(WINDOW)
+	main()
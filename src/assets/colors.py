@@ -9,4 +9,5 @@ BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
-TURQUOISE = (64, 224, 208)
\ No newline at end of file
+TURQUOISE = (64, 224, 208)
+BROWN = (150, 100, 50)
\ No newline at end of file
@@ -0,0 +1,144 @@
+''' This module contains the Adjacency class, the moves between walkable cells stored so that a search can iterate them by
+integer index. Cells are numbered row by row (index = row * cols + col) and every cell owns one slot per direction of the
+movement model: the neighbors of cell i are indices[i * slots:i * slots + counts[i]], followed by -1 in the unused slots.
+This is the CSR layout with a fixed row length (ELLPACK), so when a few cells change only their own slots and counts are
+rewritten, in the numpy arrays and in the python lists that the searches read, instead of shifting every later row. '''
+
+import numpy as np
+from modules.distance_formulas import STRAIGHT, DIAGONAL
+
+FOUR_WAY = ((1, 0), (-1, 0), (0, 1), (0, -1)) # DOWN, UP, RIGHT, LEFT
+EIGHT_WAY = FOUR_WAY + ((1, 1), (1, -1), (-1, 1), (-1, -1)) # the diagonals after the straight moves
+
+# the movement models by name, as (directions, cut_corners, the weight of a diagonal move)
+MOVEMENTS = {
+    "four_way": (FOUR_WAY, False, DIAGONAL),
+    "eight_way": (EIGHT_WAY, True, DIAGONAL), # a diagonal may pass between two barriers that touch at a corner
+    "eight_way_no_corners": (EIGHT_WAY, False, DIAGONAL), # a diagonal needs both of the cells beside it to be free
+    "eight_way_uniform": (EIGHT_WAY, False, STRAIGHT), # like eight_way_no_corners but a diagonal costs as much as a straight move
+}
+
+def movement(name):
+    ''' Return the (directions, cut_corners, diagonal_step) of a movement model given its name '''
+    if name not in MOVEMENTS:
+        raise ValueError(f"unknown movement {name!r}, expected one of {', '.join(MOVEMENTS)}")
+    return MOVEMENTS[name]
+
+class Adjacency:
+    ''' The neighbors of every cell of a grid, one slot per direction and cell '''
+    def __init__(self, walkable, directions=FOUR_WAY, cut_corners=False, diagonal_step=DIAGONAL):
+        ''' Build the adjacency from a boolean array that is True for every cell that can be visited.
+        cut_corners lets a diagonal move pass a barrier that only touches its corner, only the target has to be free then.
+        diagonal_step is the weight of a diagonal move, a straight move weighs STRAIGHT '''
+        self.rows, self.cols = walkable.shape
+        self.directions = directions
+        self.cut_corners = cut_corners
+        self.walkable = walkable.copy()
+        self.slots = len(directions) # the slots of every cell, enough for a move in each direction
+        self.diagonal = any(dr and dc for dr, dc in directions)
+        self.diagonal_step = diagonal_step
+        # the weight of each move, a straight move is 1 when there are no diagonals, otherwise the moves
+        # are scaled to 10 and 14 (about 10 * sqrt(2)) so that the costs stay integers
+        self.unit = STRAIGHT if self.diagonal else 1
+        self.steps = [(diagonal_step if dr and dc else STRAIGHT) if self.diagonal else 1 for dr, dc in directions]
+        self._lists = None # the arrays as python lists, which are much faster to index from python than numpy
+        self._weights = None
+
+        # the moves of every cell in the order of the directions, each one goes into the first slot that is still free.
+        # the slots are filled as rows of (slots, cells) arrays, which numpy writes faster than columns, and transposed at the end
+        size = self.rows * self.cols
+        indices = np.full((self.slots, size), -1, dtype=np.int32)
+        weights = np.zeros((self.slots, size), dtype=np.int32) # 0 in the unused slots
+        self.counts = np.zeros(size, dtype=np.int32) # the number of moves of every cell
+        index = np.arange(size, dtype=np.int32)
+        for k, ((dr, dc), step) in enumerate(zip(directions, self.steps)):
+            allowed = walkable & self._shifted(walkable, dr, dc)
+            if dr and dc and not cut_corners: # a diagonal move needs both of the cells beside it to be free
+                allowed &= self._shifted(walkable, dr, 0) & self._shifted(walkable, 0, dc)
+            allowed = allowed.ravel()
+            target = index + (dr * self.cols + dc)
+            for slot in range(k + 1): # the cells that had this many moves before this direction
+                here = allowed & (self.counts == slot)
+                np.copyto(indices[slot], target, where=here)
+                weights[slot][here] = step
+            self.counts += allowed
+        self.indices = indices.T.ravel()
+        self.weights = weights.T.ravel() # the weight of every move
+
+    @staticmethod
+    def _shifted(array, dr, dc):
+        ''' Return an array whose cell (r, c) holds array[r + dr, c + dc], or False outside of the grid '''
+        rows, cols = array.shape
+        shifted = np.zeros_like(array)
+        shifted[max(0, -dr):rows - max(0, dr), max(0, -dc):cols - max(0, dc)] = \
+            array[max(0, dr):rows - max(0, -dr) or None, max(0, dc):cols - max(0, -dc) or None]
+        return shifted
+
+    def neighbors(self, index):
+        ''' Return the indices of the cells that can be reached from a cell in one move '''
+        start = index * self.slots
+        return self.indices[start:start + self.counts[index]]
+
+    def _row(self, row, col):
+        ''' Compute the moves of one cell and their weights from the walkable mask '''
+        walkable = self.walkable
+        moves, weights = [], []
+        if not walkable[row, col]:
+            return moves, weights
+        for (dr, dc), step in zip(self.directions, self.steps):
+            r, c = row + dr, col + dc
+            if not (0 <= r < self.rows and 0 <= c < self.cols) or not walkable[r, c]:
+                continue
+            if dr and dc and not self.cut_corners and not (walkable[row + dr, col] and walkable[row, col + dc]):
+                continue
+            moves.append(r * self.cols + c)
+            weights.append(step)
+        return moves, weights
+
+    def update(self, changes):
+        ''' Patch the adjacency after some cells changed, changes holds ((row, col), walkable) pairs '''
+        changes = [((row, col), walkable) for (row, col), walkable in changes if self.walkable[row, col] != walkable]
+        if not changes: # only the costs changed, the moves are the same
+            return
+        affected = set()
+        for (row, col), walkable in changes:
+            self.walkable[row, col] = walkable
+            for dr in (-1, 0, 1): # a cell changes its own moves and the moves of every cell around it
+                for dc in (-1, 0, 1):
+                    r, c = row + dr, col + dc
+                    if 0 <= r < self.rows and 0 <= c < self.cols:
+                        affected.add(r * self.cols + c)
+
+        # rewrite the slots of the affected cells, the python lists are patched too so they stay valid
+        slots = self.slots
+        for index in affected:
+            moves, weights = self._row(*divmod(index, self.cols))
+            start, count = index * slots, len(moves)
+            moves += [-1] * (slots - count)
+            weights += [0] * (slots - count)
+            self.indices[start:start + slots] = moves
+            self.weights[start:start + slots] = weights
+            self.counts[index] = count
+            if self._lists is not None:
+                _, ends, indices = self._lists
+                indices[start:start + slots] = moves
+                ends[index] = start + count
+            if self._weights is not None:
+                self._weights[start:start + slots] = weights
+
+    def lists(self):
+        ''' Return (starts, ends, indices) for the search loops, the neighbors of cell i are indices[starts[i]:ends[i]].
+        They are python lists (starts is a range), built on first use and patched by every update '''
+        if self._lists is None:
+            size = self.rows * self.cols
+            starts = range(0, size * self.slots, self.slots)
+            ends = (np.arange(size, dtype=np.int64) * self.slots + self.counts).tolist()
+            self._lists = starts, ends, self.indices.tolist()
+        return self._lists
+
+    def weight_list(self):
+        ''' Return the weights of the moves as a python list in the order of the indices, built on first use and patched
+        by every update '''
+        if self._weights is None:
+            self._weights = self.weights.tolist()
+        return self._weights
@@ -1,16 +1,26 @@
-''' the Bidirectional Search algorithm '''
+''' the Bidirectional Search algorithms, a breadth first search and an A* search (NBA*) from both ends '''
 
-import pygame
-from queue import Queue
+import time
+from modules.adjacency import FOUR_WAY
+from modules.bitset import Bitset, PackedArray, bits_for, four_way_moves, index_stack, trace_parents
+from modules.open_list import OpenList
+from modules.distance_formulas import heuristic_for # the same heuristics as A*
 from modules.path_reconstructer import reconstruct_path
+from modules.search_result import SearchResult
 
 # Description:
 #   Bidirectional Search is a graph traversal algorithm that simultaneously searches from the start node and the goal node.
 #   It aims to meet in the middle, reducing the search space compared to a single-direction search.
+#   Two searches of depth d/2 touch about the square root of the cells that one search of depth d touches.
 
 # Features:
-#   - Utilizes two queues to keep track of nodes from both directions.
-#   - Can be more efficient than single-direction search in practice.
+#   - Level Synchronous: Each step expands a whole layer (every node at the same depth) of one side, always the smaller one.
+#   - Meeting Criterion: When the sides are expanded node by node, the first node seen by both is not always on a shortest path.
+#                        Expanded layer by layer, a node that the other side has seen must still be on its last layer
+#                        (otherwise it would have been expanded and the searches would have met earlier), so the first meeting
+#                        point gives the shortest path: the two depths plus one move.
+#   - Compact State: The visited sets are bitsets and the parents are 2 bit move directions, so huge maps fit in memory.
+#   - Ignores terrain costs (Grid.cost), it finds the path with the fewest moves. bidirectional_a_star below honors them.
 
 # Pros:
 #   - Often more efficient than single-direction search.
@@ -21,119 +31,153 @@ from modules.path_reconstructer import reconstruct_path
 #   - Requires additional memory to keep track of both searches.
 
 # using:
-#   1. Open Sets: Nodes to be evaluated from both directions.
-#   2. Closed Sets: Nodes already evaluated from both directions.
-#   3. Parent Mapping: Maps nodes to their parents to reconstruct the path.
-#   4. Meeting Point: The point where the two searches meet.
+#   1. Frontiers: The nodes of the last layer of both searches.
+#   2. Visited Sets: The nodes seen by each side, one bit per cell.
+#   3. Parent Mapping: The direction of the move that reached each node, to reconstruct the path.
+#   4. Meeting Point: The first node seen by both sides.
 
 # Steps:
-#   1. Initialize the open and closed sets for both searches.
-#   2. Add the start node to the open set of the start search and the end node to the open set of the goal search.
-#   3. While both open sets are not empty:
-#       1. Expand the front of both open sets.
-#       2. Check if the two searches have met.
-#       3. If they meet, reconstruct and return the path.
-#       4. Otherwise, add unvisited neighbors to the respective open sets and mark them as visited.
-
-def bidirectional_search(draw, grid, start, end):
+#   1. Put the start node in the start frontier and the end node in the end frontier.
+#   2. While both frontiers are not empty:
+#       1. Pick the side with the smaller frontier and expand every node of it, the new nodes become its frontier.
+#       2. If a new node was already seen by the other side, the searches met.
+#   3. Join the path from the start to the meeting point with the path from the meeting point to the end.
+
+def join_paths(came_from_start, came_from_end, meeting_point):
+    ''' Combine the path from the start to the meeting point with the path from the meeting point to the end '''
+    path = reconstruct_path(came_from_start, meeting_point)
+    temp = meeting_point
+    while temp in came_from_end:
+        temp = came_from_end[temp]
+        path.append(temp)
+    return path
+
+def bidirectional_search(grid, start, end, visit=None):
     ''' Bidirectional Search is a graph traversal algorithm that simultaneously searches from the start node and the goal node.
-        It aims to meet in the middle, reducing the search space compared to a single-direction search. Guarantees the shortest path if the heuristic is admissible (does not overestimate the true cost). '''
+        It aims to meet in the middle, reducing the search space compared to a single-direction search. Expands whole layers, the smaller side first, and guarantees the path with the fewest moves. '''
     if start == end:
-        return True
-
-    open_set_start = Queue()
-    open_set_end = Queue()
-    open_set_start.put(start)
-    open_set_end.put(end)
-    came_from_start = {}
-    came_from_end = {}
-    visited_start = {spot: False for row in grid for spot in row}
-    visited_end = {spot: False for row in grid for spot in row}
-    visited_start[start] = True
-    visited_end[end] = True
-
-    while not open_set_start.empty() and not open_set_end.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        # Expand the start search
-        current_start = open_set_start.get()
-        if visited_end[current_start]:
-            # Collect and mark the path from start to meeting point
-            path_from_start = []
-            temp = current_start
-            while temp in came_from_start:
-                path_from_start.append(temp)
-                temp = came_from_start[temp]
-            path_from_start.append(start)
-            path_from_start.reverse()
-
-            # Collect and mark the path from end to meeting point
-            path_from_end = []
-            temp = current_start
-            while temp in came_from_end:
-                path_from_end.append(temp)
-                temp = came_from_end[temp]
-            path_from_end.append(end)
-
-            # Combine both paths and mark them
-            all_path_spots = set(path_from_start + path_from_end)
-            for spot in all_path_spots:
-                spot.make_path()
-                
-            end.make_end()  # redraw the end color
-            start.make_start()  # redraw the start color
-            return True
-
-        for neighbor in current_start.neighbors:
-            if not visited_start[neighbor] and not neighbor.is_barrier():
-                came_from_start[neighbor] = current_start
-                open_set_start.put(neighbor)
-                visited_start[neighbor] = True
-                neighbor.make_open()
-
-        # Expand the end search
-        current_end = open_set_end.get()
-        if visited_start[current_end]:
-            # Collect and mark the path from end to meeting point
-            path_from_end = []
-            temp = current_end
-            while temp in came_from_end:
-                path_from_end.append(temp)
-                temp = came_from_end[temp]
-            path_from_end.append(end)
-            path_from_end.reverse()
-
-            # Collect and mark the path from start to meeting point
-            path_from_start = []
-            temp = current_end
-            while temp in came_from_start:
-                path_from_start.append(temp)
-                temp = came_from_start[temp]
-            path_from_start.append(start)
-
-            # Combine both paths and mark them
-            all_path_spots = set(path_from_start + path_from_end)
-            for spot in all_path_spots:
-                spot.make_path()
-                
-            end.make_end()  # redraw the end color
-            start.make_start()  # redraw the start color
-            return True
-
-        for neighbor in current_end.neighbors:
-            if not visited_end[neighbor] and not neighbor.is_barrier():
-                came_from_end[neighbor] = current_end
-                open_set_end.put(neighbor)
-                visited_end[neighbor] = True
-                neighbor.make_open()
-
-        draw()
-
-        if current_start != start:  # Mark it as closed
-            current_start.make_closed()
-        if current_end != end:  # Mark it as closed
-            current_end.make_closed()
-
-    return False  # if we did not find a path
\ No newline at end of file
+        return SearchResult([start], 0)
+
+    walkable = grid.walkable_bits().bits  # the moves are read from one bit per cell, so huge maps fit in memory
+    size, cols = grid.rows * grid.cols, grid.cols
+    deltas = [dr * cols + dc for dr, dc in FOUR_WAY]  # the change of the cell number of a move in each direction
+    frontiers = [index_stack(size), index_stack(size)]
+    frontiers[0].append(start)
+    frontiers[1].append(end)
+    parents = [PackedArray(size, bits_for(len(FOUR_WAY))), PackedArray(size, bits_for(len(FOUR_WAY)))]
+    visited = [Bitset(size), Bitset(size)]
+    visited[0].add(start)
+    visited[1].add(end)
+    depths = [0, 0]  # the depth of the last layer of each side
+    expanded = generated = 0
+    peak = 2  # the largest number of nodes in both frontiers
+
+    while frontiers[0] and frontiers[1]:
+        peak = max(peak, len(frontiers[0]) + len(frontiers[1]))
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1  # the smaller frontier is cheaper to expand
+        seen, other, parent = visited[side].bits, visited[1 - side].bits, parents[side]
+        layer = index_stack(size)
+
+        for current in frontiers[side]:
+            expanded += 1
+            for k, neighbor in four_way_moves(walkable, size, cols, current):
+                if seen[neighbor >> 3] >> (neighbor & 7) & 1:
+                    continue
+                parent[neighbor] = k
+                seen[neighbor >> 3] |= 1 << (neighbor & 7)
+                generated += 1
+                if visit:
+                    visit(neighbor, "open")
+                if other[neighbor >> 3] >> (neighbor & 7) & 1:  # the searches met, the path is as short as it gets
+                    reconstruct_start = time.perf_counter()
+                    path = trace_parents(parents[0], deltas, start, neighbor)
+                    path += trace_parents(parents[1], deltas, end, neighbor)[-2::-1]  # from the meeting point to the end
+                    result = SearchResult(path, depths[0] + depths[1] + 1, expanded, generated,
+                                          reconstruct_time=time.perf_counter() - reconstruct_start)
+                    result.peak_open = peak
+                    return result
+                layer.append(neighbor)
+            if visit:
+                visit(current, "closed")
+
+        frontiers[side] = layer
+        depths[side] += 1
+
+    result = SearchResult(expanded=expanded, generated=generated)  # if we did not find a path
+    result.peak_open = peak
+    return result
+
+# Bidirectional A* (NBA*, the New Bidirectional A* of Pijls and Post):
+#   Two A* searches, one from the start towards the end and one from the end towards the start, that share the best path found
+#   so far (mu) and the set of nodes that neither side has finished with. A node is only expanded when both of its bounds are
+#   below mu: its own f score, and g + F_other - h_other where F_other is the lowest f score of the other side, so the
+#   searches stop growing as soon as the path through their meeting point cannot be improved.
+#   The moves into a cell cost its terrain cost in both directions, the backward search pays the cost of the cell it comes from.
+
+def bidirectional_a_star(grid, start, end, visit=None, movement="four_way"):
+    ''' Bidirectional A* (NBA*) runs an A* search from each end and prunes every node that cannot lead to a path shorter than the
+        best one through the meeting point found so far. Guarantees the shortest path and usually expands fewer nodes than A*. '''
+    if start == end:
+        return SearchResult([start], 0)
+
+    adjacency = grid.adjacency(movement) # the moves are the same in both directions
+    starts, ends, indices = adjacency.lists() # the neighbors of cell i are indices[starts[i]:ends[i]]
+    weights = adjacency.weight_list()
+    heuristic = heuristic_for(adjacency)
+    costs = grid.costs()
+    scale = grid.min_cost()
+    cols = grid.cols
+    targets = (grid.position(end), grid.position(start)) # each side estimates the distance to where the other one started
+
+    open_sets = (OpenList(), OpenList())
+    g_scores = ({start: 0}, {end: 0})
+    came_from = ({}, {})
+    bounds = [heuristic(targets[1], targets[0], scale)] * 2 # the lowest f score of each side (F1 and F2)
+    finished = set() # the nodes that were expanded or rejected by either side, NBA* keeps the rest in its middle set
+    best, meeting_point = float("inf"), None
+    expanded = generated = 0
+    open_sets[0].push(start, bounds[0], 0)
+    open_sets[1].push(end, bounds[1], 0)
+
+    while open_sets[0] and open_sets[1]:
+        side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1 # the smaller open set first
+        open_set, g_score, parents, target = open_sets[side], g_scores[side], came_from[side], targets[side]
+        other_g, other_target = g_scores[1 - side], targets[1 - side]
+        current = open_set.pop()
+        if current not in finished:
+            finished.add(current)
+            g = g_score[current]
+            position = divmod(current, cols)
+            # reject the node if its own bound or the bound through the other side cannot beat the best path
+            if g + heuristic(position, target, scale) < best and \
+                    g + bounds[1 - side] - heuristic(position, other_target, scale) < best:
+                expanded += 1
+                for k in range(starts[current], ends[current]):
+                    neighbor = indices[k]
+                    if neighbor in finished:
+                        continue
+                    # forwards the move enters the neighbor, backwards the move leaves it and enters the current node
+                    temp_g_score = g + (costs[neighbor] if side == 0 else costs[current]) * weights[k]
+                    if temp_g_score < g_score.get(neighbor, float("inf")):
+                        parents[neighbor] = current
+                        g_score[neighbor] = temp_g_score
+                        if neighbor not in open_set:
+                            generated += 1
+                            if visit:
+                                visit(neighbor, "open")
+                        open_set.push(neighbor, temp_g_score + heuristic(divmod(neighbor, cols), target, scale), temp_g_score)
+                        if neighbor in other_g and temp_g_score + other_g[neighbor] < best: # a shorter path through the neighbor
+                            best, meeting_point = temp_g_score + other_g[neighbor], neighbor
+                if visit:
+                    visit(current, "closed")
+        if open_set:
+            bounds[side] = open_set.peek()
+
+    pushes, pops = open_sets[0].pushes + open_sets[1].pushes, open_sets[0].pops + open_sets[1].pops
+    stale = open_sets[0].stale + open_sets[1].stale
+    if meeting_point is None:
+        return SearchResult(expanded=expanded, generated=generated, heap_pushes=pushes, heap_pops=pops, stale_pops=stale)  # if we did not find a path
+    reconstruct_start = time.perf_counter()
+    path = join_paths(came_from[0], came_from[1], meeting_point)
+    cost = best if adjacency.unit == 1 else best / adjacency.unit # in the units of a straight move
+    return SearchResult(path, cost, expanded, generated, pushes, pops, stale, time.perf_counter() - reconstruct_start)
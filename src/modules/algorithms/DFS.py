@@ -1,7 +1,9 @@
 ''' the module containing the implementation of the DFS algorithm '''
 
-import pygame
-from modules.path_reconstructer import reconstruct_path
+import time
+from modules.adjacency import FOUR_WAY
+from modules.bitset import Bitset, PackedArray, bits_for, four_way_moves, index_stack, trace_parents
+from modules.search_result import SearchResult
 # no need for priority queue as this algorithm doesn't have to decide between nodes
 
 # Description:
@@ -11,6 +13,7 @@ from modules.path_reconstructer import reconstruct_path
 #   - Utilizes a stack to keep track of the nodes to explore.
 #   - Does not consider weights and may not find the shortest path in unweighted graphs.
 #   - It doesn't guarantee the shortest path, but can be used to check if a path exists.
+#   - Ignores terrain costs (Grid.cost), the cost of its path is the number of moves.
 
 # Pros:
 #   - Can be more memory efficient than BFS in certain situations, as it doesn't need to store all the nodes at the current depth.
@@ -22,8 +25,8 @@ from modules.path_reconstructer import reconstruct_path
 
 # using:
 #   1. Stack: Nodes to be explored, stored in a stack.
-#   2. Visited Set: Tracks visited nodes to avoid revisiting them.
-#   3. Parent Mapping: Maps nodes to their parents to reconstruct the path.
+#   2. Visited Set: Tracks visited nodes to avoid revisiting them, one bit per cell.
+#   3. Parent Mapping: The direction of the move that reached each node, two bits per cell, to reconstruct the path.
 
 # Steps:
 #   1. Add the start node to the stack.
@@ -34,37 +37,46 @@ from modules.path_reconstructer import reconstruct_path
 #       4. Add unvisited neighbors to the stack.
 #       5. Mark the node as visited.
 
-def dfs(draw, grid, start, end):
+def dfs(grid, start, end, visit=None):
     ''' DFS is an uninformed search algorithm that explores as far as possible along each branch before backtracking.
     Does not guarantee the shortest path in unweighted graphs. '''
-    stack = [start]  # stack for DFS
-    came_from = {}  # to reconstruct the path
-    visited = {spot: False for row in grid for spot in row}
-    visited[start] = True
+    walkable = grid.walkable_bits().bits  # the moves are read from one bit per cell, so huge maps fit in memory
+    size, cols = grid.rows * grid.cols, grid.cols
+    deltas = [dr * cols + dc for dr, dc in FOUR_WAY]  # the change of the cell number of a move in each direction
+    stack = index_stack(size)  # stack for DFS
+    stack.append(start)
+    parents = PackedArray(size, bits_for(len(FOUR_WAY)))  # to reconstruct the path
+    visited = Bitset(size)
+    visited.add(start)
+    seen = visited.bits
+    expanded = generated = 0
+    peak = 1  # the largest size of the stack
 
     while stack:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-        
+        if len(stack) > peak:
+            peak = len(stack)
         current = stack.pop()  # get the top node to explore
+        expanded += 1
 
         if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()  # redraw the end color
-            start.make_start()  # redraw the start color
-            return True
+            reconstruct_start = time.perf_counter()
+            path = trace_parents(parents, deltas, start, end)
+            result = SearchResult(path, len(path) - 1, expanded, generated, reconstruct_time=time.perf_counter() - reconstruct_start)
+            result.peak_open = peak
+            return result
 
-        for neighbor in current.neighbors:
-            if not visited[neighbor] and not neighbor.is_barrier():
-                came_from[neighbor] = current
+        for k, neighbor in four_way_moves(walkable, size, cols, current):
+            if not seen[neighbor >> 3] >> (neighbor & 7) & 1:  # not visited yet
+                parents[neighbor] = k
                 stack.append(neighbor)
-                visited[neighbor] = True
-                neighbor.make_open()
+                seen[neighbor >> 3] |= 1 << (neighbor & 7)
+                generated += 1
+                if visit:
+                    visit(neighbor, "open")
 
-        draw()
+        if visit:  # mark the node as closed
+            visit(current, "closed")
 
-        if current != start:  # if current is not the start node, mark it as closed
-            current.make_closed()
-
-    return False  # if we did not find a path
+    result = SearchResult(expanded=expanded, generated=generated)  # if we did not find a path
+    result.peak_open = peak
+    return result
@@ -1,7 +1,11 @@
-import pygame
-from queue import PriorityQueue
+''' the module containing the implementation of the Jump Point Search algorithm for 4-connected grids '''
+
+import time
+import numpy as np
+from modules.open_list import OpenList
 from modules.distance_formulas import h  # Manhattan distance heuristic
-from modules.path_reconstructer import reconstruct_path
+from modules.path_reconstructer import reconstruct_path, expand_path
+from modules.search_result import SearchResult
 
 # Description:
 #   Jump Point Search (JPS) is an optimization technique for A* pathfinding. It reduces the number of nodes that need
@@ -10,7 +14,14 @@ from modules.path_reconstructer import reconstruct_path
 
 # Features:
 #   Heuristics: Uses Manhattan distance heuristic to estimate the cost from the current node to the goal.
+#   Symmetry Pruning: Many shortest paths on a grid are the same moves in a different order, JPS only follows one of them.
+#                     Moving horizontally a node only continues forward or turns vertically, moving vertically it also turns horizontally.
+#   Forced Neighbours: A barrier next to the line of travel can make a cell reachable only through the current node.
+#                      Such a node is a jump point and is added to the open set.
 #   Jump Points: Skips non-critical nodes and focuses on "jump points" that are crucial for finding the optimal path.
+#   Uniform Costs: The pruning is only valid when every move costs the same, so terrain costs (Grid.cost) are ignored.
+#   JPS+: Optionally precomputes the distance to the next jump point or wall from every cell in every direction,
+#         so a jump becomes a single table lookup. The tables are cached on the grid until a barrier changes.
 
 # Pros:
 #   Can significantly reduce the number of nodes explored compared to standard A*, especially in open areas.
@@ -19,114 +30,168 @@ from modules.path_reconstructer import reconstruct_path
 # Cons:
 #   More complex implementation due to the identification of jump points.
 #   Performance gain is less significant in very dense or highly complex grids.
+#   Only works on grids where every move has the same cost.
 
 # Steps:
 #   1. Add the start node to the open set with an initial cost of 0.
 #   2. While the open set is not empty:
 #       1. Remove the node with the lowest f score (g + h).
 #       2. If it’s the goal node, reconstruct and return the path.
-#       3. For each direction from the current node:
+#       3. For each direction that is not pruned from the current node:
 #           1. Jump in the current direction until a jump point is found or an obstacle is hit.
+#              A vertical jump also stops where a horizontal jump would find a jump point or the goal.
 #           2. If a jump point is found:
-#               1. Update the g score.
+#               1. Update the g score with the length of the jump.
 #               2. Record the current node as the predecessor of the jump point.
 #               3. If the jump point is not in the open set, add it.
 
-def jps(draw, grid, start, end):
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1)) # DOWN, UP, RIGHT, LEFT, also the order of the JPS+ tables
+
+def pruned_directions(node, parent):
+    ''' Return the directions worth jumping in from a node reached from its parent '''
+    if parent is None: # the start node looks everywhere
+        return DIRECTIONS
+    dr = (node[0] > parent[0]) - (node[0] < parent[0])
+    dc = (node[1] > parent[1]) - (node[1] < parent[1])
+    if dc: # moving horizontally, continue forward or turn vertically
+        return ((0, dc), (1, 0), (-1, 0))
+    return ((dr, 0), (0, 1), (0, -1)) # moving vertically, continue forward or turn horizontally
+
+def _jump_forward(walkable, vertical_stops=None):
+    ''' Return the signed distance from every cell to the next jump point when moving right along each row.
+    A positive distance k means the cell k steps away is a jump point, zero or a negative -k means that
+    the row is blocked after k steps. vertical_stops marks extra jump points used when the rows are columns. '''
+    rows, cols = walkable.shape
+    padded = np.zeros((rows + 2, cols + 1), dtype=bool)
+    padded[1:-1, 1:] = walkable
+    above, above_behind = padded[:-2, 1:], padded[:-2, :-1]
+    below, below_behind = padded[2:, 1:], padded[2:, :-1]
+
+    # a forced neighbour: the cell beside us is open but the one beside the cell behind us is not
+    jump_point = walkable & ((above & ~above_behind) | (below & ~below_behind))
+    if vertical_stops is not None:
+        jump_point |= walkable & vertical_stops
+    stop = ~walkable | jump_point
+
+    # the column of the first stop after every cell, cols if there is none before the edge of the grid
+    columns = np.arange(cols)
+    stop_columns = np.where(stop, columns, cols)
+    next_stop = np.full((rows, cols), cols)
+    next_stop[:, :-1] = np.minimum.accumulate(stop_columns[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+    distance = next_stop - columns
+    hits_jump_point = np.take_along_axis(jump_point, np.minimum(next_stop, cols - 1), axis=1) & (next_stop < cols)
+    return np.where(hits_jump_point, distance, 1 - distance).astype(np.int32)
+
+def jump_tables(grid):
+    ''' Return the JPS+ tables of the grid, one signed jump distance per cell for each of the DIRECTIONS '''
+    tables = grid.derived.get("jps_plus")
+    if tables is None:
+        walkable = ~grid.barrier_mask()
+        right = _jump_forward(walkable)
+        left = _jump_forward(walkable[:, ::-1])[:, ::-1]
+        horizontal = (right > 0) | (left > 0) # vertical jumps stop where a horizontal jump would find something
+        down = _jump_forward(walkable.T, horizontal.T).T
+        up = _jump_forward(walkable[::-1].T, horizontal[::-1].T).T[::-1]
+        tables = grid.derived["jps_plus"] = np.stack((down, up, right, left))
+    return tables
+
+def jps(grid, start, end, visit=None, open_list=None, plus=False):
     ''' Jump Point Search (JPS) is an optimization technique for A* pathfinding. It reduces the number of nodes that need
         to be explored by skipping over large sections of nodes, especially in uniform-cost grids. This is done by identifying
-        "jump points" that are significant in the pathfinding process and only evaluating those. Does not guarantee the shortest path. '''
-    def get_neighbors(node):
-        ''' Get the neighbors of a node while considering jump points '''
-        neighbors = []
-        x, y = node.get_pos()
-        dx = [0, 1, 0, -1]
-        dy = [1, 0, -1, 0]
-        
-        for direction in range(4):
-            nx, ny = x, y
-            while True:
-                nx += dx[direction]
-                ny += dy[direction]
-                if not (0 <= nx < len(grid) and 0 <= ny < len(grid)):
-                    break
-                neighbor = grid[nx][ny]
-                if neighbor.is_barrier():
-                    break
-                neighbors.append(neighbor)
-                if (nx, ny) == end.get_pos():
-                    break
-        return neighbors
-    
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
+        "jump points" that are significant in the pathfinding process and only evaluating those. Guarantees the shortest path. '''
+    blocked = grid.blocked_rows()
+    rows, cols = grid.rows, grid.cols
+    start, end = grid.position(start), grid.position(end) # jumps are easier to follow in rows and columns than cell numbers
+    end_row, end_col = end
+
+    def walkable(row, col):
+        ''' If the cell is inside the grid and not a barrier '''
+        return 0 <= row < rows and 0 <= col < cols and not blocked[row][col]
+
+    def jump(row, col, dr, dc):
+        ''' Move from a cell in a direction and return the first jump point, or None if a wall comes first '''
+        while walkable(row, col):
+            if (row, col) == end:
+                return row, col
+            if dc: # moving horizontally, stop at a forced neighbour above or below
+                if (walkable(row - 1, col) and not walkable(row - 1, col - dc)) or \
+                   (walkable(row + 1, col) and not walkable(row + 1, col - dc)):
+                    return row, col
+            else: # moving vertically, stop at a forced neighbour left or right
+                if (walkable(row, col - 1) and not walkable(row - dr, col - 1)) or \
+                   (walkable(row, col + 1) and not walkable(row - dr, col + 1)):
+                    return row, col
+                # or where turning horizontally leads to a jump point
+                if jump(row, col + 1, 0, 1) or jump(row, col - 1, 0, -1):
+                    return row, col
+            row += dr
+            col += dc
+        return None
+
+    if plus:
+        tables = jump_tables(grid)
+
+    def jump_plus(row, col, dr, dc):
+        ''' The same as jump but reads the distance from the JPS+ tables, only the goal has to be checked by hand '''
+        distance = tables.item(DIRECTIONS.index((dr, dc)), row, col)
+        reach = abs(distance) # how far we can travel before the jump point or the wall
+        if dc:
+            if end_row == row and 0 < (end_col - col) * dc <= reach:
+                return end
+        else:
+            ahead = (end_row - row) * dr
+            if 0 < ahead <= reach:
+                if end_col == col:
+                    return end
+                # a horizontal jump from the goal's row would reach the goal
+                side = 1 if end_col > col else -1
+                sideways = tables.item(DIRECTIONS.index((0, side)), end_row, col)
+                if sideways <= 0 and abs(end_col - col) <= -sideways:
+                    return end_row, col
+        if distance > 0:
+            return row + distance * dr, col + distance * dc
+        return None
+
+    open_set = OpenList() if open_list is None else open_list
     came_from = {}
-    
-    g_score = {spot: float("inf") for row in grid for spot in row}
-    g_score[start] = 0
-    f_score = {spot: float("inf") for row in grid for spot in row}
-    f_score[start] = h(start.get_pos(), end.get_pos())
-    
-    open_set_hash = {start}
-    
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-        
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-        
+
+    g_score = {start: 0}
+    open_set.push(start, h(start, end), 0)
+    expanded = generated = 0
+
+    while open_set:
+        current = open_set.pop()
+        expanded += 1
+
         if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            start.make_start()
-            
-            # Mark all spots between the paths as path
-            path = [current]
-            while current in came_from:
-                current = came_from[current]
-                path.append(current)
-            for spot in path:
-                spot.make_path()
-            
-            # Mark all intermediate nodes between path nodes
-            for i in range(len(path) - 1):
-                x1, y1 = path[i].get_pos()
-                x2, y2 = path[i + 1].get_pos()
-                if x1 == x2:
-                    for y in range(min(y1, y2) + 1, max(y1, y2)):
-                        intermediate = grid[x1][y]
-                        if not intermediate.is_path() and not intermediate.is_barrier():
-                            intermediate.make_path()
-                elif y1 == y2:
-                    for x in range(min(x1, x2) + 1, max(x1, x2)):
-                        intermediate = grid[x][y1]
-                        if not intermediate.is_path() and not intermediate.is_barrier():
-                            intermediate.make_path()
-            
-            draw()
-            start.make_start()
-            end.make_end()
-            return True
-        
-        for neighbor in get_neighbors(current):
-            temp_g_score = g_score[current] + 1
-            
-            if temp_g_score < g_score[neighbor]:
+            # Mark all intermediate nodes between the jump points as path
+            reconstruct_start = time.perf_counter()
+            path = expand_path([grid.index(pos) for pos in reconstruct_path(came_from, end)], grid.cols)
+            return SearchResult(path, g_score[end], expanded, generated, open_set.pushes, open_set.pops, open_set.stale,
+                                time.perf_counter() - reconstruct_start)
+
+        row, col = current
+        for dr, dc in pruned_directions(current, came_from.get(current)):
+            if plus:
+                neighbor = jump_plus(row, col, dr, dc)
+            else:
+                neighbor = jump(row + dr, col + dc, dr, dc)
+            if neighbor is None:
+                continue
+            temp_g_score = g_score[current] + h(current, neighbor) # the length of the straight jump
+
+            if temp_g_score < g_score.get(neighbor, float("inf")):
                 came_from[neighbor] = current
                 g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + h(neighbor.get_pos(), end.get_pos())
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()
-        
-        draw()
-        
-        if current != start:
-            current.make_closed()
-            
-    return False
+                if neighbor not in open_set:
+                    generated += 1
+                    if visit:
+                        visit(grid.index(neighbor), "open")
+                open_set.push(neighbor, temp_g_score + h(neighbor, end), temp_g_score)
+
+        if visit:
+            visit(grid.index(current), "closed")
+
+    return SearchResult(expanded=expanded, generated=generated, heap_pushes=open_set.pushes, heap_pops=open_set.pops,
+                        stale_pops=open_set.stale)
@@ -1,9 +1,10 @@
 ''' the module containing the implementation of the A* algorithm '''
 
-import pygame
-from queue import PriorityQueue # a efficient way to get the minimum element form a set
-from modules.distance_formulas import h # We use the manhattan distance as we cant move diagonal so the additional calculation of the euclidean distance is not needed
+import time
+from modules.open_list import OpenList
+from modules.distance_formulas import heuristic_for # the manhattan distance for 4 directions, the octile or chebyshev distance with diagonals
 from modules.path_reconstructer import reconstruct_path
+from modules.search_result import SearchResult
 
 # Description: 
 #   A* is an informed search algorithm that finds the shortest path between nodes by using both the actual cost from the start (g score)
@@ -27,6 +28,9 @@ from modules.path_reconstructer import reconstruct_path
 #   3. g Score: Cost from the start node to a node.
 #   4. h Score: Heuristic estimate from a node to the goal.
 #   5. f Score: g+h (total estimated cost).
+#   6. Terrain: moving into a cell costs Grid.cost of that cell, h is scaled by the cheapest cell to stay admissible.
+#   7. Movement: 4 directions by default, with diagonals the moves weigh 10 and 14 so the g scores stay integers and h is the octile distance.
+#                When a diagonal weighs 10 like a straight move (eight_way_uniform) h is the chebyshev distance.
 
 # Steps:
 #   1. Add the start node to the open set.
@@ -37,51 +41,50 @@ from modules.path_reconstructer import reconstruct_path
 #       4. Add unvisited neighbors to the open set.
 #       5. Move the node to the closed set.
 
-def a_star(draw, grid, start, end):
+def a_star(grid, start, end, visit=None, open_list=None, movement="four_way"):
     '''  A* is an informed search algorithm that finds the shortest path between nodes by using both the actual cost from the start (g score)
         and an estimated cost to the goal (h score). This combination helps prioritize paths that appear closer to the goal. Guarantees the shortest path if the heuristic is admissible (does not overestimate the true cost). '''
-    count = 0
-    open_set = PriorityQueue() # defining the open set
-    open_set.put((0, count, start))
+    adjacency = grid.adjacency(movement) # the moves of the movement model, "four_way", "eight_way" or "eight_way_no_corners"
+    starts, ends, indices = adjacency.lists() # the neighbors of cell i are indices[starts[i]:ends[i]]
+    weights = adjacency.weight_list() # the weight of each move, 1 or 10 for a straight move and 14 for a diagonal one
+    heuristic = heuristic_for(adjacency)
+    costs = grid.costs() # the cost of moving into each cell
+    scale = grid.min_cost() # the heuristic counts every remaining move at the cheapest cost so it never overestimates
+    cols = grid.cols
+    goal = grid.position(end)
+    open_set = OpenList() if open_list is None else open_list # defining the open set
     came_from = {} # the path that the algorithm has taken
     
-    g_score = {spot: float("inf") for row in grid for spot in row} # the cost of getting to the start spot
-    g_score[start] = 0
-    f_score = {spot: float("inf") for row in grid for spot in row} # the cost of getting to the end spot
-    f_score[start] = h(start.get_pos(), end.get_pos()) # the heuristic function
+    g_score = {start: 0} # the cost of getting to each spot from the start spot, missing spots are at infinity
+    open_set.push(start, heuristic(grid.position(start), goal, scale), 0) # the f score of the start is just the heuristic function
+    expanded = generated = 0
     
-    open_set_hash = {start} # the open set in the form of a hash table
-    
-    while not open_set.empty(): # to run the algorithm until the open set is empty
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-        
-        current = open_set.get()[2] # 2 is the index of the node after the g and f scores
-        open_set_hash.remove(current) # synchronizing to prevent duplicates
+    while open_set: # to run the algorithm until the open set is empty
+        current = open_set.pop() # the node with the lowest f score
+        expanded += 1
         
         if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end() # redraw the end color
-            start.make_start() # redraw the start color
-            return True
+            reconstruct_start = time.perf_counter()
+            path = reconstruct_path(came_from, end)
+            cost = g_score[end] if adjacency.unit == 1 else g_score[end] / adjacency.unit # back in the units of a straight move
+            return SearchResult(path, cost, expanded, generated, open_set.pushes, open_set.pops, open_set.stale,
+                                time.perf_counter() - reconstruct_start)
         
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1
+        for k in range(starts[current], ends[current]):
+            neighbor = indices[k]
+            temp_g_score = g_score[current] + costs[neighbor] * weights[k] # the cost of a move is the cost of the cell it moves into
             
-            if temp_g_score < g_score[neighbor]: # checking if the new path is better
+            if temp_g_score < g_score.get(neighbor, float("inf")): # checking if the new path is better
                 came_from[neighbor] = current # updating the path
                 g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + h(neighbor.get_pos(), end.get_pos())
-                if neighbor not in open_set_hash: # if the neighbor is not in the open set, add it
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()
-                    
-        draw()
+                if neighbor not in open_set: # if the neighbor is not in the open set, it is newly generated
+                    generated += 1
+                    if visit:
+                        visit(neighbor, "open")
+                open_set.push(neighbor, temp_g_score + heuristic(divmod(neighbor, cols), goal, scale), temp_g_score) # add it or lower its f score
         
-        if current != start:  # if current is not the start node, make it closed
-            current.make_closed()
+        if visit:
+            visit(current, "closed")
             
-    return False # if we did not find a path
\ No newline at end of file
+    return SearchResult(expanded=expanded, generated=generated, heap_pushes=open_set.pushes, heap_pops=open_set.pops,
+                        stale_pops=open_set.stale) # if we did not find a path
@@ -1,8 +1,9 @@
 ''' this module contains the implementation of the dijkstra's algorithm '''
 
-import pygame
-from queue import PriorityQueue # a efficient way to get the minimum element form a set
+import time
+from modules.open_list import OpenList
 from modules.path_reconstructer import reconstruct_path
+from modules.search_result import SearchResult
 
 # Description: 
 #   Dijkstra's algorithm is a pathfinding algorithm used to find the shortest path between nodes in a graph. 
@@ -38,51 +39,51 @@ from modules.path_reconstructer import reconstruct_path
 #           3. If the neighbor is not in the open set, add it.
 
 # Note: This is equivalent to BFS when all the weights are equal to 1.
+#       The weight of a move is the cost of the cell it moves into (Grid.cost), 1 on plain ground.
+#       With diagonal moves (movement="eight_way") a straight move weighs 10 and a diagonal one 14 times that cost.
 
-def dijkstra(draw, grid, start, end):
+def dijkstra(grid, start, end, visit=None, open_list=None, movement="four_way"):
     ''' Dijkstra's algorithm is a pathfinding algorithm used to find the shortest path between nodes in a graph. 
     It works by exploring all possible paths from the start node, prioritizing paths with the lowest accumulated cost 
     until the goal is reached. Guarantees the shortest path in graphs with non-negative weights.
     '''
-    count = 0
-    open_set = PriorityQueue() # Priority queue for the open set
-    open_set.put((0, count, start))
+    adjacency = grid.adjacency(movement) # The moves of the movement model
+    starts, ends, indices = adjacency.lists() # The neighbors of cell i are indices[starts[i]:ends[i]]
+    weights = adjacency.weight_list() # The weight of each move, 10 and 14 for straight and diagonal moves when there are diagonals
+    costs = grid.costs() # The cost of moving into each cell
+    open_set = OpenList() if open_list is None else open_list # Binary heap for the open set
     came_from = {} # Dictionary to store the path
 
-    g_score = {spot: float("inf") for row in grid for spot in row} # Distance to start node
-    g_score[start] = 0
-    
-    open_set_hash = {start} # Set to keep track of items in the priority queue
+    g_score = {start: 0} # Distance to start node, missing nodes are at infinity
+    open_set.push(start, 0)
+    expanded = generated = 0
 
-    while not open_set.empty(): # Continue until open set is empty
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = open_set.get()[2] # Get the node with the lowest cost
-        open_set_hash.remove(current)
+    while open_set: # Continue until open set is empty
+        current = open_set.pop() # Get the node with the lowest cost
+        expanded += 1
 
         if current == end: # If the goal is reached, reconstruct the path
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            start.make_start()
-            return True
+            reconstruct_start = time.perf_counter()
+            path = reconstruct_path(came_from, end)
+            cost = g_score[end] if adjacency.unit == 1 else g_score[end] / adjacency.unit # In the units of a straight move
+            return SearchResult(path, cost, expanded, generated, open_set.pushes, open_set.pops, open_set.stale,
+                                time.perf_counter() - reconstruct_start)
 
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1 # The cost from the start node to the neighbor
+        for k in range(starts[current], ends[current]):
+            neighbor = indices[k]
+            temp_g_score = g_score[current] + costs[neighbor] * weights[k] # The cost from the start node to the neighbor
 
-            if temp_g_score < g_score[neighbor]: # If a shorter path to the neighbor is found
+            if temp_g_score < g_score.get(neighbor, float("inf")): # If a shorter path to the neighbor is found
                 came_from[neighbor] = current
                 g_score[neighbor] = temp_g_score
-                if neighbor not in open_set_hash: # Add neighbor to open set if not already present
-                    count += 1
-                    open_set.put((g_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()
-
-        draw()
+                if neighbor not in open_set: # Count the neighbor if it is not already in the open set
+                    generated += 1
+                    if visit:
+                        visit(neighbor, "open")
+                open_set.push(neighbor, temp_g_score, temp_g_score) # Add it or lower its cost
 
-        if current != start:  # Mark the current node as visited
-            current.make_closed()
+        if visit: # Mark the current node as visited
+            visit(current, "closed")
 
-    return False # If no path is found
\ No newline at end of file
+    return SearchResult(expanded=expanded, generated=generated, heap_pushes=open_set.pushes, heap_pops=open_set.pops,
+                        stale_pops=open_set.stale) # If no path is found
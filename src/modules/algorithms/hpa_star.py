@@ -0,0 +1,295 @@
+''' the module containing the implementation of the HPA* hierarchical algorithm '''
+
+import time
+import numpy as np
+from modules.grid import Grid, BARRIER
+from modules.open_list import OpenList
+from modules.distance_formulas import h # the manhattan distance, the same heuristic as A*
+from modules.search_result import SearchResult
+from modules.algorithms.a_star import a_star
+
+INF = float("inf")
+CLUSTER_SIZE = 16 # the side of a cluster in cells
+ROUNDS_PER_CHECK = 4 # relaxation rounds between two checks if the distances stopped changing
+ENTRANCE_SPLIT = 6 # an opening between two clusters at least this wide gets an entrance at both of its ends instead of one in the middle
+
+# Description:
+#   Hierarchical Path-Finding A* (HPA*) splits the grid into square clusters and builds a small abstract graph on top of them.
+#   Queries are answered on the abstract graph and only the clusters on the chosen route are searched cell by cell,
+#   which makes searches on maps with thousands of cells per side fast.
+
+# Features:
+#   Entrances: Every opening in the border between two neighboring clusters gets one or two entrance nodes, a pair of cells
+#              facing each other across the border.
+#   Intra-Cluster Edges: The distance between every two entrances of a cluster is precomputed by searching inside the cluster,
+#                        counting the cost of every cell that is moved into (Grid.cost).
+#   Refinement: Each step of the abstract path inside a cluster is turned back into cells with A* on that cluster alone.
+#   Incremental Updates: When a barrier changes only the borders and distances of the clusters around it are rebuilt.
+
+# Pros:
+#   A query searches a graph of a few nodes per cluster instead of every cell, so it scales to very large maps.
+#   The abstraction is built once per map and kept up to date cluster by cluster.
+
+# Cons:
+#   The paths are close to the shortest, usually within a few percent, but not guaranteed to be the shortest.
+#   Building the abstraction costs more than a single A* search, it pays off over many queries.
+
+# Steps:
+#   1. Split the grid into clusters, find the entrances on every border and the distances between the entrances of every cluster.
+#   2. Connect the start and the end to the entrances of their clusters by searching inside those clusters.
+#   3. Run A* on the abstract graph from the start to the end.
+#   4. Refine every step of the abstract path inside a cluster with A* on that cluster and join the pieces into the path.
+
+class Hierarchy:
+    ''' The abstract graph of HPA*: the clusters, the entrances between them and the distances inside every cluster.
+    Cells are numbered like in the grid (row * cols + col) and the abstract nodes are the cells of the entrances. '''
+    def __init__(self, grid, cluster_size=CLUSTER_SIZE):
+        ''' Build the abstraction of the grid '''
+        self.grid = grid
+        self.size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.entrances = {} # the (cell, cell) pairs of every border, keyed by its (top or left cluster, other cluster)
+        self.inter = {} # the cells across a border from every entrance cell, one move away
+        self.intra = {} # every cluster: {entrance: {other entrance of the cluster: distance}}
+        self.local = {} # a Grid of just the cells of a cluster, built when a path through the cluster is refined
+
+        for cluster in self.clusters():
+            for border in self.borders(cluster):
+                if border[0] == cluster: # build each border once, from its top or left cluster
+                    self.build_border(border)
+        for cluster in self.clusters():
+            self.build_cluster(cluster)
+
+    def clusters(self):
+        ''' Every cluster as (cluster row, cluster col) '''
+        return [(row, col) for row in range(self.cluster_rows) for col in range(self.cluster_cols)]
+
+    def cluster_of(self, cell):
+        ''' The cluster that a cell belongs to '''
+        row, col = divmod(cell, self.grid.cols)
+        return row // self.size, col // self.size
+
+    def bounds(self, cluster):
+        ''' The first row, first col, last row + 1 and last col + 1 of the cells of a cluster '''
+        row, col = cluster[0] * self.size, cluster[1] * self.size
+        return row, col, min(row + self.size, self.grid.rows), min(col + self.size, self.grid.cols)
+
+    def borders(self, cluster):
+        ''' The borders of a cluster with its neighbors, each as (top or left cluster, bottom or right cluster) '''
+        row, col = cluster
+        borders = []
+        if row > 0:
+            borders.append(((row - 1, col), cluster))
+        if col > 0:
+            borders.append(((row, col - 1), cluster))
+        if row + 1 < self.cluster_rows:
+            borders.append((cluster, (row + 1, col)))
+        if col + 1 < self.cluster_cols:
+            borders.append((cluster, (row, col + 1)))
+        return borders
+
+    def build_border(self, border):
+        ''' Find the entrances of a border, every run of cells that are free on both sides is one opening '''
+        for a, b in self.entrances.get(border, ()): # forget the old entrances
+            self.inter[a].remove(b)
+            self.inter[b].remove(a)
+
+        first, second = border
+        top, left, bottom, right = self.bounds(first)
+        state = self.grid.state
+        cols = self.grid.cols
+        if second[0] > first[0]: # the bottom row of the first cluster faces the top row of the second
+            cells = [(bottom - 1) * cols + col for col in range(left, right)]
+            step = cols
+            free = (state[bottom - 1, left:right] != BARRIER) & (state[bottom, left:right] != BARRIER)
+        else: # the right column of the first cluster faces the left column of the second
+            cells = [row * cols + right - 1 for row in range(top, bottom)]
+            step = 1
+            free = (state[top:bottom, right - 1] != BARRIER) & (state[top:bottom, right] != BARRIER)
+
+        pairs = []
+        run = 0
+        for i, is_free in enumerate(free.tolist() + [False]): # the extra False closes the last opening
+            if is_free:
+                run += 1
+                continue
+            if run:
+                first_cell, last_cell = cells[i - run], cells[i - 1]
+                if run < ENTRANCE_SPLIT:
+                    pairs.append(cells[i - run + run // 2]) # one entrance in the middle of a narrow opening
+                else:
+                    pairs += [first_cell, last_cell]
+            run = 0
+
+        self.entrances[border] = [(cell, cell + step) for cell in pairs]
+        for a, b in self.entrances[border]:
+            self.inter.setdefault(a, []).append(b)
+            self.inter.setdefault(b, []).append(a)
+
+    def nodes(self, cluster):
+        ''' The entrance cells of a cluster '''
+        nodes = set()
+        for border in self.borders(cluster):
+            side = 0 if border[0] == cluster else 1
+            nodes.update(pair[side] for pair in self.entrances.get(border, ()))
+        return nodes
+
+    def build_cluster(self, cluster):
+        ''' Rebuild the distances between the entrances of a cluster '''
+        self.local.pop(cluster, None)
+        nodes = list(self.nodes(cluster))
+        distances = self.distances(cluster, nodes, nodes)
+        self.intra[cluster] = {node: {other: cost for other, cost in zip(nodes, row) if other != node and cost < INF}
+                               for node, row in zip(nodes, distances)}
+
+    def local_grid(self, cluster):
+        ''' Return the Grid of the cells of a cluster '''
+        local = self.local.get(cluster)
+        if local is None:
+            top, left, bottom, right = self.bounds(cluster)
+            local = self.local[cluster] = Grid.from_array(self.grid.state[top:bottom, left:right] == BARRIER,
+                                                          self.grid.cost[top:bottom, left:right])
+        return local
+
+    def to_local(self, cluster, cell):
+        ''' The number of a cell in the grid of its cluster '''
+        top, left, bottom, right = self.bounds(cluster)
+        row, col = divmod(cell, self.grid.cols)
+        return (row - top) * (right - left) + col - left
+
+    def to_global(self, cluster, cell):
+        ''' The number in the whole grid of a cell of the grid of a cluster '''
+        top, left, bottom, right = self.bounds(cluster)
+        row, col = divmod(cell, right - left)
+        return (row + top) * self.grid.cols + col + left
+
+    def distances(self, cluster, sources, targets):
+        ''' Return the distance from every source to every target as a list of rows, inf where a target cannot be
+        reached without leaving the cluster. All the sources are relaxed together with numpy: every round lowers the
+        distance of each cell to that of its best neighbor plus the cost of entering the cell, until nothing changes. '''
+        top, left, bottom, right = self.bounds(cluster)
+        step = np.where(self.grid.state[top:bottom, left:right] == BARRIER, INF, self.grid.cost[top:bottom, left:right]) # a barrier can never be entered
+        cols = self.grid.cols
+        distance = np.full((len(sources),) + step.shape, INF)
+        for i, source in enumerate(sources):
+            row, col = divmod(source, cols)
+            distance[i, row - top, col - left] = 0
+
+        step_down, step_up, step_right, step_left = step[1:], step[:-1], step[:, 1:], step[:, :-1]
+        before = None
+        while before is None or not np.array_equal(distance, before):
+            before = distance.copy()
+            for _ in range(ROUNDS_PER_CHECK):
+                np.minimum(distance[:, 1:], distance[:, :-1] + step_down, out=distance[:, 1:]) # from the cell above
+                np.minimum(distance[:, :-1], distance[:, 1:] + step_up, out=distance[:, :-1]) # from the cell below
+                np.minimum(distance[:, :, 1:], distance[:, :, :-1] + step_right, out=distance[:, :, 1:]) # from the cell on the left
+                np.minimum(distance[:, :, :-1], distance[:, :, 1:] + step_left, out=distance[:, :, :-1]) # from the cell on the right
+
+        rows, columns = np.divmod(np.array(targets, dtype=np.int64), cols)
+        return [[int(cost) if cost < INF else INF for cost in row] # whole numbers like the costs of the other algorithms
+                for row in distance[:, rows - top, columns - left].tolist()]
+
+    def update(self, changes):
+        ''' Rebuild the clusters around the changed cells, changes holds ((row, col), walkable) pairs like Adjacency.update '''
+        changed = {self.cluster_of(self.grid.index(pos)) for pos, _ in changes}
+        borders = {border for cluster in changed for border in self.borders(cluster)}
+        for border in borders:
+            self.build_border(border)
+        for cluster in changed.union(*borders): # the clusters across the borders may have gained or lost entrances
+            self.build_cluster(cluster)
+
+    def search(self, start, end, visit=None):
+        ''' Find a path between two cells on the abstract graph and refine it into cells, visit sees the abstract nodes '''
+        start_cluster, end_cluster = self.cluster_of(start), self.cluster_of(end)
+        goal = self.grid.position(end)
+        cols = self.grid.cols
+        costs = self.grid.costs()
+        scale = self.grid.min_cost()
+
+        # connect the start and the end to the entrances of their clusters
+        start_targets = list(self.nodes(start_cluster))
+        if end_cluster == start_cluster: # the end may also be reached without leaving the cluster
+            start_targets.append(end)
+        start_edges = {node: cost for node, cost in zip(start_targets, self.distances(start_cluster, [start], start_targets)[0]) if cost < INF}
+        end_targets = list(self.nodes(end_cluster))
+        # a path walked backwards pays for its first cell instead of its last one
+        end_nodes = {node: cost + costs[end] - costs[node] for node, cost in zip(end_targets, self.distances(end_cluster, [end], end_targets)[0]) if cost < INF}
+
+        open_set = OpenList()
+        came_from = {}
+        g_score = {start: 0}
+        open_set.push(start, h(divmod(start, cols), goal, scale), 0)
+        expanded = generated = 0
+
+        while open_set:
+            current = open_set.pop()
+            expanded += 1
+            if current == end:
+                break
+
+            if current == start:
+                edges = list(start_edges.items())
+            else:
+                edges = list(self.intra[self.cluster_of(current)][current].items())
+                if current in end_nodes:
+                    edges.append((end, end_nodes[current]))
+            edges += [(neighbor, costs[neighbor]) for neighbor in self.inter.get(current, ())] # the start may be an entrance itself
+
+            for neighbor, cost in edges:
+                temp_g_score = g_score[current] + cost
+                if temp_g_score < g_score.get(neighbor, INF):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = temp_g_score
+                    if neighbor not in open_set:
+                        generated += 1
+                        if visit:
+                            visit(neighbor, "open")
+                    open_set.push(neighbor, temp_g_score + h(divmod(neighbor, cols), goal, scale), temp_g_score)
+
+            if visit:
+                visit(current, "closed")
+
+        result = SearchResult(expanded=expanded, generated=generated, heap_pushes=open_set.pushes, heap_pops=open_set.pops,
+                              stale_pops=open_set.stale)
+        if end not in g_score:
+            return result
+        reconstruct_start = time.perf_counter()
+
+        # refine the abstract path, a step inside a cluster is searched with A* on that cluster only
+        abstract = [end]
+        while abstract[-1] != start:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):
+            cluster = self.cluster_of(a)
+            if cluster != self.cluster_of(b): # a move across a border
+                path.append(b)
+                continue
+            local = a_star(self.local_grid(cluster), self.to_local(cluster, a), self.to_local(cluster, b))
+            path += [self.to_global(cluster, cell) for cell in local.path[1:]]
+            result.expanded += local.expanded
+            result.generated += local.generated
+            result.heap_pushes += local.heap_pushes
+            result.heap_pops += local.heap_pops
+            result.stale_pops += local.stale_pops
+
+        result.path = path
+        result.cost = g_score[end]
+        result.reconstruct_time = time.perf_counter() - reconstruct_start # the refinement is the reconstruction of HPA*
+        return result
+
+def hierarchy(grid, cluster_size=CLUSTER_SIZE):
+    ''' Return the HPA* abstraction of a grid, it is built on first use and then kept up to date by Grid.set() '''
+    key = ("hpa", cluster_size)
+    abstraction = grid.adjacencies.get(key)
+    if abstraction is None:
+        abstraction = grid.adjacencies[key] = Hierarchy(grid, cluster_size)
+    return abstraction
+
+def hpa_star(grid, start, end, visit=None, cluster_size=CLUSTER_SIZE):
+    ''' Hierarchical Path-Finding A* splits the grid into clusters connected by entrances and searches the small graph
+        of entrances first. Only the clusters on the chosen route are then searched cell by cell, which makes it fast
+        on very large maps. The paths are close to the shortest but not always the shortest. '''
+    return hierarchy(grid, cluster_size).search(start, end, visit)
@@ -0,0 +1,178 @@
+''' the module containing the implementation of the LPA* and D* Lite incremental algorithms '''
+
+import time
+from modules.open_list import OpenList
+from modules.distance_formulas import h # the manhattan distance, the same heuristic as A*
+from modules.search_result import SearchResult
+
+INF = float("inf")
+
+# Description:
+#   Lifelong Planning A* (LPA*) is an incremental version of A*. It keeps its g scores between searches, so when a few cells
+#   change only the part of the search that depended on them is repaired instead of searching the whole map again.
+#   D* Lite is the same idea run backwards from the goal, which lets the start move (a robot walking along its path)
+#   without throwing the search away.
+
+# Features:
+#   rhs Score: A one step lookahead of the g score, the lowest g score of a neighbor plus the cost of the move
+#              (the cost of the cell it moves into, Grid.cost).
+#              A node is consistent when g == rhs and only inconsistent nodes are kept in the open set.
+#   Keys: Nodes are ordered by [min(g, rhs) + h, min(g, rhs)], so the repair spreads out from the changed cells in A* order.
+#   Moving Start (D* Lite): The heuristic is measured to the start, when the start moves every key in the open set would shrink
+#                           by the same amount, so instead that amount is added to new keys (km) and old keys are fixed when they are popped.
+
+# Pros:
+#   Replanning after a small change costs a small fraction of a full search.
+#   The first search expands the same nodes as A* and finds the same shortest path.
+
+# Cons:
+#   Keeps the g and rhs scores of every visited node in memory between searches.
+#   A change close to the start (LPA*) or the goal (D* Lite) can invalidate most of the search and cost more than starting over.
+
+# Steps:
+#   1. The rhs score of the start (the goal for D* Lite) is 0, put it in the open set.
+#   2. While the lowest key in the open set is below the key of the goal, or the goal is inconsistent:
+#       1. Remove the node with the lowest key.
+#       2. If its g score is above its rhs score, lower the g score to the rhs score (the node becomes consistent).
+#          Otherwise raise the g score to infinity.
+#       3. Recompute the rhs score of its neighbors (and of the node itself when it was raised) and put the inconsistent ones in the open set.
+#   3. Walk from the goal back to the start along the neighbors with the lowest g scores to get the path.
+#   4. When cells change (barriers or costs), recompute the rhs scores of the changed cells and their neighbors and go back to step 2.
+
+class LPAStar:
+    ''' Lifelong Planning A* is an incremental version of A* that keeps its g scores between searches. When barriers are
+        added or removed only the part of the search that depended on them is repaired, so replanning after a small change
+        costs a small fraction of a full search. '''
+    backward = False # D* Lite searches from the end to the start
+
+    def __init__(self, grid, start, end, visit=None, open_list=None):
+        ''' Initialize the planner, start and end are cell numbers and visit is called as visit(cell, "open" | "closed") '''
+        self.grid = grid
+        self.start = start
+        self.end = end
+        self.visit = visit
+        self.open_set = OpenList() if open_list is None else open_list
+        self.source, self.target = (end, start) if self.backward else (start, end)
+        self.target_position = grid.position(self.target) # the heuristic is measured to this cell
+        self.km = 0 # how much the heuristic of the old keys is too large after the start moved (D* Lite)
+        self.scale = grid.min_cost() # the heuristic counts every move at the cheapest cost so it never overestimates
+        self.g = {} # the cost of getting to each cell from the source, missing cells are at infinity
+        self.rhs = {self.source: 0} # the one step lookahead of the g scores
+        self.expanded = self.generated = 0 # counted since the last plan()
+        self.open_set.push(self.source, self.key(self.source))
+
+    def key(self, node):
+        ''' The priority of a node in the open set '''
+        best = min(self.g.get(node, INF), self.rhs.get(node, INF))
+        return (best + h(divmod(node, self.grid.cols), self.target_position, self.scale) + self.km, best)
+
+    def update_vertex(self, node, starts, ends, indices, costs):
+        ''' Recompute the rhs score of a node and put it in the open set if it became inconsistent '''
+        g = self.g
+        if node != self.source:
+            neighbors = indices[starts[node]:ends[node]]
+            if self.backward: # the cost of the move out of the node into the neighbor
+                self.rhs[node] = min((g.get(neighbor, INF) + costs[neighbor] for neighbor in neighbors), default=INF)
+            else: # the cost of the move from the neighbor into the node
+                self.rhs[node] = min((g.get(neighbor, INF) for neighbor in neighbors), default=INF) + costs[node]
+        if node in self.open_set:
+            self.open_set.remove(node)
+        if g.get(node, INF) != self.rhs.get(node, INF):
+            self.open_set.push(node, self.key(node))
+            self.generated += 1
+            if self.visit and self.rhs.get(node, INF) < INF: # a cell that just became a barrier is only queued to raise its g score
+                self.visit(node, "open")
+
+    def cells_changed(self, cells):
+        ''' Tell the planner which cells became barriers, were freed or changed their cost, call it after changing them on the grid '''
+        starts, ends, indices = self.grid.adjacency().lists()
+        costs = self.grid.costs()
+        rows, cols = self.grid.rows, self.grid.cols
+        if self.grid.min_cost() < self.scale: # a cheaper cell would make the heuristic overestimate, so lower it for every key
+            self.scale = self.grid.min_cost()
+            for node in list(self.open_set):
+                self.open_set.remove(node)
+                self.open_set.push(node, self.key(node))
+        for cell in cells:
+            row, col = divmod(cell, cols)
+            self.update_vertex(cell, starts, ends, indices, costs)
+            # a barrier has no moves left in the adjacency, so its old neighbors have to be told explicitly
+            for dr, dc in self.grid.adjacency().directions:
+                if 0 <= row + dr < rows and 0 <= col + dc < cols:
+                    self.update_vertex(cell + dr * cols + dc, starts, ends, indices, costs)
+
+    def plan(self):
+        ''' Repair the search until the path is known again and return a SearchResult with the statistics of this call '''
+        starts, ends, indices = self.grid.adjacency().lists()
+        costs = self.grid.costs()
+        open_set, g, rhs, target = self.open_set, self.g, self.rhs, self.target
+        pushes, pops, stale = open_set.pushes, open_set.pops, open_set.stale
+
+        while open_set:
+            top = open_set.peek()
+            if top >= self.key(target) and rhs.get(target, INF) == g.get(target, INF):
+                break
+            current = open_set.pop()
+            self.expanded += 1
+
+            new_key = self.key(current)
+            if top < new_key: # the key is outdated because the start moved since it was pushed
+                open_set.push(current, new_key)
+                continue
+
+            if g.get(current, INF) > rhs.get(current, INF): # over-consistent, the node got cheaper
+                g[current] = rhs[current]
+                if self.visit:
+                    self.visit(current, "closed")
+            else: # under-consistent, the node got more expensive so its neighbors have to be recomputed without it
+                g[current] = INF
+                self.update_vertex(current, starts, ends, indices, costs)
+            for k in range(starts[current], ends[current]):
+                self.update_vertex(indices[k], starts, ends, indices, costs)
+
+        result = SearchResult(expanded=self.expanded, generated=self.generated, heap_pushes=open_set.pushes - pushes,
+                              heap_pops=open_set.pops - pops, stale_pops=open_set.stale - stale)
+        self.expanded = self.generated = 0
+        if g.get(target, INF) < INF:
+            reconstruct_start = time.perf_counter()
+            result.path = self.path(starts, ends, indices, costs)
+            result.cost = g[target]
+            result.reconstruct_time = time.perf_counter() - reconstruct_start
+        return result
+
+    def path(self, starts, ends, indices, costs):
+        ''' Walk from the target to the source along the cheapest neighbors and return the path from start to end '''
+        g = self.g
+        current = self.target
+        path = [current]
+        while current != self.source:
+            neighbors = indices[starts[current]:ends[current]]
+            if self.backward: # towards the end, through the neighbor with the cheapest move plus remaining cost
+                current = min(neighbors, key=lambda neighbor: g.get(neighbor, INF) + costs[neighbor])
+            else: # back towards the start, every move into the current node costs the same
+                current = min(neighbors, key=lambda neighbor: g.get(neighbor, INF))
+            path.append(current)
+        return path if self.backward else path[::-1]
+
+class DStarLite(LPAStar):
+    ''' D* Lite is LPA* searching backwards from the end to the start. The search does not depend on where the start is,
+        so the start can move along the path while barriers change and the planner keeps repairing the same search. '''
+    backward = True
+
+    def move_start(self, start):
+        ''' Move the start to another cell, for example the next cell of the path after a step was taken '''
+        position = self.grid.position(start)
+        self.km += h(self.target_position, position, self.scale)
+        self.start = self.target = start
+        self.target_position = position
+
+def lpa_star(grid, start, end, visit=None, open_list=None):
+    ''' Lifelong Planning A* is an incremental version of A* that keeps its g scores between searches. When barriers are
+        added or removed only the part of the search that depended on them is repaired, so replanning after a small change
+        costs a small fraction of a full search. '''
+    return LPAStar(grid, start, end, visit, open_list).plan()
+
+def d_star_lite(grid, start, end, visit=None, open_list=None):
+    ''' D* Lite is LPA* searching backwards from the end to the start. The search does not depend on where the start is,
+        so the start can move along the path while barriers change and the planner keeps repairing the same search. '''
+    return DStarLite(grid, start, end, visit, open_list).plan()
@@ -1,147 +1,113 @@
-import pygame
-from queue import PriorityQueue
-from modules.distance_formulas import h  # Manhattan distance heuristic
-from modules.path_reconstructer import reconstruct_path
+''' the module containing the implementation of the Theta* and Lazy Theta* any-angle algorithms '''
+
+import time
+from modules.adjacency import EIGHT_WAY
+from modules.open_list import OpenList
+from modules.distance_formulas import d  # the euclidean distance, both for the costs and the heuristic
+from modules.line_of_sight import cached_line_of_sight
+from modules.path_reconstructer import reconstruct_path, expand_path
+from modules.search_result import SearchResult
 
 # Description:
-#   Theta* is an optimization technique for A* pathfinding that introduces more direct paths by allowing shortcuts 
-#   when traversing between nodes. It refines A* by permitting straight-line paths when they provide a better route, 
+#   Theta* is an optimization technique for A* pathfinding that introduces more direct paths by allowing shortcuts
+#   when traversing between nodes. It refines A* by permitting straight-line paths when they provide a better route,
 #   which can lead to more optimal paths in certain scenarios.
 #
 # Features:
-#   Heuristics: Uses Manhattan distance heuristic to estimate the cost from the current node to the goal.
-#   Shortcuts: Enables direct connections between nodes if they improve the path efficiency, allowing for straight-line 
-#              paths when they are beneficial.
+#   Heuristics: Uses the euclidean distance to estimate the cost from the current node to the goal, since paths can go in any direction.
+#   Shortcuts: When a neighbor can be seen from the parent of the current node it is linked to that parent directly ("path 2"),
+#              otherwise it is linked to the current node like in A* ("path 1"). Paths are made of straight lines of any angle.
+#   Terrain: Costs are lengths of straight lines, terrain costs (Grid.cost) are ignored.
+#   Lazy Theta*: Assumes that the parent can always be seen and only checks the line of sight when a node is expanded,
+#                which needs far fewer line of sight checks for nearly the same paths.
 #
 # Pros:
 #   Can find shorter and more efficient paths compared to standard A* by allowing direct connections.
-#   Retains the optimality and completeness of A* while potentially enhancing performance with better pathfinding.
+#   The path comes out of a single search, there is no need to smooth it afterwards.
 #
 # Cons:
 #   More complex implementation due to the need to validate and manage direct connections between nodes.
-#   Performance gains might be less significant in highly complex or dense grids where shortcuts are less effective.
+#   The paths are short but not always the shortest any-angle paths.
 #
 # Steps:
-#   1. Add the start node to the open set with an initial cost of 0.
+#   1. Add the start node to the open set with an initial cost of 0, its parent is itself.
 #   2. While the open set is not empty:
 #       1. Remove the node with the lowest f score (g + h).
-#       2. If it’s the goal node, reconstruct and return the path.
-#       3. For each neighbor:
-#           1. Update the g score and f score for the neighbor.
-#           2. If the neighbor is not in the open set, add it.
-#           3. Validate potential shortcuts by checking if a direct path from the current node to a neighbor is valid and improves the path.
+#       2. (Lazy Theta*) If its parent cannot be seen, link it to the best neighbor that is already closed instead.
+#       3. If it’s the goal node, reconstruct and return the path.
+#       4. For each of the 8 neighbors that is not closed:
+#           1. If the parent of the current node can see the neighbor (always assumed by Lazy Theta*),
+#              the neighbor's candidate parent is that parent, otherwise it is the current node.
+#           2. If the cost through the candidate parent is lower, update the g score, the parent and the open set.
+
+def theta_star(grid, start, end, visit=None, open_list=None, lazy=False):
+    ''' Theta* is an optimization technique for A* pathfinding that introduces more direct paths by allowing shortcuts
+        when traversing between nodes. It links a node to its grandparent whenever there is a line of sight between them,
+        which gives straight paths of any angle instead of paths made of grid moves. '''
+    starts, ends, indices = grid.adjacency(EIGHT_WAY).lists() # the 8 neighbors, a diagonal move may not cut the corner of a barrier
+    cols = grid.cols
+    goal = grid.position(end)
+    line_of_sight = cached_line_of_sight(grid)
+
+    def distance(a, b):
+        ''' The euclidean distance between two cells given by their numbers '''
+        return d(divmod(a, cols), divmod(b, cols))
+
+    open_set = OpenList() if open_list is None else open_list
+    came_from = {} # the parent of every node except the start, which is its own parent
+    closed = set()
+
+    g_score = {start: 0}
+    open_set.push(start, d(grid.position(start), goal), 0)
+    expanded = generated = 0
+
+    while open_set:
+        current = open_set.pop()
+        expanded += 1
+        parent = came_from.get(current, current)
 
+        if lazy and not line_of_sight(parent, current):
+            # the assumed line of sight was wrong, fall back to the best closed neighbor (path 1)
+            g_score[current], parent = min((g_score[neighbor] + distance(neighbor, current), neighbor)
+                                           for neighbor in indices[starts[current]:ends[current]] if neighbor in closed)
+            came_from[current] = parent
 
-def theta_star(draw, grid, start, end):
-    ''' Theta* is an optimization technique for A* pathfinding that introduces more direct paths by allowing shortcuts 
-        when traversing between nodes. It refines A* by permitting straight-line paths when they provide a better route, 
-        which can lead to more optimal paths in certain scenarios. '''
-    
-    def get_neighbors(node):
-        ''' Get the neighbors of a node considering the grid and diagonals '''
-        neighbors = []
-        x, y = node.get_pos()
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-        
-        for dx, dy in directions:
-            nx, ny = x, y
-            while True:
-                nx += dx
-                ny += dy
-                if not (0 <= nx < len(grid) and 0 <= ny < len(grid[0])):
-                    break
-                neighbor = grid[nx][ny]
-                if neighbor.is_barrier():
-                    break
-                neighbors.append(neighbor)
-                if (nx, ny) == end.get_pos():
-                    break
-        return neighbors
-    
-    def spot_key(spot):
-        ''' Generate a unique key for each spot based on its position '''
-        return (spot.get_pos(), id(spot))
-    
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    came_from = {}
-    
-    g_score = {spot_key(spot): float("inf") for row in grid for spot in row}
-    g_score[spot_key(start)] = 0
-    f_score = {spot_key(spot): float("inf") for row in grid for spot in row}
-    f_score[spot_key(start)] = h(start.get_pos(), end.get_pos())
-    
-    open_set_hash = {spot_key(start)}
-    
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-        
-        current = open_set.get()[2]
-        open_set_hash.remove(spot_key(current))
-        
         if current == end:
-            # Reconstruct the path from the goal to the start
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            start.make_start()
-            
-            # Ensure the entire path is marked as path
-            path = [end]
-            while path[-1] in came_from:
-                path.append(came_from[path[-1]])
-            path.reverse()
-            
-            for spot in path:
-                spot.make_path()
-            
-            # Mark all intermediate nodes between path nodes
-            for i in range(len(path) - 1):
-                x1, y1 = path[i].get_pos()
-                x2, y2 = path[i + 1].get_pos()
-                
-                dx = abs(x2 - x1)
-                dy = abs(y2 - y1)
-                sx = 1 if x1 < x2 else -1
-                sy = 1 if y1 < y2 else -1
-                err = dx - dy
+            # Reconstruct the corners of the path and fill in the lines between them
+            reconstruct_start = time.perf_counter()
+            path = expand_path(reconstruct_path(came_from, end), cols)
+            return SearchResult(path, g_score[end], expanded, generated, open_set.pushes, open_set.pops, open_set.stale,
+                                time.perf_counter() - reconstruct_start)
+
+        closed.add(current)
+        for k in range(starts[current], ends[current]):
+            neighbor = indices[k]
+            if neighbor in closed:
+                continue
+
+            if lazy or line_of_sight(parent, neighbor): # path 2, straight from the parent
+                via = parent
+            else: # path 1, through the current node
+                via = current
+            temp_g_score = g_score[via] + distance(via, neighbor)
+
+            if temp_g_score < g_score.get(neighbor, float("inf")):
+                came_from[neighbor] = via
+                g_score[neighbor] = temp_g_score
+                if neighbor not in open_set:
+                    generated += 1
+                    if visit:
+                        visit(neighbor, "open")
+                open_set.push(neighbor, temp_g_score + d(divmod(neighbor, cols), goal), temp_g_score)
+
+        if visit:
+            visit(current, "closed")
+
+    return SearchResult(expanded=expanded, generated=generated, heap_pushes=open_set.pushes, heap_pops=open_set.pops,
+                        stale_pops=open_set.stale)
 
-                while True:
-                    if not grid[x1][y1].is_path() and not grid[x1][y1].is_barrier():
-                        grid[x1][y1].make_path()
-                    if x1 == x2 and y1 == y2:
-                        break
-                    e2 = 2 * err
-                    if e2 > -dy:
-                        err -= dy
-                        x1 += sx
-                    if e2 < dx:
-                        err += dx
-                        y1 += sy
-            
-            draw()
-            start.make_start()
-            end.make_end()
-            return True
-        
-        for neighbor in get_neighbors(current):
-            temp_g_score = g_score[spot_key(current)] + 1
-            
-            if temp_g_score < g_score[spot_key(neighbor)]:
-                came_from[neighbor] = current
-                g_score[spot_key(neighbor)] = temp_g_score
-                f_score[spot_key(neighbor)] = temp_g_score + h(neighbor.get_pos(), end.get_pos())
-                if spot_key(neighbor) not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[spot_key(neighbor)], count, neighbor))
-                    open_set_hash.add(spot_key(neighbor))
-                    neighbor.make_open()
-        
-        draw()
-        
-        if current != start:
-            current.make_closed()
-            
-    return False
+def lazy_theta_star(grid, start, end, visit=None, open_list=None):
+    ''' Lazy Theta* is a faster form of Theta* that assumes every shortcut is possible and only checks the line of sight
+        when a node is taken out of the open set. It performs far fewer line of sight checks and finds nearly the same
+        straight paths of any angle. '''
+    return theta_star(grid, start, end, visit, open_list, lazy=True)
@@ -0,0 +1,63 @@
+''' Answer many queries on the same map in parallel.
+The grid state and costs are copied once into shared memory and every worker process wraps that memory in its own Grid,
+so the map is never pickled per query. The queries are sent to a process pool in chunks and the results are streamed back in the
+order they complete.
+
+Example:
+    from modules.batch import batch_search
+    for number, result in batch_search(grid, [((0, 0), (9, 9)), ((5, 0), (0, 5))], algorithm="jps"):
+        print(number, result.cost) '''
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from modules.engine import check_query, search
+from modules.grid import Grid
+
+_grid = None # the grid of this worker process, backed by the shared memory
+_memory = None # keeps the shared memory attached for as long as the worker lives
+
+def _attach(name, shape):
+    ''' Wrap the shared grid state and costs in a Grid, runs once in every worker process '''
+    global _grid, _memory
+    _memory = shared_memory.SharedMemory(name=name)
+    state, cost = np.ndarray((2,) + shape, dtype=np.uint8, buffer=_memory.buf)
+    _grid = Grid.from_state(state, cost)
+
+def _search_chunk(chunk, algorithm, options):
+    ''' Answer a chunk of numbered queries on the worker's grid. The options are unpickled once per chunk and shared by its
+    queries, search() gives each of them its own copy and a new open list when one is among the options '''
+    return [(number, search(_grid, start, end, algorithm, **options)) for number, start, end in chunk]
+
+def batch_search(grid, queries, algorithm="a_star", workers=None, chunk_size=32, **options):
+    ''' Yield (number, result) for every (start, end) query as soon as it is answered, number is its place in queries.
+    grid is a Grid or any 2D sequence or array where a truthy cell is a barrier, workers defaults to the number of cores.
+    The algorithm and the options are sent to the workers, so they have to be picklable (a name is always fine).
+    Every query is checked before any work starts, a ValueError is raised for a start or end outside of the grid or on a barrier. '''
+    if not isinstance(grid, Grid):
+        grid = Grid.from_array(grid)
+    queries = [(number, *check_query(grid, start, end)) for number, (start, end) in enumerate(queries)]
+    if not queries:
+        return
+    workers = workers or os.cpu_count() or 1
+    # small chunks keep every worker busy until the end, large ones spend less time sending queries and results
+    chunk_size = max(1, min(chunk_size, len(queries) // workers))
+
+    memory = shared_memory.SharedMemory(create=True, size=2 * grid.state.nbytes)
+    try:
+        shared = np.ndarray((2,) + grid.state.shape, dtype=np.uint8, buffer=memory.buf)
+        shared[0] = grid.state
+        shared[1] = grid.cost
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=(memory.name, grid.state.shape)) as pool:
+            futures = [pool.submit(_search_chunk, queries[i:i + chunk_size], algorithm, options)
+                       for i in range(0, len(queries), chunk_size)]
+            try:
+                for future in as_completed(futures):
+                    yield from future.result()
+            finally: # the caller stopped early or a query failed, drop the queries that have not started yet
+                for future in futures:
+                    future.cancel()
+    finally:
+        memory.close()
+        memory.unlink()
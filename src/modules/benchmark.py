@@ -0,0 +1,177 @@
+''' A reproducible benchmark of the algorithms on generated maps, run headless through the engine.
+Every map is generated from a seed, so two runs with the same arguments search exactly the same maps and queries.
+For every map and algorithm it reports the nodes expanded, the heap operations, the wall time, the peak memory
+and the path cost, as a table and optionally as JSON.
+
+Usage (from inside the src directory):
+    python -m modules.benchmark
+    python -m modules.benchmark --sizes 50 200 1000 2000 --maps open maze --algorithms a_star jps --json results.json '''
+
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+from modules.engine import ALGORITHMS, search
+from modules.grid import Grid
+
+def open_map(size, rng):
+    ''' A map without barriers '''
+    return np.zeros((size, size), dtype=bool)
+
+def random_map(density):
+    ''' Return a generator of maps where every cell is a barrier with the given probability '''
+    def generate(size, rng):
+        return rng.random((size, size)) < density
+    return generate
+
+def maze_map(size, rng):
+    ''' A perfect maze carved by a randomized depth first search, the rooms are the cells with odd coordinates '''
+    barriers = np.ones((size, size), dtype=bool)
+    cells = (size - 1) // 2 # rooms per side
+    visited = np.zeros((cells, cells), dtype=bool)
+    visited[0, 0] = True
+    barriers[1, 1] = False
+    stack = [(0, 0)]
+    steps = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc) for dr, dc in steps
+                   if 0 <= row + dr < cells and 0 <= col + dc < cells and not visited[row + dr, col + dc]]
+        if not options:
+            stack.pop()
+            continue
+        next_row, next_col = options[rng.integers(len(options))]
+        visited[next_row, next_col] = True
+        barriers[2 * next_row + 1, 2 * next_col + 1] = False
+        barriers[row + next_row + 1, col + next_col + 1] = False # the wall between the two rooms
+        stack.append((next_row, next_col))
+    return barriers
+
+def rooms_map(size, rng, room=16):
+    ''' Square rooms separated by walls, with a door at a random place in every wall '''
+    barriers = np.zeros((size, size), dtype=bool)
+    barriers[room::room, :] = True
+    barriers[:, room::room] = True
+    for wall in range(room, size, room):
+        for start in range(0, size, room):
+            length = min(room, size - start) - 1
+            if length < 1:
+                continue
+            barriers[wall, start + 1 + rng.integers(length)] = False # a door in a horizontal wall
+            barriers[start + 1 + rng.integers(length), wall] = False # a door in a vertical wall
+    return barriers
+
+MAPS = {
+    "open": open_map,
+    "random_10": random_map(0.10),
+    "random_20": random_map(0.20),
+    "random_30": random_map(0.30),
+    "maze": maze_map,
+    "rooms": rooms_map,
+}
+
+def generate_map(name, size, seed=0):
+    ''' Generate a map and a query on it, returns the grid, the start and the end.
+    The query goes from corner to corner, through the rooms with odd coordinates on mazes. '''
+    rng = np.random.default_rng([seed, size, list(MAPS).index(name)])
+    barriers = MAPS[name](size, rng)
+    start = (1, 1)
+    corner = size - 2 if (size - 2) % 2 else size - 3 # the last room of a maze
+    end = (corner, corner)
+    barriers[start] = barriers[end] = False
+    return Grid.from_array(barriers), start, end
+
+def measure(grid, start, end, algorithm, repeat=1, memory=True, **options):
+    ''' Search one query and return a record of its statistics, the wall time is the best of the repeats '''
+    search(grid, start, end, algorithm, **options) # build the adjacency and any other caches on the grid first
+    best = None
+    for _ in range(repeat):
+        result = search(grid, start, end, algorithm, **options)
+        if best is None or result.elapsed < best.elapsed:
+            best = result
+
+    peak = peak_open = None
+    if memory: # tracemalloc slows the search down, so the memory is measured on a separate run
+        measured = search(grid, start, end, algorithm, stats=True, memory=True, **options)
+        peak, peak_open = measured.peak_memory, measured.peak_open
+
+    return {
+        "algorithm": best.algorithm,
+        "found": best.found,
+        "cost": best.cost if best.found else None,
+        "expanded": best.expanded,
+        "generated": best.generated,
+        "heap_pushes": best.heap_pushes,
+        "heap_pops": best.heap_pops,
+        "heap_operations": best.heap_pushes + best.heap_pops,
+        "stale_pops": best.stale_pops,
+        "peak_open": peak_open if best.peak_open is None else best.peak_open,
+        "seconds": best.elapsed,
+        "reconstruct_seconds": best.reconstruct_time,
+        "peak_bytes": peak,
+    }
+
+def run(maps, sizes, algorithms, seed=0, repeat=1, memory=True, progress=None):
+    ''' Run every algorithm on every map and size, calling progress(record) as soon as a record is ready '''
+    records = []
+    for size in sizes:
+        for name in maps:
+            grid, start, end = generate_map(name, size, seed)
+            for algorithm in algorithms:
+                record = {"map": name, "size": size, "start": start, "end": end}
+                record.update(measure(grid, start, end, algorithm, repeat, memory))
+                records.append(record)
+                if progress:
+                    progress(record)
+    return records
+
+COLUMNS = (
+    ("map", "{:<10}"), ("size", "{:>6}"), ("algorithm", "{:<21}"), ("cost", "{:>10}"),
+    ("expanded", "{:>10}"), ("heap_operations", "{:>15}"), ("peak_open", "{:>10}"), ("seconds", "{:>10}"), ("peak_bytes", "{:>12}"),
+)
+
+def format_row(record):
+    ''' Format a record as one line of the table '''
+    values = dict(record)
+    values["cost"] = "no path" if record["cost"] is None else f"{record['cost']:.2f}"
+    values["seconds"] = f"{record['seconds']:.4f}"
+    values["peak_bytes"] = "-" if record["peak_bytes"] is None else record["peak_bytes"]
+    values["peak_open"] = "-" if record["peak_open"] is None else record["peak_open"]
+    return " ".join(fmt.format(values[name]) for name, fmt in COLUMNS)
+
+def format_header():
+    ''' Format the header of the table '''
+    return " ".join(fmt.format(name) for name, fmt in COLUMNS)
+
+def main(argv=None):
+    ''' Parse the command line, run the benchmark and print the table '''
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinding algorithms on generated maps.")
+    parser.add_argument("--maps", nargs="+", choices=list(MAPS), default=list(MAPS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 200, 1000])
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="report the best wall time of this many runs")
+    parser.add_argument("--no-memory", action="store_true", help="skip the separate run that measures the peak memory")
+    parser.add_argument("--json", help="also write the results to this file as JSON")
+    args = parser.parse_args(argv)
+
+    print(format_header())
+    records = run(args.maps, args.sizes, args.algorithms, args.seed, args.repeat, not args.no_memory,
+                  progress=lambda record: print(format_row(record), flush=True))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": records,
+            }, file, indent=2)
+
+if __name__ == "__main__":
+    main()
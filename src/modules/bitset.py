@@ -0,0 +1,106 @@
+''' This module contains the compact per-cell state of the searches that only need to know if a cell was seen and where it
+was reached from (DFS and the breadth first searches). A set or dict of cell numbers costs around a hundred bytes per cell,
+a Bitset costs one bit and a PackedArray of parent directions two bits, so maps with hundreds of millions of cells fit in memory.
+Both are backed by a bytearray, which python indexes much faster than a numpy array. '''
+
+from array import array
+import numpy as np
+
+class Bitset:
+    ''' A set of the numbers 0 to size - 1 stored as one bit each, bit i is bit (i & 7) of byte i >> 3.
+    The search loops read self.bits directly (bits[i >> 3] >> (i & 7) & 1) to save the method call. '''
+    def __init__(self, size):
+        ''' Initialize an empty set for the numbers below size '''
+        self.size = size
+        self.bits = bytearray((size + 7) >> 3)
+
+    @classmethod
+    def from_mask(cls, mask):
+        ''' Build a set of the indices of the True cells of a boolean array, in row major order '''
+        bitset = cls(mask.size)
+        bitset.bits[:] = np.packbits(mask.ravel(), bitorder="little").tobytes()
+        return bitset
+
+    def add(self, i):
+        ''' Add a number to the set '''
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def discard(self, i):
+        ''' Remove a number from the set if it is in it '''
+        self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def __contains__(self, i):
+        return self.bits[i >> 3] >> (i & 7) & 1 == 1
+
+    def __len__(self):
+        return int(np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8)).sum())
+
+    def to_mask(self, shape=None):
+        ''' Return the set as a boolean array, reshaped to shape if it is given '''
+        mask = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), count=self.size, bitorder="little").astype(bool)
+        return mask if shape is None else mask.reshape(shape)
+
+class PackedArray:
+    ''' An array of size small unsigned numbers of a few bits each, like the direction of the move that reached a cell.
+    Values may span two bytes, so one spare byte is kept at the end. '''
+    def __init__(self, size, bits=2):
+        ''' Initialize an array of zeros, every value is between 0 and 2 ** bits - 1 '''
+        if not 1 <= bits <= 8:
+            raise ValueError(f"a packed value has between 1 and 8 bits, got {bits}")
+        self.size = size
+        self.width = bits
+        self.mask = (1 << bits) - 1
+        self.bits = bytearray(((size * bits + 7) >> 3) + 1)
+
+    def __getitem__(self, i):
+        position = i * self.width
+        byte = position >> 3
+        return ((self.bits[byte] | self.bits[byte + 1] << 8) >> (position & 7)) & self.mask
+
+    def __setitem__(self, i, value):
+        position = i * self.width
+        byte, shift = position >> 3, position & 7
+        word = (self.bits[byte] | self.bits[byte + 1] << 8) & ~(self.mask << shift) | (value & self.mask) << shift
+        self.bits[byte] = word & 0xFF
+        self.bits[byte + 1] = word >> 8
+
+    def __len__(self):
+        return self.size
+
+def bits_for(count):
+    ''' Return the number of bits needed to store the numbers 0 to count - 1 '''
+    return max(1, (count - 1).bit_length())
+
+def trace_parents(parents, deltas, source, node):
+    ''' Walk back from node to source along the packed parent directions and return the cells from source to node,
+    deltas[k] is the change of the cell number of a move in direction k '''
+    path = [node]
+    while node != source:
+        node -= deltas[parents[node]]
+        path.append(node)
+    path.reverse()
+    return path
+
+def index_stack(size):
+    ''' Return an empty stack for cell numbers below size, an array stores them without a python object each '''
+    return array("I" if size < 1 << 32 else "Q")
+
+def four_way_moves(walkable, size, cols, current):
+    ''' Return (k, neighbor) for every walkable neighbor of a cell in the order of adjacency.FOUR_WAY (down, up, right, left),
+    walkable is the bytearray of a Bitset of the walkable cells. The moves are read from the bits instead of an adjacency,
+    which would cost more than the search state on a huge map. '''
+    moves = []
+    neighbor = current + cols
+    if neighbor < size and walkable[neighbor >> 3] >> (neighbor & 7) & 1:
+        moves.append((0, neighbor))
+    neighbor = current - cols
+    if neighbor >= 0 and walkable[neighbor >> 3] >> (neighbor & 7) & 1:
+        moves.append((1, neighbor))
+    col = current % cols
+    neighbor = current + 1
+    if col + 1 < cols and walkable[neighbor >> 3] >> (neighbor & 7) & 1:
+        moves.append((2, neighbor))
+    neighbor = current - 1
+    if col and walkable[neighbor >> 3] >> (neighbor & 7) & 1:
+        moves.append((3, neighbor))
+    return moves
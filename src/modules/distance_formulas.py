@@ -1,14 +1,41 @@
 ''' this modules contains the distance formulas used to calculate the distance between 2 points in the algorithms '''
 
-def h(p1, p2):   # h is the classical name for distance from destination in the A* algorithm
-    ''' Return the manhattan distance between two points '''
+from math import hypot
+
+# with diagonal moves the costs are scaled to integers, a straight move costs 10 and a diagonal one 14 (about 10 * sqrt(2))
+STRAIGHT = 10
+DIAGONAL = 14
+
+def h(p1, p2, scale=1):   # h is the classical name for distance from destination in the A* algorithm
+    ''' Return the manhattan distance between two points, scale is the lowest cost of a move so that the
+    distance never overestimates the cost of a path on weighted terrain '''
   # the manhattan distance is the shortest L distance between 2 points unlike slanted distance in the distance formula
     x1, y1 = p1
     x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
+    return (abs(x1 - x2) + abs(y1 - y2)) * scale
+
+def octile(p1, p2, scale=1):   # the exact distance on an empty map when moving in 8 directions
+    ''' Return the octile distance between two points in the integer units of STRAIGHT and DIAGONAL moves,
+    scale is the lowest cost of a move like for h '''
+    dx = abs(p1[0] - p2[0])
+    dy = abs(p1[1] - p2[1])
+    # as many diagonal moves as the shorter side allows, then straight moves for the rest
+    if dx < dy:
+        return (DIAGONAL * dx + STRAIGHT * (dy - dx)) * scale
+    return (DIAGONAL * dy + STRAIGHT * (dx - dy)) * scale
+
+def chebyshev(p1, p2, scale=1):   # the exact distance on an empty map when a diagonal move costs as much as a straight one
+    ''' Return the chebyshev distance between two points in the integer units of STRAIGHT moves, for the movement models
+    where a diagonal move costs STRAIGHT too, scale is the lowest cost of a move like for h '''
+    return max(abs(p1[0] - p2[0]), abs(p1[1] - p2[1])) * STRAIGHT * scale
+
+def heuristic_for(adjacency):
+    ''' Return the heuristic that matches the moves of an adjacency: h for 4 directions, octile with diagonals and chebyshev
+    when a diagonal move costs as much as a straight one '''
+    if not adjacency.diagonal:
+        return h
+    return chebyshev if adjacency.diagonal_step == STRAIGHT else octile
 
 def d(p1, p2):   # the classical distance formula
     ''' Return the euclidean distance between two points '''
-    x1, y1 = p1
-    x2, y2 = p2
-    return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
\ No newline at end of file
+    return hypot(p1[0] - p2[0], p1[1] - p2[1]) # faster than squaring and taking the root in python
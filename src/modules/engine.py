@@ -0,0 +1,114 @@
+''' The headless search engine. It runs any of the algorithms on a grid and returns a SearchResult without touching pygame,
+so queries can be answered on a machine without a display. The gui is just one consumer of this module.
+
+Example:
+    from modules.engine import search
+    result = search([[0, 0, 0], [1, 1, 0], [0, 0, 0]], (0, 0), (2, 0), algorithm="a_star")
+    result.path, result.cost, result.expanded '''
+
+import inspect
+import time
+import tracemalloc
+from contextlib import nullcontext
+from modules.grid import Grid
+from modules.open_list import empty_like, tracking_peak
+from modules.algorithms.a_star import a_star
+from modules.algorithms.dijkstra import dijkstra
+from modules.algorithms.theta_star import theta_star, lazy_theta_star
+from modules.algorithms.DFS import dfs
+from modules.algorithms.BS import bidirectional_search, bidirectional_a_star
+from modules.algorithms.JPS import jps
+from modules.algorithms.lpa_star import lpa_star, d_star_lite
+from modules.algorithms.hpa_star import hpa_star
+
+# every algorithm by name, they all share the signature algorithm(grid, start, end, visit=None, **options)
+# where start and end are cell numbers (row * cols + col) and visit is called with cell numbers
+ALGORITHMS = {
+    "dfs": dfs,
+    "dijkstra": dijkstra,
+    "bidirectional_search": bidirectional_search,
+    "a_star": a_star,
+    "bidirectional_a_star": bidirectional_a_star,
+    "jps": jps,
+    "theta_star": theta_star,
+    "lazy_theta_star": lazy_theta_star,
+    "lpa_star": lpa_star, # a single search, keep an LPAStar or DStarLite from the same module to replan after changes
+    "d_star_lite": d_star_lite,
+    "hpa_star": hpa_star, # builds its abstraction on the first search of a grid and keeps it up to date afterwards
+}
+
+def get_algorithm(algorithm):
+    ''' Return the name and the function of an algorithm given either of them '''
+    if callable(algorithm):
+        for name, function in ALGORITHMS.items():
+            if function is algorithm:
+                return name, function
+        return algorithm.__name__, algorithm
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+    return algorithm, ALGORITHMS[algorithm]
+
+def check_query(grid, start, end):
+    ''' Return start and end as tuples of ints, raising a ValueError if either of them is outside of the grid or a barrier '''
+    start, end = tuple(map(int, start)), tuple(map(int, end)) # numpy integers would leak into the algorithms
+    for point in (start, end):
+        if not grid.in_bounds(point):
+            raise ValueError(f"{point} is outside of the {grid.rows}x{grid.cols} grid")
+        if grid.is_barrier(point):
+            raise ValueError(f"{point} is a barrier")
+    return start, end
+
+def search(grid, start, end, algorithm="a_star", visit=None, stats=False, memory=False, profiler=None, log=None, **options):
+    ''' Find a path from start to end and return a SearchResult.
+    grid is a Grid or any 2D sequence or array where a truthy cell is a barrier, start and end are (row, col) positions.
+    visit is an optional callback called as visit(position, "open" | "closed") while the search runs.
+    stats also measures the peak size of the open list and memory the peak memory of the search (with tracemalloc, which
+    slows it down a lot). The other statistics are always counted, even with stats off: the expanded and generated nodes
+    and the heap pushes, pops and stale pops are one integer addition each in the search loops, so turning stats off does
+    not make a search free of bookkeeping, it only drops the peak checks. profiler is an optional profiling.Profiler that records
+    where the time of the search goes, and log an optional event_log.EventLog that records every cell the search visits
+    and the path it found, to replay the search later.
+    Any other options are passed on to the algorithm, for example open_list=IndexedOpenList("high_g") for the best-first searches.
+    Every search gets a new empty open list of the kind and tie break of the one passed in, which is never changed. '''
+    if not isinstance(grid, Grid):
+        grid = Grid.from_array(grid)
+    name, function = get_algorithm(algorithm)
+    start, end = check_query(grid, start, end)
+
+    if visit is not None: # the algorithms report cell numbers, the callback gets positions
+        visit_index = visit
+        visit = lambda index, state: visit_index(grid.position(index), state)
+    if log is not None: # the log takes the cell numbers as they are
+        if visit is None:
+            visit = log.visit
+        else:
+            visit_position, record = visit, log.visit
+            visit = lambda index, state: (record(index, state), visit_position(index, state))
+
+    if stats and "open_list" in inspect.signature(function).parameters: # the same kind of open list, counting its peak size
+        options["open_list"] = tracking_peak(options.get("open_list"))
+    elif options.get("open_list") is not None: # the given open list only picks the kind, so it can be passed to every search
+        options["open_list"] = empty_like(options["open_list"])
+    if memory:
+        tracing = tracemalloc.is_tracing() # somebody else may be tracing already, like the benchmark
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    with profiler.query(name, start=start, end=end) if profiler else nullcontext():
+        start_time = time.perf_counter()
+        result = function(grid, grid.index(start), grid.index(end), visit, **options)
+        result.elapsed = time.perf_counter() - start_time
+
+    if memory:
+        result.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+        if not tracing:
+            tracemalloc.stop()
+    if stats and "open_list" in options:
+        result.peak_open = options["open_list"].peak
+    if log is not None:
+        log.add_path(result.path)
+    result.locate(grid.cols)
+    result.algorithm = name
+    return result
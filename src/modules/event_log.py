@@ -0,0 +1,97 @@
+''' Record what a search does as a compact log of events, so it can be replayed at any speed after the search ran at full speed.
+Every event is one 32 bit number in an array("I"): the cell number (row * cols + col) shifted left by 2 and the kind of the
+event in the low 2 bits, a cell was opened, closed or is on the path. A million events take 4 MB and a log is written to a
+file as a 56 byte header followed by the raw array.
+
+Example:
+    from modules.engine import search
+    from modules.event_log import EventLog
+    log = EventLog(grid.rows, grid.cols, "a_star")
+    result = search(grid, (0, 0), (99, 99), "a_star", log=log)
+    log.save("a_star.events")
+    state = grid.state.copy()
+    log.apply(state, 0, len(log) // 2) # the grid halfway through the search '''
+
+import struct
+import sys
+from array import array
+import numpy as np
+from modules.grid import OPEN, CLOSED, PATH
+
+MAGIC = b"PFEV"
+VERSION = 1
+# 56 bytes: magic, version, 3 spare bytes, rows, cols, number of events, the name of the algorithm padded with zeros
+HEADER = struct.Struct("<4sB3xIIQ32s")
+KINDS = {"open": 0, "closed": 1, "path": 2} # the kind of an event is stored in its low 2 bits
+STATES = np.array([OPEN, CLOSED, PATH, 0], dtype=np.uint8) # the grid state of each kind, 3 is not used
+MAX_CELLS = 1 << 30 # the cell numbers that fit in the 30 bits above the kind
+
+class EventLog:
+    ''' The events of one search in the order they happened '''
+    def __init__(self, rows, cols, name=""):
+        ''' Initialize an empty log for a grid of rows x cols cells, name is shown when logs are compared '''
+        if rows * cols > MAX_CELLS:
+            raise ValueError(f"an event log holds grids of up to {MAX_CELLS} cells, got {rows}x{cols}")
+        self.rows = rows
+        self.cols = cols
+        self.name = name
+        self.events = array("I") # 4 bytes per item on every platform that python supports
+
+    def visit(self, cell, state):
+        ''' Record that a cell was opened or closed, pass this as the visit callback of a search (engine.search(log=...) does) '''
+        self.events.append(cell << 2 | KINDS[state])
+
+    def add_path(self, cells):
+        ''' Record the cells of the path that the search found, in order from the start '''
+        cells = np.asarray(cells, dtype=np.uint32)
+        self.events.frombytes((cells << 2 | KINDS["path"]).tobytes())
+
+    def __len__(self):
+        return len(self.events)
+
+    def kinds(self, first=0, last=None):
+        ''' Return the cell numbers and kinds of the events from first to last as two numpy arrays '''
+        events = np.array(self.events[first:last], dtype=np.uint32)
+        return events >> 2, events & 3
+
+    def apply(self, state, first=0, last=None):
+        ''' Write the events from first to last into a state array of the shape of the grid, a cell ends up in the state
+        of its last event. Barriers are never visited, but the start and end are, so put them back afterwards '''
+        cells, kinds = self.kinds(first, last)
+        # numpy does not say which value wins when an index is repeated, so keep only the last event of every cell
+        cells, last_events = np.unique(cells[::-1], return_index=True)
+        kinds = kinds[::-1][last_events]
+        rows, cols = np.divmod(cells, self.cols) # by position, so state can be a view into a larger array
+        state[rows, cols] = STATES[kinds]
+
+    def save(self, path):
+        ''' Write the log to a file '''
+        name = self.name.encode()[:32].decode(errors="ignore").encode() # cut on a character boundary to fit the header
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.rows, self.cols, len(self.events), name))
+            events = self.events
+            if sys.byteorder == "big": # the file is little endian like the header
+                events = array("I", events)
+                events.byteswap()
+            events.tofile(file)
+
+    @classmethod
+    def load(cls, path):
+        ''' Read a log written by save '''
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is too short to be an event log")
+            magic, version, rows, cols, count, name = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an event log")
+            if version != VERSION:
+                raise ValueError(f"{path} was saved in version {version} of the format, expected {VERSION}")
+            log = cls(rows, cols, name.rstrip(b"\0").decode(errors="ignore"))
+            try:
+                log.events.fromfile(file, count)
+            except EOFError:
+                raise ValueError(f"{path} is truncated") from None
+        if sys.byteorder == "big":
+            log.events.byteswap()
+        return log
@@ -0,0 +1,227 @@
+''' This module contains the Grid class which is the headless representation of the map that the algorithms search on.
+The state of every cell is stored in a single numpy uint8 array so that large maps stay small in memory and
+bulk operations like clearing the grid or counting path cells are vectorized instead of nested python loops. '''
+
+import numpy as np
+from modules.adjacency import Adjacency, FOUR_WAY, movement
+from modules.distance_formulas import DIAGONAL
+from modules.bitset import Bitset
+
+# the states that a cell can be in, these are the values stored in Grid.state
+EMPTY = 0 # walkable and not visited
+BARRIER = 1 # a wall that the algorithm cannot visit
+OPEN = 2 # in the open set and yet to be considered
+CLOSED = 3 # already considered
+PATH = 4 # part of the path
+START = 5 # the origin point
+END = 6 # the destination point
+
+SEARCH_STATES = (OPEN, CLOSED, PATH) # the states that are left behind by a search
+MAX_COST = 255 # the highest cost of entering a cell that fits in the uint8 cost array, the lowest is 1
+
+class Grid:
+    ''' A rectangular grid of cells backed by a uint8 state array '''
+    def __init__(self, rows, cols=None):
+        ''' Initialize an empty grid, the grid is square if cols is not given '''
+        cols = rows if cols is None else cols
+        self.rows = rows
+        self.cols = cols
+        self.state = np.zeros((rows, cols), dtype=np.uint8)
+        self.cost = np.ones((rows, cols), dtype=np.uint8) # the cost of moving into each cell, 1 on plain ground
+        self.start = None # the position of the start cell as (row, col)
+        self.end = None # the position of the end cell as (row, col)
+        self.derived = {} # data computed from the barriers and costs, like the rows of the barrier mask or the JPS+ jump tables
+        self.adjacencies = {} # the adjacency for every movement model and other graphs of the cells (like the HPA*
+                              # abstraction), each has an update(changes) method that patches it when a barrier changes
+
+    @classmethod
+    def from_array(cls, barriers, costs=None):
+        ''' Create a grid from a 2D sequence or array where a truthy cell is a barrier, costs optionally holds the cost of
+        moving into every cell as whole numbers from 1 to MAX_COST '''
+        mask = np.asarray(barriers, dtype=bool)
+        if mask.ndim != 2:
+            raise ValueError(f"expected a 2D grid of barriers, got {mask.ndim} dimensions")
+        grid = cls(*mask.shape)
+        grid.state[mask] = BARRIER
+        if costs is not None:
+            grid.cost[...] = check_costs(costs, mask.shape)
+        return grid
+
+    @classmethod
+    def from_state(cls, state, cost=None):
+        ''' Create a grid around existing uint8 state and cost arrays without copying them, for example arrays in shared memory '''
+        grid = cls(0, 0)
+        grid.rows, grid.cols = state.shape
+        grid.state = state
+        grid.cost = np.ones(state.shape, dtype=np.uint8) if cost is None else cost
+        return grid
+
+    def index(self, pos):
+        ''' Return the number of the cell at the position, cells are numbered row by row '''
+        row, col = pos
+        return row * self.cols + col
+
+    def position(self, index):
+        ''' Return the position of the cell with the given number as (row, col) '''
+        return divmod(index, self.cols)
+
+    def in_bounds(self, pos):
+        ''' If the position lies inside the grid '''
+        row, col = pos
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def get(self, pos):
+        ''' Return the state of the cell at the position '''
+        return int(self.state[pos])
+
+    def set(self, pos, state):
+        ''' Change the state of the cell at the position, keeping start, end and the barrier cache in sync '''
+        pos = tuple(pos)
+        old = self.state[pos]
+        if old == state:
+            return
+        if old == START:
+            self.start = None
+        elif old == END:
+            self.end = None
+
+        if state == START:
+            if self.start is not None:
+                self.state[self.start] = EMPTY
+            self.start = pos
+        elif state == END:
+            if self.end is not None:
+                self.state[self.end] = EMPTY
+            self.end = pos
+        self.state[pos] = state
+
+        if BARRIER in (old, state): # patched after the state is written, so an update can read the new barriers from it
+            self.patch_barrier(pos)
+
+    def mark(self, positions, state):
+        ''' Put many cells in one of the search states at once with a single numpy assignment, for example the cells of a path.
+        Barriers, start and end are left alone, so the whole path including its ends can be passed '''
+        if state not in SEARCH_STATES:
+            raise ValueError(f"only the search states {SEARCH_STATES} can be marked in bulk, got {state}")
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        cells = self.state[positions[:, 0], positions[:, 1]]
+        positions = positions[(cells != BARRIER) & (cells != START) & (cells != END)]
+        self.state[positions[:, 0], positions[:, 1]] = state
+
+    def set_cost(self, pos, cost):
+        ''' Change the cost of moving into the cell at the position '''
+        pos = tuple(pos)
+        if not 1 <= cost <= MAX_COST:
+            raise ValueError(f"the cost of a cell must be between 1 and {MAX_COST}, got {cost}")
+        if self.cost[pos] == cost:
+            return
+        self.cost[pos] = cost
+        derived = self.derived
+        if "costs" in derived:
+            derived["costs"][self.index(pos)] = cost
+        if self.state[pos] != BARRIER and "min_cost" in derived and cost < derived["min_cost"]:
+            derived["min_cost"] = cost
+        for adjacency in self.adjacencies.values(): # the moves stay the same but graphs with distances (HPA*) change
+            adjacency.update([(pos, self.state[pos] != BARRIER)])
+
+    def patch_barrier(self, pos):
+        ''' Patch what was derived from the barriers after the cell at the position became a barrier or was freed, in time
+        proportional to the cells around it (set() calls it). Only the JPS+ tables and the line of sight cache are dropped,
+        they depend on whole rows, columns and lines of cells '''
+        pos = tuple(pos)
+        walkable = self.state[pos] != BARRIER
+        derived = self.derived
+        if "blocked" in derived:
+            derived["blocked"][pos[0]] = (self.state[pos[0]] == BARRIER).tobytes()
+        if "walkable_bits" in derived:
+            if walkable:
+                derived["walkable_bits"].add(self.index(pos))
+            else:
+                derived["walkable_bits"].discard(self.index(pos))
+        if walkable and "min_cost" in derived and self.cost[pos] < derived["min_cost"]:
+            derived["min_cost"] = int(self.cost[pos])
+        derived.pop("jps_plus", None)
+        derived.pop("line_of_sight", None)
+        for adjacency in self.adjacencies.values():
+            adjacency.update([(pos, walkable)])
+
+    def barriers_changed(self):
+        ''' Drop everything derived from the barriers and costs, call this after writing to the state or cost array directly '''
+        self.derived.clear()
+        self.adjacencies.clear()
+
+    def barrier_mask(self):
+        ''' Return a boolean array that is True for every barrier '''
+        return self.state == BARRIER
+
+    def blocked_rows(self):
+        ''' Return the barrier mask as one bytes object per row, which is much faster to index from python than numpy '''
+        blocked = self.derived.get("blocked")
+        if blocked is None:
+            blocked = self.derived["blocked"] = [row.tobytes() for row in self.barrier_mask()]
+        return blocked
+
+    def walkable_bits(self):
+        ''' Return a Bitset of the cells that are not barriers, one bit per cell for the searches on huge maps '''
+        bits = self.derived.get("walkable_bits")
+        if bits is None:
+            bits = self.derived["walkable_bits"] = Bitset.from_mask(self.state != BARRIER)
+        return bits
+
+    def costs(self):
+        ''' Return the cost of moving into every cell as a python list indexed by cell number, for the search loops '''
+        costs = self.derived.get("costs")
+        if costs is None:
+            costs = self.derived["costs"] = self.cost.ravel().tolist()
+        return costs
+
+    def min_cost(self):
+        ''' Return the lowest cost of moving into a cell that is not a barrier, the heuristics are scaled by it so
+        that they never overestimate the remaining cost. Edits only ever lower it: the cell that got more expensive or
+        became a barrier may have been the only cheap one, but a lower scale still never overestimates and finding out
+        would take a scan of the whole grid after every edit '''
+        min_cost = self.derived.get("min_cost")
+        if min_cost is None:
+            walkable = self.cost[self.state != BARRIER]
+            min_cost = self.derived["min_cost"] = int(walkable.min()) if walkable.size else 1
+        return min_cost
+
+    def is_barrier(self, pos):
+        ''' If the cell at the position is a wall that the algorithm cannot visit '''
+        return self.state[tuple(pos)] == BARRIER # a single cell, so the rows of the barrier mask are not built for it
+
+    def adjacency(self, directions=FOUR_WAY, cut_corners=False, diagonal_step=DIAGONAL):
+        ''' Return the adjacency of the walkable cells, it is built on first use and then kept up to date by set().
+        directions may also be the name of a movement model in adjacency.MOVEMENTS, like "eight_way" '''
+        if isinstance(directions, str):
+            directions, cut_corners, diagonal_step = movement(directions)
+        key = (directions, cut_corners, diagonal_step)
+        adjacency = self.adjacencies.get(key)
+        if adjacency is None:
+            adjacency = self.adjacencies[key] = Adjacency(~self.barrier_mask(), directions, cut_corners, diagonal_step)
+        return adjacency
+
+    def clear(self):
+        ''' Reset every cell to empty plain ground, removing barriers, costs, start and end '''
+        self.state.fill(EMPTY)
+        self.cost.fill(1)
+        self.start = None
+        self.end = None
+        self.barriers_changed()
+
+    def reset_search(self):
+        ''' Remove the open, closed and path cells left behind by a previous search '''
+        self.state[np.isin(self.state, SEARCH_STATES)] = EMPTY
+
+    def count(self, state):
+        ''' Return the number of cells in the given state '''
+        return int(np.count_nonzero(self.state == state))
+
+def check_costs(costs, shape):
+    ''' Return the costs as a uint8 array, raising a ValueError if they do not fit the grid or are out of range '''
+    costs = np.asarray(costs)
+    if costs.shape != shape:
+        raise ValueError(f"expected costs of shape {shape}, got {costs.shape}")
+    if costs.size and (costs.min() < 1 or costs.max() > MAX_COST):
+        raise ValueError(f"the cost of a cell must be between 1 and {MAX_COST}")
+    return costs.astype(np.uint8)
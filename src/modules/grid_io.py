@@ -0,0 +1,63 @@
+''' Save a grid to a compact binary file and load it back, with its barriers, terrain costs, start and end.
+The file is a fixed 36 byte header, the barriers packed 8 cells to a byte, and the costs as one byte per cell when any of
+them differs from 1. Loading memory maps the file: the barriers are unpacked with a single numpy call and the costs are used
+in place (copy on write, so the grid can still be edited without changing the file), which makes opening a large map instant.
+
+Example:
+    from modules.grid_io import save, load
+    save(grid, "level.grid")
+    grid = load("level.grid") '''
+
+import mmap
+import os
+import struct
+import numpy as np
+from modules.grid import Grid, START, END
+
+MAGIC = b"PFGR"
+VERSION = 1
+HAS_COSTS = 1 # the flag that is set when the cost section follows the barriers
+# 36 bytes: magic, version, flags, 2 spare bytes, rows, cols, start row, start col, end row, end col (-1 when not set), 4 spare bytes
+HEADER = struct.Struct("<4sBB2xIIiiii4x")
+
+def save(grid, path):
+    ''' Write the barriers, costs, start and end of a grid to a file, the search states are not saved '''
+    start = grid.start if grid.start is not None else (-1, -1)
+    end = grid.end if grid.end is not None else (-1, -1)
+    has_costs = bool((grid.cost != 1).any()) # plain maps skip the cost section
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, HAS_COSTS if has_costs else 0, grid.rows, grid.cols, *start, *end))
+        file.write(np.packbits(grid.barrier_mask(), axis=None, bitorder="little").tobytes())
+        if has_costs:
+            file.write(np.ascontiguousarray(grid.cost).tobytes())
+
+def load(path):
+    ''' Read a grid written by save '''
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            raise ValueError(f"{path} is too short to be a saved grid")
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY) # private pages, writes never reach the file
+    magic, version, flags, rows, cols, *points = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a saved grid")
+    if version != VERSION:
+        raise ValueError(f"{path} was saved in version {version} of the format, expected {VERSION}")
+    cells = rows * cols
+    packed = (cells + 7) // 8
+    if len(data) < HEADER.size + packed + (cells if flags & HAS_COSTS else 0):
+        raise ValueError(f"{path} is truncated")
+
+    # unpacking gives 1 for a barrier and 0 for an empty cell, which are the BARRIER and EMPTY states
+    bits = np.frombuffer(data, dtype=np.uint8, count=packed, offset=HEADER.size)
+    state = np.unpackbits(bits, count=cells, bitorder="little").reshape(rows, cols)
+    cost = None
+    if flags & HAS_COSTS: # used in place, the mapping stays open for as long as the array lives
+        cost = np.frombuffer(data, dtype=np.uint8, count=cells, offset=HEADER.size + packed).reshape(rows, cols)
+    grid = Grid.from_state(state, cost)
+
+    start_row, start_col, end_row, end_col = points
+    if start_row >= 0:
+        grid.set((start_row, start_col), START)
+    if end_row >= 0:
+        grid.set((end_row, end_col), END)
+    return grid
@@ -2,14 +2,27 @@
 
 import os, sys
 import pygame, time
+import numpy as np
+from contextlib import nullcontext
 from assets.colors import *
+from modules.grid import Grid, EMPTY, BARRIER, OPEN, CLOSED, PATH, START, END, SEARCH_STATES
 from modules.spot import Spot
+from modules.renderer import Renderer
+from modules.adjacency import MOVEMENTS
 from modules.algorithms.a_star import a_star
 from modules.algorithms.dijkstra import dijkstra
-from modules.algorithms.theta_star import theta_star 
+from modules.algorithms.theta_star import theta_star, lazy_theta_star
 from modules.algorithms.DFS import dfs
-from modules.algorithms.BS import bidirectional_search
+from modules.algorithms.BS import bidirectional_search, bidirectional_a_star
 from modules.algorithms.JPS import jps
+from modules.algorithms.lpa_star import LPAStar, DStarLite, lpa_star, d_star_lite
+from modules.algorithms.hpa_star import hpa_star
+from modules.engine import search
+from modules.open_list import tracking_peak
+from modules.grid_io import save, load
+from modules.profiling import Profiler
+from modules.search_worker import SearchWorker
+from modules.event_log import EventLog
 
 def resource_path(relative_path):
 	try:
@@ -19,25 +32,50 @@ def resource_path(relative_path):
 
 	return os.path.join(base_path, relative_path)
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAVE_FILE = os.path.join(os.path.expanduser("~"), "pathfinding.grid")  # where S saves the grid and L loads it from
+TRACE_FILE = os.path.join(os.path.expanduser("~"), "pathfinding-trace.json")  # where the profile of the searches is written
 
-pygame.init()
-SCREEN_DIMENSIONS = pygame.display.Info().current_w, pygame.display.Info().current_h
-
-WIDTH = SCREEN_DIMENSIONS[0] * 0.8
-HEIGHT = SCREEN_DIMENSIONS[1] * 0.8
 FPS = 60
+EXPANSIONS_PER_FRAME = 0  # while searching, show this many expansions per frame, or run at full speed and draw at FPS if 0
+PATH_FRAMES = 20  # the found path is colored in this many frames, whatever its length
+REPLAY_SECONDS = 5  # a recorded search is replayed in about this many seconds at the starting speed
 
-# setting up the window
-WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Path Finding Algorithms")
-pygame.display.set_icon(pygame.image.load(resource_path(os.path.join(ROOT_DIR, 'assets', 'images', 'icon.png'))))
-clock = pygame.time.Clock()
+# the window and everything that needs an initialized pygame are created by get_window when the gui starts, so importing
+# this module (like a worker process that imports the __main__ module does) does not open a display
+WIDTH = HEIGHT = None  # the size of the window, 80% of the screen
+WINDOW = None
+clock = None
+playing = stopped = None  # the icons of a running and a stopped search
+found = not_found = None  # the sounds of a finished search, they stay None without an audio device
+font_large = font_small = None
 
-# loading images
-playing = pygame.transform.smoothscale(pygame.image.load(resource_path(os.path.join(ROOT_DIR, 'assets', 'images', 'playing.png'))), (HEIGHT // 30, HEIGHT // 30))
-stopped = pygame.transform.smoothscale(pygame.image.load(resource_path(os.path.join(ROOT_DIR, 'assets', 'images', 'stopped.png'))), (HEIGHT // 30, HEIGHT // 30))
-found = pygame.mixer.Sound(resource_path(os.path.join(ROOT_DIR, 'assets', 'sounds', 'found.wav')))
-not_found = pygame.mixer.Sound(resource_path(os.path.join(ROOT_DIR, 'assets', 'sounds', 'not found.wav')))
+def get_window():
+	""" Initialize pygame, open the window and load the images, sounds and fonts on the first call, and return the window """
+	global WIDTH, HEIGHT, WINDOW, clock, playing, stopped, found, not_found, font_large, font_small
+	if WINDOW is not None:
+		return WINDOW
+	pygame.init()
+	SCREEN_DIMENSIONS = pygame.display.Info().current_w, pygame.display.Info().current_h
+	
+	WIDTH = SCREEN_DIMENSIONS[0] * 0.8
+	HEIGHT = SCREEN_DIMENSIONS[1] * 0.8
+	
+	# setting up the window
+	WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
+	pygame.display.set_caption("Path Finding Algorithms")
+	pygame.display.set_icon(pygame.image.load(resource_path(os.path.join(ROOT_DIR, 'assets', 'images', 'icon.png'))))
+	clock = pygame.time.Clock()
+	
+	# loading images
+	playing = pygame.transform.smoothscale(pygame.image.load(resource_path(os.path.join(ROOT_DIR, 'assets', 'images', 'playing.png'))), (HEIGHT // 30, HEIGHT // 30))
+	stopped = pygame.transform.smoothscale(pygame.image.load(resource_path(os.path.join(ROOT_DIR, 'assets', 'images', 'stopped.png'))), (HEIGHT // 30, HEIGHT // 30))
+	if pygame.mixer.get_init():
+		found = pygame.mixer.Sound(resource_path(os.path.join(ROOT_DIR, 'assets', 'sounds', 'found.wav')))
+		not_found = pygame.mixer.Sound(resource_path(os.path.join(ROOT_DIR, 'assets', 'sounds', 'not found.wav')))
+	
+	font_large = pygame.font.Font(None, int(WIDTH / 25))
+	font_small = pygame.font.Font(None, int(WIDTH / 40))
+	return WINDOW
 
 # defining globals
 ROWS = 50  # the columns will be of the same number and represented by the same variable
@@ -46,19 +84,26 @@ elapsed_time = 0
 start_time = None
 path_length = 0
 extra_path_length = 0
-font_large = pygame.font.Font(None, int(WIDTH / 25))
-font_small = pygame.font.Font(None, int(WIDTH / 40))
+search_stats = ()  # generated, peak open list size, stale pops, search and path times in ms of the last search
+renderer = None  # created by main for the window it draws on
+planner = None  # the incremental planner of the last LPA* or D* Lite run, it replans when barriers change
+PLANNERS = {lpa_star: LPAStar, d_star_lite: DStarLite}  # the algorithms that keep their search between runs
+BRUSHES = (0, 2, 5, 9)  # what the left button paints: 0 for barriers, otherwise terrain that costs that much to move into
+brush = 0
+MOVING = (dijkstra, a_star, bidirectional_a_star)  # the algorithms that can also move diagonally
+movement = "four_way"  # the movement model of those algorithms, one of MOVEMENTS
+profiler = None  # records where the time of every search goes while profiling is switched on with P
+paused = False  # if the running search is paused
+player = None  # replays recorded searches while it is set
+panel_cache = {"static_key": None, "static": None, "key": None, "panel": None}  # pre-rendered layers of the settings panel
 
-def make_grid(rows, width):
-	""" Create a grid of spots """
-	grid = []
-	gap = width / rows
-	for i in range(rows):
-		grid.append([])
-		for j in range(rows):
-			spot = Spot(i, j, gap, rows)
-			grid[i].append(spot)
-	return grid
+def make_grid(rows):
+	""" Create an empty square grid """
+	return Grid(rows)
+
+def get_spot(grid, row, col):
+	""" Return the view of the spot at the given row and column """
+	return Spot(grid, row, col, HEIGHT / grid.rows)
 
 def draw_thicker_line(win, color, start, end, thickness):
 	""" Draw a thicker line by drawing multiple lines """
@@ -77,7 +122,7 @@ def draw_thicker_line(win, color, start, end, thickness):
 	dy /= length
 	
 	# Draw multiple lines to achieve thickness
-	for i in range(-thickness // 2, thickness // 2 + 1):
+	for i in range(-(thickness // 2), thickness - thickness // 2):
 		offset_x = int(dy * i)
 		offset_y = int(-dx * i)
 		pygame.draw.line(win, color, (x1 + offset_x, y1 + offset_y), (x2 + offset_x, y2 + offset_y))
@@ -121,10 +166,6 @@ def draw_initials(window):
 	""" Draws the initial elements of the settings panel """
 	pygame.draw.rect(window, GRAY, (HEIGHT, 0, WIDTH - HEIGHT, HEIGHT))
 	
-	# Draw the playing or stopped icon
-	icon = playing if started else stopped
-	window.blit(icon, (WIDTH - icon.get_width() * 2, icon.get_height()))
-	
 	# Draw the "Controls" heading
 	heading = font_large.render("Controls", 1, BLACK)
 	window.blit(heading, (HEIGHT + (WIDTH - HEIGHT - heading.get_width()) // 2, 10))
@@ -138,18 +179,30 @@ def draw_initials(window):
 def draw_controls(window, heading):
 	""" Draws the control instructions and returns the position for the next elements """
 	controls = [
-		"Space: Run Algorithm",
+		"Space: Run/Pause Algorithm",
+		"N: Step (one expansion)  Esc: Cancel",
 		"Backspace: Clear Grid",
 		"Left Click: Place Start/End/Barrier",
-		"Right Click: Remove Start/End/Barrier",
+		"Right Click: Remove Start/End/Barrier/Terrain",
+		"T: Switch Brush (Barrier/Terrain)",
+		"M: Switch Movement (Dijkstra/A*/NBA*)",
 		"Up/Down: Increase/Decrease Grid Size",
+		"S/L: Save/Load Grid",
+		"P: Profile Searches (Chrome trace)",
+		"R: Record and Replay  C: Compare Last Two",
+		"Replay: Space Pause, Left/Right Seek, +/- Speed",
 		"",  # Empty line for separation
 		"1: Depth First Search",
 		"2: Dijkstra Algorithm",
 		"3: Bidirectional Search",
 		"4: A* Algorithm",
 		"5: Jump Point Search",
-		"6: Theta* algorithm"
+		"6: Theta* algorithm",
+		"7: Lazy Theta* algorithm",
+		"8: LPA* (replans on edits)",
+		"9: D* Lite (replans on edits)",
+		"0: Hierarchical A* (HPA*)",
+		"B: Bidirectional A* (NBA*)"
 	]
 	
 	text_pos = heading.get_height() * 2  # Start position after the heading and grid size
@@ -168,9 +221,14 @@ def draw_algorithm_name(window, algorithm_name, text_pos):
 		a_star: "A* Algorithm", 
 		dijkstra: "Dijkstra Algorithm", 
 		theta_star: "Theta* algorithm", 
+		lazy_theta_star: "Lazy Theta* algorithm", 
 		dfs: "Depth First Search", 
 		bidirectional_search: "Bidirectional Search", 
-		jps: "Jump Point Search"
+		bidirectional_a_star: "Bidirectional A*",
+		jps: "Jump Point Search",
+		lpa_star: "LPA* algorithm",
+		d_star_lite: "D* Lite algorithm",
+		hpa_star: "HPA* algorithm"
 	}
 	algo_text = font_large.render(alg_name_dict[algorithm_name], 1, BLACK)
 	window.blit(algo_text, (HEIGHT + (WIDTH - HEIGHT - algo_text.get_width()) // 2, text_pos))
@@ -193,15 +251,44 @@ def draw_algorithm_description(window, algorithm_name, text_pos):
 		
 	return doc_text_pos
 
+def draw_icon(window):
+	""" Draws the playing or stopped icon """
+	icon = playing if started and not paused else stopped
+	window.blit(icon, (WIDTH - icon.get_width() * 2, icon.get_height()))
+
+def draw_brush(window):
+	""" Draws what the left button paints """
+	brush_text = font_small.render("Brush: Barrier" if not brush else f"Brush: Terrain (cost {brush})", 1, BLACK)
+	window.blit(brush_text, (HEIGHT + (WIDTH - HEIGHT - brush_text.get_width()) // 2, HEIGHT - brush_text.get_height() * 4.5))
+
+def draw_movement(window):
+	""" Draws the movement model used by the algorithms that can move diagonally """
+	movement_text = font_small.render(f"Movement: {movement.replace('_', ' ')}", 1, BLACK)
+	window.blit(movement_text, (HEIGHT + (WIDTH - HEIGHT - movement_text.get_width()) // 2, HEIGHT - movement_text.get_height() * 6))
+
+def draw_profiling(window):
+	""" Draws where the profile goes while profiling is on """
+	if not profiler:
+		return
+	profiling_text = font_small.render(f"Profiling to {os.path.basename(TRACE_FILE)}", 1, BLACK)
+	window.blit(profiling_text, (HEIGHT + (WIDTH - HEIGHT - profiling_text.get_width()) // 2, HEIGHT - profiling_text.get_height() * 7.5))
+
+def draw_replay(window):
+	""" Draws the position and speed of the replay """
+	if not player:
+		return
+	replay_text = font_small.render(player.status(), 1, BLACK)
+	window.blit(replay_text, (HEIGHT + (WIDTH - HEIGHT - replay_text.get_width()) // 2, HEIGHT - replay_text.get_height() * 12))
+
 def draw_elapsed_time(window, elapsed_time):
 	""" Draws the elapsed time """
 	elapsed_text = font_small.render(f"Time: {elapsed_time:.2f} s", 1, BLACK)
 	window.blit(elapsed_text, (HEIGHT + (WIDTH - HEIGHT - elapsed_text.get_width()) // 2, HEIGHT - elapsed_text.get_height() * 3))
 
 def draw_path_length(window, path_length, extra_path_length):
-	""" Displays the path length and extra search length side by side """
-	path_length_text = font_small.render(f"Path Length: {path_length}", 1, BLACK)
-	extra_path_length_text = font_small.render(f"Extra Search: {extra_path_length}", 1, BLACK)
+	""" Displays the path length and the number of expanded nodes side by side """
+	path_length_text = font_small.render(f"Path Length: {path_length:g}", 1, BLACK)
+	extra_path_length_text = font_small.render(f"Expanded: {extra_path_length}", 1, BLACK)
 	
 	# Calculate the positions to display the texts side by side
 	padding = 20
@@ -211,31 +298,105 @@ def draw_path_length(window, path_length, extra_path_length):
 	window.blit(path_length_text, (path_length_x, HEIGHT - path_length_text.get_height() * 1.5))
 	window.blit(extra_path_length_text, (extra_path_length_x, HEIGHT - extra_path_length_text.get_height() * 1.5))
 
+def draw_search_stats(window):
+	""" Displays the counters and the time split of the last search """
+	if not search_stats:
+		return
+	generated, peak_open, stale, search_ms, path_ms = search_stats
+	lines = [
+		f"Generated: {generated}   Peak Open: {'-' if peak_open is None else peak_open}   Stale: {stale}",
+		f"Search: {search_ms:.1f} ms   Path: {path_ms:.2f} ms",
+	]
+	for i, line in enumerate(lines):
+		text = font_small.render(line, 1, BLACK)
+		window.blit(text, (HEIGHT + (WIDTH - HEIGHT - text.get_width()) // 2, HEIGHT - text.get_height() * (10.5 - 1.5 * i)))
+
 def draw_settings_panel(window, algorithm_name):
-	""" Draws the side panel for control """
+	""" Draws the side panel for control from cached layers, the text is only rendered again when it changes """
 	global elapsed_time, path_length, extra_path_length, started
 	
-	heading = draw_initials(window)
-	text_pos = draw_controls(window, heading)
-	text_pos = draw_algorithm_name(window, algorithm_name, text_pos)
-	text_pos = draw_algorithm_description(window, algorithm_name, text_pos)
-	draw_elapsed_time(window, elapsed_time)
-	draw_path_length(window, path_length, extra_path_length)
+	# the controls and the algorithm description only change with the grid size and the selected algorithm
+	static_key = (algorithm_name, ROWS)
+	if panel_cache["static_key"] != static_key:
+		static = pygame.Surface((int(WIDTH), int(HEIGHT)))  # the panel keeps its window coordinates on the layer
+		heading = draw_initials(static)
+		text_pos = draw_controls(static, heading)
+		text_pos = draw_algorithm_name(static, algorithm_name, text_pos)
+		draw_algorithm_description(static, algorithm_name, text_pos)
+		panel_cache.update(static_key=static_key, static=static, key=None)
+	
+	# the icon and the statistics are drawn over a copy of the static layer whenever they change
+	key = (elapsed_time, path_length, extra_path_length, search_stats, started, paused, brush, movement, profiler is not None, player and player.status())
+	if panel_cache["key"] != key:
+		panel = panel_cache["static"].copy()
+		draw_icon(panel)
+		draw_brush(panel)
+		draw_movement(panel)
+		draw_profiling(panel)
+		draw_replay(panel)
+		draw_search_stats(panel)
+		draw_elapsed_time(panel, elapsed_time)
+		draw_path_length(panel, path_length, extra_path_length)
+		panel_cache.update(key=key, panel=panel)
+	
+	window.blit(panel_cache["panel"], (HEIGHT, 0), (HEIGHT, 0, WIDTH - HEIGHT, HEIGHT))
 
 def draw(window, grid, rows):
-	""" Redraw the grid and the spots again over the previous screen to update the window """
-	window.fill(WHITE)
+	""" Redraw the spots that changed since the last frame, and the settings panel if anything on it changed """
+	renderer.draw(grid, (algorithm, rows, elapsed_time, path_length, extra_path_length, search_stats, started, paused, brush, movement, profiler is not None, player and player.status()))
 	
-	# Draw spots
-	for row in grid:
-		for spot in row:
-			spot.draw(window)
-			
-	draw_grid(window, rows, HEIGHT)
-	draw_settings_panel(window, algorithm)
+class Player:
+	""" Replays recorded searches at any speed and from any point, one recording or two side by side """
+	def __init__(self, recordings):
+		""" recordings are (log, state, cost) of one or two searches, state and cost are copies of the grid before the search """
+		self.recordings = recordings
+		rows, cols = recordings[0][1].shape
+		if len(recordings) == 1:
+			self.grid = Grid(rows, cols)
+			self.corners = [(0, 0)]
+		else:  # the grids at half the size next to each other, in a square that the window can show
+			self.grid = Grid(2 * rows + 1, 2 * rows + 1)
+			self.grid.state.fill(BARRIER)
+			self.corners = [(0, (rows + 1) // 2), (rows + 1, (rows + 1) // 2)]  # the first index is the x axis
+		self.length = max(len(log) for log, state, cost in recordings)
+		self.speed = max(1, self.length // (REPLAY_SECONDS * FPS))  # events per frame
+		self.playing = True
+		self.position = 0
+		self.rewind()
+	
+	def views(self):
+		""" Yield the log, the starting state and the part of the grid of every recording """
+		for (log, state, cost), (row, col) in zip(self.recordings, self.corners):
+			yield log, state, self.grid.state[row:row + log.rows, col:col + log.cols]
+	
+	def rewind(self):
+		""" Go back to the grids before the searches """
+		for (log, state, cost), (row, col) in zip(self.recordings, self.corners):
+			self.grid.state[row:row + log.rows, col:col + log.cols] = np.where(np.isin(state, SEARCH_STATES), EMPTY, state)
+			self.grid.cost[row:row + log.rows, col:col + log.cols] = cost
+		self.position = 0
 	
-	pygame.display.flip()
+	def seek(self, position):
+		""" Show the searches after the given number of events, only the events since the last position are applied going forwards """
+		position = max(0, min(self.length, position))
+		if position < self.position:
+			self.rewind()
+		for log, state, view in self.views():
+			log.apply(view, min(self.position, len(log)), min(position, len(log)))
+			ends = (state == START) | (state == END)  # the searches also visit the start and the end
+			view[ends] = state[ends]
+		self.position = position
 	
+	def advance(self):
+		""" Move on by one frame if playing """
+		if self.playing and self.position < self.length:
+			self.seek(self.position + self.speed)
+	
+	def status(self):
+		""" The text shown in the settings panel """
+		names = " vs ".join(log.name for log, state, cost in self.recordings)
+		return f"{names}: {self.position}/{self.length} x{self.speed}{'' if self.playing else ' (paused)'}"
+
 def get_clicked_pos(pos, rows):
 	""" Get the index position of the spot that the user clicked on from the mouse position"""
 	gap = HEIGHT / rows
@@ -246,32 +407,154 @@ def get_clicked_pos(pos, rows):
 	
 	return row, col
 	
-def main(window):
-	""" The main function that runs the game loop """
-	global algorithm, elapsed_time, start_time, path_length, extra_path_length, ROWS, started
+def main(window=None):
+	""" The main function that runs the game loop, in the window of get_window unless another one is given """
+	global algorithm, elapsed_time, start_time, path_length, extra_path_length, ROWS, started, renderer, planner, brush, movement, search_stats, profiler, paused, player
 	
-	grid = make_grid(ROWS, HEIGHT)
+	if window is None:
+		window = get_window()
+	grid = make_grid(ROWS)
+	renderer = Renderer(
+		window, HEIGHT,
+		lambda win, rows: draw_grid(win, rows, HEIGHT),
+		lambda win: draw_settings_panel(win, algorithm),
+		pygame.Rect(HEIGHT, 0, WIDTH - HEIGHT, HEIGHT)
+	)
 	
 	def in_grid():
 		x, y = pygame.mouse.get_pos()
 		return x <= HEIGHT and y <= HEIGHT
+	
+	def visit(pos, state):
+		""" Color a cell visited by a search, through the queue of the worker while a search runs in the background """
+		if worker:
+			worker.visit(pos, state)
+		elif pos != grid.start and pos != grid.end:  # the repairs of a planner run right away
+			grid.set(pos, OPEN if state == "open" else CLOSED)
+	
+	def apply(deltas):
+		""" Color the cells that the search visited since the last frame, a cell visited twice keeps its last state """
+		latest = dict(deltas)
+		grid.mark([pos for pos, state in latest.items() if state == "open"], OPEN)
+		grid.mark([pos for pos, state in latest.items() if state == "closed"], CLOSED)
+	
+	def show_stats(result):
+		""" Update the statistics in the settings panel """
+		global path_length, extra_path_length, search_stats
+		# the statistics come from the search itself, counting colored cells missed the cells that a search fills in afterwards
+		search_stats = (result.generated, result.peak_open, result.stale_pops,
+						result.search_time * 1000, result.reconstruct_time * 1000)
+		extra_path_length = result.expanded
+		path_length = result.cost if result.found else 0
+	
+	def show_result(result, sound=True):
+		""" Color the path of a finished search and update the statistics in the settings panel """
+		global elapsed_time
+		show_stats(result)
+		if result.found:
+			# the path is colored in a few batches, each one a single numpy write and one frame, instead of a frame per cell
+			batch = -(-len(result.path) // PATH_FRAMES) if sound else len(result.path)  # no animation while editing
+			for first in range(0, len(result.path), batch):
+				grid.mark(result.path[first:first + batch], PATH)
+				draw(window, grid, ROWS)
+			
+			# Stop the timer after the algorithm finishes
+			elapsed_time = time.time() - start_time
+			
+			if sound and found:
+				found.play()
+		elif sound and not_found:
+			not_found.play()
+	
+	def plan():
+		""" Run the incremental planner and return its result with positions and timing like the engine's """
+		plan_start = time.perf_counter()
+		result = planner.plan()
+		result.elapsed = time.perf_counter() - plan_start
+		result.peak_open = planner.open_set.peak
+		result.locate(grid.cols)
+		return result
+	
+	def replan(pos):
+		""" Repair the search of the incremental planner after the cell at pos was changed """
+		global start_time
+		start_time = time.time()
+		grid.reset_search()  # only the cells touched by the repair are colored
+		planner.cells_changed([grid.index(pos)])
+		show_result(plan(), sound=False)
 		
 	start = None  # the position of the starting spot
 	end = None  # the position of the ending spot
+	worker = None  # the search running in the background, what it visited is colored once per frame
+	recordings = []  # the last two recorded searches as (log, state, cost)
 	
 	run = True
 	global started; started = False  # if the algorithm has started running
 	
 	while run:
 		
-		draw(window, grid, ROWS)
+		if player:  # the grid is left alone while a replay is shown
+			player.advance()
+			draw(window, player.grid, player.grid.rows)
+		elif worker:
+			finished = worker.done  # read before draining, so no cell visited at the very end is missed
+			with profiler.query("frame") if profiler else nullcontext():
+				apply(worker.drain())
+				draw(window, grid, ROWS)
+			worker.frame()
+			if finished:
+				result = worker.join()
+				worker = None
+				started = paused = False
+				if result is None:  # cancelled, the cells it visited stay on the grid
+					planner = None
+					elapsed_time = time.time() - start_time
+				else:
+					with profiler.query("show_result") if profiler else nullcontext():
+						show_result(result)
+				if profiler:
+					profiler.save(TRACE_FILE)  # every search since profiling was switched on
+		else:
+			draw(window, grid, ROWS)
 		
 		for event in pygame.event.get():
 			
 			if event.type == pygame.QUIT:
 				run = False
 				
-			if started: 
+			if player:  # only the controls of the replay
+				if event.type == pygame.KEYDOWN:
+					if event.key == pygame.K_SPACE:
+						player.playing = not player.playing
+					elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):  # a twentieth of the replay back or forward
+						step = max(1, player.length // 20)
+						player.seek(player.position + (step if event.key == pygame.K_RIGHT else -step))
+					elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+						player.speed *= 2
+					elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+						player.speed = max(1, player.speed // 2)
+					elif event.key == pygame.K_HOME:
+						player.seek(0)
+					elif event.key == pygame.K_END:
+						player.seek(player.length)
+					elif event.key == pygame.K_ESCAPE:
+						player = None
+				continue
+			
+			if started:  # only the controls of the running search
+				if event.type == pygame.KEYDOWN and worker:
+					if event.key == pygame.K_SPACE:
+						if paused:
+							worker.resume()
+						else:
+							worker.pause()
+						paused = not paused
+					elif event.key == pygame.K_n:  # pause if needed and let the search make one more expansion
+						paused = True
+						worker.pause()
+						worker.step()
+					elif event.key == pygame.K_ESCAPE:
+						worker.cancel()
 				continue 
 			
 			if in_grid():
@@ -279,7 +562,7 @@ def main(window):
 					pos = pygame.mouse.get_pos()
 					row, col = get_clicked_pos(pos, ROWS)
 					if 0 <= row < ROWS and 0 <= col < ROWS:
-						spot = grid[row][col]  # selecting the clicked spot
+						spot = get_spot(grid, row, col)  # selecting the clicked spot
 						
 						if not start and spot != end:  # if the start square is not selected, make the current spot the start spot
 							start = spot
@@ -287,21 +570,38 @@ def main(window):
 						elif not end and spot != start:  # similarly for the end spot
 							end = spot
 							end.make_end()
-						elif spot != end and spot != start:  # if we are not re selecting start and end, then make barriers
+						elif spot != end and spot != start and brush:  # paint terrain with the cost of the brush
+							if spot.is_barrier() or grid.cost[row, col] != brush:
+								spot.reset()
+								grid.set_cost((row, col), brush)
+								if planner:
+									replan((row, col))
+						elif spot != end and spot != start and not spot.is_barrier():  # if we are not re selecting start and end, then make barriers
 							spot.make_barrier()
+							if planner:
+								replan((row, col))
 						
 				elif pygame.mouse.get_pressed()[2]:  # right button
 					pos = pygame.mouse.get_pos()
 					row, col = get_clicked_pos(pos, ROWS)
 					if 0 <= row < ROWS and 0 <= col < ROWS:
-						spot = grid[row][col]  # selecting the clicked spot
+						spot = get_spot(grid, row, col)  # selecting the clicked spot
+						was_barrier = spot.is_barrier() or grid.cost[row, col] != 1
 						spot.reset()
+						grid.set_cost((row, col), 1)  # back to plain ground
 						if spot == start:
 							start = None
+							planner = None
 						elif spot == end:
 							end = None
+							planner = None
+						elif was_barrier and planner:
+							replan((row, col))
 			
 			if event.type == pygame.KEYDOWN:
+				if pygame.K_0 <= event.key <= pygame.K_9:
+					planner = None  # barrier changes only replan with the algorithm that made the planner
+				
 				# run the algorithm
 				if event.key == pygame.K_SPACE and not started and end:  # if the space key is pressed and the algorithm has not started
 					start_time = time.time()  # Start the timer
@@ -309,32 +609,77 @@ def main(window):
 					elapsed_time = 0
 					path_length = 0
 					extra_path_length = 0
-					for row in grid:
-						for spot in row:
-							spot.update_neighbors(grid)
-							if spot.is_open() or spot.is_closed() or spot.is_path():
-								spot.reset()
-					path_found = algorithm(lambda: draw(window, grid, ROWS), grid, start, end)
+					search_stats = ()
+					grid.reset_search()
 					
-					if path_found:
-						# Stop the timer after the algorithm finishes
-						elapsed_time = time.time() - start_time
-						
-						# Calculate the path length and extra path length
-						path_length = sum(1 for row in grid for spot in row if spot.is_path())
-						extra_path_length = sum(1 for row in grid for spot in row if spot.is_closed() and not spot.is_path())
-      
-						found.play()
+					if algorithm in PLANNERS:  # keep the planner so that later barrier changes only repair its search
+						planner = PLANNERS[algorithm](grid, grid.index(grid.start), grid.index(grid.end),
+													 lambda index, state: visit(grid.position(index), state), tracking_peak())
 					else:
-						not_found.play()
-      
-					started = False  # Reset the started flag
+						planner = None
+					
+					options = {"movement": movement} if algorithm in MOVING else {}
+					
+					def run_search(report):
+						""" The search of the worker thread, the main loop colors what it reports once per frame """
+						with profiler.query(algorithm.__name__, start=grid.start, end=grid.end) if profiler else nullcontext():
+							if planner:
+								return plan()
+							return search(grid, grid.start, grid.end, algorithm, report, stats=True, **options)
+					
+					worker = SearchWorker(run_search, EXPANSIONS_PER_FRAME)
+					worker.start()
 
+				# run the search at full speed without drawing, recording what it does, and replay the recording
+				elif event.key == pygame.K_r and not started and end:
+					planner = None
+					grid.reset_search()
+					log = EventLog(grid.rows, grid.cols, algorithm.__name__)
+					options = {"movement": movement} if algorithm in MOVING else {}
+					result = search(grid, grid.start, grid.end, algorithm, stats=True, profiler=profiler, log=log, **options)
+					if profiler:
+						profiler.save(TRACE_FILE)
+					elapsed_time = result.elapsed
+					show_stats(result)
+					recordings = (recordings + [(log, grid.state.copy(), grid.cost.copy())])[-2:]
+					player = Player(recordings[-1:])
+				
+				# replay the last two recordings side by side
+				elif event.key == pygame.K_c and len(recordings) == 2 and recordings[0][1].shape == recordings[1][1].shape:
+					player = Player(recordings)
+				
+				# switch between the barrier brush and the terrain brushes
+				elif event.key == pygame.K_t:
+					brush = BRUSHES[(BRUSHES.index(brush) + 1) % len(BRUSHES)]
+				
+				# switch between the movement models: 4 directions, 8 directions, without cutting corners and with uniform costs
+				elif event.key == pygame.K_m:
+					names = list(MOVEMENTS)
+					movement = names[(names.index(movement) + 1) % len(names)]
+				
+				# switch profiling on or off, each search is added to the trace file while it is on
+				elif event.key == pygame.K_p:
+					profiler = None if profiler else Profiler()
+				
+				# save the barriers, terrain, start and end, and load them back later
+				elif event.key == pygame.K_s:
+					grid.reset_search()
+					save(grid, SAVE_FILE)
+				elif event.key == pygame.K_l and os.path.exists(SAVE_FILE):
+					loaded = load(SAVE_FILE)
+					if loaded.rows == loaded.cols:  # the window only shows square grids
+						grid = loaded
+						ROWS = grid.rows
+						start = get_spot(grid, *grid.start) if grid.start else None
+						end = get_spot(grid, *grid.end) if grid.end else None
+						planner = None
+				
 				# clear the grid
 				elif event.key == pygame.K_BACKSPACE:
 					start = None
 					end = None
-					grid = make_grid(ROWS, HEIGHT)
+					planner = None
+					grid = make_grid(ROWS)
 				
 				# change the algorithm
 				elif event.key == pygame.K_1:
@@ -349,20 +694,36 @@ def main(window):
 					algorithm = jps
 				elif event.key == pygame.K_6:
 					algorithm = theta_star
+				elif event.key == pygame.K_7:
+					algorithm = lazy_theta_star
+				elif event.key == pygame.K_8:
+					algorithm = lpa_star
+				elif event.key == pygame.K_9:
+					algorithm = d_star_lite
+				elif event.key == pygame.K_0:
+					algorithm = hpa_star
+				elif event.key == pygame.K_b:
+					planner = None
+					algorithm = bidirectional_a_star
 					
 				# changing the grid size
 				elif event.key == pygame.K_UP and ROWS < 120:
 					ROWS += 10
 					start = None
 					end = None
-					grid = make_grid(ROWS, HEIGHT)
+					planner = None
+					grid = make_grid(ROWS)
 				elif event.key == pygame.K_DOWN and ROWS > 10:
 					ROWS -= 10
 					start = None
 					end = None
-					grid = make_grid(ROWS, HEIGHT)
+					planner = None
+					grid = make_grid(ROWS)
 									
 		clock.tick(FPS)
 	
+	if worker:  # closed in the middle of a search
+		worker.cancel()
+		worker.join()
 	pygame.quit()
 	
\ No newline at end of file
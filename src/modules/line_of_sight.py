@@ -0,0 +1,58 @@
+''' This module contains the line of sight check used by the any-angle algorithms.
+Cells are squares centred on their (row, col) position and a line of sight exists between two cells when the straight
+segment joining their centres does not pass through a barrier. A segment that passes exactly through the corner shared by
+four cells needs both of the side cells to be free, so lines never squeeze between two diagonal barriers. '''
+
+MAX_CACHED = 1 << 18 # the answers kept per grid, about 45 MB, the cache starts over when it is full
+
+def line_of_sight(blocked, start, end):
+    ''' If the segment between the centres of two cells only crosses free cells, blocked is Grid.blocked_rows() '''
+    row, col = start
+    end_row, end_col = end
+    dr = abs(end_row - row)
+    dc = abs(end_col - col)
+    sr = 1 if end_row > row else -1
+    sc = 1 if end_col > col else -1
+    steps_r = steps_c = 0
+
+    # walk through every cell the segment crosses, always stepping over the cell border that the segment reaches first
+    while steps_r < dr or steps_c < dc:
+        # compare where the segment meets the next column border with where it meets the next row border
+        decision = (1 + 2 * steps_c) * dr - (1 + 2 * steps_r) * dc
+        if decision == 0: # exactly through a corner
+            if blocked[row + sr][col] or blocked[row][col + sc]:
+                return False
+            row += sr
+            col += sc
+            steps_r += 1
+            steps_c += 1
+        elif decision < 0:
+            col += sc
+            steps_c += 1
+        else:
+            row += sr
+            steps_r += 1
+        if blocked[row][col]:
+            return False
+    return True
+
+def cached_line_of_sight(grid):
+    ''' Return a line of sight check between two cell numbers that remembers its answers until a barrier changes.
+    The answers are shared by every search on the grid, so the cache is emptied once it holds MAX_CACHED of them '''
+    cache = grid.derived.get("line_of_sight")
+    if cache is None:
+        cache = grid.derived["line_of_sight"] = {}
+    blocked = grid.blocked_rows()
+    cols = grid.cols
+
+    def check(start, end):
+        ''' If there is a line of sight between the two cells '''
+        key = (start, end) if start <= end else (end, start) # the segment is the same in both directions
+        visible = cache.get(key)
+        if visible is None:
+            if len(cache) >= MAX_CACHED:
+                cache.clear()
+            visible = cache[key] = line_of_sight(blocked, divmod(key[0], cols), divmod(key[1], cols))
+        return visible
+
+    return check
@@ -0,0 +1,144 @@
+''' Read the grid maps and scenarios of the MovingAI pathfinding benchmarks (https://movingai.com/benchmarks/).
+A .map file is a short text header followed by one line of characters per row of the map. The file is memory mapped and
+the rows are turned into barriers with a single numpy table lookup, so even the largest benchmark maps load in milliseconds.
+A .scen file lists the queries of a map with the length of their shortest path, the scenarios are streamed one line at a time.
+
+Example:
+    from modules.batch import batch_search
+    from modules.movingai import read_map, read_scenarios, queries
+    grid = read_map("arena.map")
+    for number, result in batch_search(grid, queries(read_scenarios("arena.map.scen")), movement="eight_way_no_corners"):
+        ...
+
+Or from the command line, to compare an algorithm with the published path lengths:
+    python -m modules.movingai arena.map arena.map.scen --algorithm a_star --movement eight_way_no_corners
+add --trace trace.json to see where the time of the searches goes (see modules.profiling) '''
+
+import argparse
+import math
+import mmap
+import time
+import numpy as np
+from modules.grid import Grid
+from modules.engine import ALGORITHMS, search
+from modules.adjacency import MOVEMENTS
+from modules.profiling import Profiler
+
+PASSABLE = b".GS" # ground and swamp, every other terrain (@ O T and W) is a barrier
+
+def read_map(path):
+    ''' Load a .map file into a Grid '''
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header = {}
+        position = 0
+        while True: # the header lines come before the line that only says "map"
+            line_end = data.find(b"\n", position)
+            if line_end < 0:
+                raise ValueError(f"{path} has no map section")
+            words = data[position:line_end].split()
+            position = line_end + 1
+            if words == [b"map"]:
+                break
+            if len(words) == 2:
+                header[words[0].decode()] = words[1].decode()
+        try:
+            rows, cols = int(header["height"]), int(header["width"])
+        except (KeyError, ValueError):
+            raise ValueError(f"{path} does not give the height and width of the map") from None
+
+        # every row is followed by \n or \r\n, so the rows are a fixed stride apart
+        first_end = data.find(b"\n", position)
+        stride = (first_end - position if first_end >= 0 else cols) + 1
+        if stride - 1 not in (cols, cols + 1): # a row is cols characters and maybe a \r
+            raise ValueError(f"the rows of {path} are not {cols} characters long")
+        if len(data) - position < (rows - 1) * stride + cols:
+            raise ValueError(f"{path} has fewer than {rows} rows")
+
+        table = np.ones(256, dtype=bool) # the barrier lookup for every byte value
+        table[np.frombuffer(PASSABLE, dtype=np.uint8)] = False
+        body = np.frombuffer(data, dtype=np.uint8, count=(rows - 1) * stride + cols, offset=position)
+        rows_view = np.lib.stride_tricks.as_strided(body, shape=(rows, cols), strides=(stride, 1)) # skips the line endings
+        barriers = table[rows_view]
+        del body, rows_view # the views have to go before the mapping can be closed
+    return Grid.from_array(barriers)
+
+class Scenario:
+    ''' One query of a .scen file, positions are (row, col) like everywhere else in the project '''
+    def __init__(self, bucket, map_name, rows, cols, start, end, optimal):
+        self.bucket = bucket # the scenarios are grouped by the length of their path
+        self.map_name = map_name
+        self.rows = rows
+        self.cols = cols
+        self.start = start
+        self.end = end
+        self.optimal = optimal # the published length of the shortest path, diagonal moves count sqrt(2)
+
+    def __repr__(self):
+        return f"Scenario(bucket={self.bucket}, start={self.start}, end={self.end}, optimal={self.optimal})"
+
+def read_scenarios(path):
+    ''' Yield the Scenario of every line of a .scen file '''
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) < 9 or fields[0] == "version":
+                continue
+            # bucket, map, width, height, start x, start y, goal x, goal y, optimal length (x is the column)
+            bucket, map_name = int(fields[0]), fields[1]
+            cols, rows, start_col, start_row, end_col, end_row = map(int, fields[2:8])
+            yield Scenario(bucket, map_name, rows, cols, (start_row, start_col), (end_row, end_col), float(fields[8]))
+
+def queries(scenarios):
+    ''' Yield the (start, end) query of every scenario, for search loops and batch_search '''
+    for scenario in scenarios:
+        yield scenario.start, scenario.end
+
+def path_length(path):
+    ''' Return the length of a path the way the benchmarks measure it, straight moves count 1 and diagonal ones sqrt(2) '''
+    diagonal = sum(1 for a, b in zip(path, path[1:]) if a[0] != b[0] and a[1] != b[1])
+    return diagonal * math.sqrt(2) + (len(path) - 1 - diagonal)
+
+def main(argv=None):
+    ''' Run an algorithm on every scenario of a map and compare the path lengths with the published ones '''
+    parser = argparse.ArgumentParser(description="Run the scenarios of a MovingAI benchmark map.")
+    parser.add_argument("map", help="the .map file")
+    parser.add_argument("scenarios", help="the .scen file")
+    parser.add_argument("--algorithm", choices=list(ALGORITHMS), default="a_star")
+    parser.add_argument("--movement", choices=list(MOVEMENTS), help="for the algorithms that take one, the benchmarks use eight_way_no_corners")
+    parser.add_argument("--limit", type=int, help="only run this many scenarios")
+    parser.add_argument("--trace", help="profile the searches and write a Chrome trace of them to this file")
+    parser.add_argument("--cprofile", metavar="DIR", help="profile every search with cProfile and dump the statistics to DIR")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    grid = read_map(args.map)
+    print(f"loaded {args.map} ({grid.rows}x{grid.cols}) in {time.perf_counter() - start_time:.4f} s")
+    options = {} if args.movement is None else {"movement": args.movement}
+    if args.trace or args.cprofile:
+        options["profiler"] = Profiler(args.cprofile)
+
+    count = found = compared = 0
+    elapsed = worst = total = 0.0
+    for scenario in read_scenarios(args.scenarios):
+        if args.limit is not None and count >= args.limit:
+            break
+        result = search(grid, scenario.start, scenario.end, args.algorithm, **options)
+        count += 1
+        elapsed += result.elapsed
+        if not result.found:
+            continue
+        found += 1
+        if scenario.optimal > 0:
+            ratio = path_length(result.path) / scenario.optimal # 1 for an optimal path
+            total += ratio
+            worst = max(worst, ratio)
+            compared += 1
+    print(f"{count} scenarios, {found} paths found in {elapsed:.3f} s")
+    if compared:
+        print(f"path length / optimal: mean {total / compared:.4f}, worst {worst:.4f}")
+    if args.trace:
+        options["profiler"].save(args.trace)
+        print("time per phase:", ", ".join(f"{phase} {seconds:.3f} s" for phase, seconds in options["profiler"].phase_times().items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+''' This module contains the open lists shared by the best-first searches (dijkstra, A*, JPS and theta*).
+They are built on heapq instead of queue.PriorityQueue, which takes a lock on every put and get because it is meant
+for passing items between threads. Both open lists also track which nodes they hold, so the algorithms no longer
+need a separate open set hash or a count tiebreaker of their own. '''
+
+import heapq
+
+# how two nodes with the same priority are ordered
+#   fifo: the node that was pushed first comes out first
+#   lifo: the node that was pushed last comes out first
+#   high_g: the node with the larger g score comes out first, which on grids usually means the one closer to the goal
+TIE_BREAKS = ("fifo", "lifo", "high_g")
+
+class OpenList:
+    ''' A binary heap with lazy deletion. Lowering the priority of a node pushes a new entry and the old one is skipped
+    as stale when it reaches the top of the heap, which is cheaper than searching the heap for it. '''
+    def __init__(self, tie_break="fifo"):
+        ''' Initialize an empty open list with one of the TIE_BREAKS policies '''
+        if tie_break not in TIE_BREAKS:
+            raise ValueError(f"unknown tie break {tie_break!r}, expected one of {', '.join(TIE_BREAKS)}")
+        self.tie_break = tie_break
+        self.pushes = 0 # the number of entries pushed on the heap
+        self.pops = 0 # the number of nodes taken out of the open list
+        self.stale = 0 # the number of outdated entries that were skipped while popping
+        self._heap = []
+        self._priority = {} # the priority of the live entry of every node in the open list
+
+    def _entry(self, node, priority, g):
+        ''' Build the heap entry of a node, the count in the entry makes sure that nodes are never compared '''
+        self.pushes += 1
+        if self.tie_break == "fifo":
+            return (priority, 0, self.pushes, node)
+        if self.tie_break == "lifo":
+            return (priority, 0, -self.pushes, node)
+        return (priority, -g, self.pushes, node)
+
+    def push(self, node, priority, g=0):
+        ''' Add a node or lower its priority, g is only used by the high_g tie break '''
+        old = self._priority.get(node)
+        if old is not None and old <= priority:
+            return
+        self._priority[node] = priority
+        heapq.heappush(self._heap, self._entry(node, priority, g))
+
+    def pop(self):
+        ''' Remove and return the node with the lowest priority '''
+        heap = self._heap
+        live = self._priority
+        while heap:
+            priority, _, _, node = heapq.heappop(heap)
+            if live.get(node) == priority:
+                del live[node]
+                self.pops += 1
+                return node
+            self.stale += 1 # the node was pushed again with a lower priority or already popped
+        raise IndexError("pop from an empty open list")
+
+    def peek(self):
+        ''' Return the lowest priority in the open list without removing its node '''
+        heap = self._heap
+        live = self._priority
+        while heap:
+            priority, _, _, node = heap[0]
+            if live.get(node) == priority:
+                return priority
+            heapq.heappop(heap)
+            self.stale += 1
+        raise IndexError("peek at an empty open list")
+
+    def remove(self, node):
+        ''' Take a node out of the open list, its entry is skipped as stale when it reaches the top of the heap '''
+        del self._priority[node]
+
+    def priority(self, node):
+        ''' Return the priority of a node in the open list '''
+        return self._priority[node]
+
+    def __contains__(self, node):
+        return node in self._priority
+
+    def __iter__(self):
+        return iter(self._priority)
+
+    def __len__(self):
+        return len(self._priority)
+
+class IndexedOpenList(OpenList):
+    ''' A binary heap that knows the index of every node, so lowering a priority moves the existing entry up
+    (decrease-key) instead of leaving a stale entry behind. The heap never grows larger than the open list. '''
+    def __init__(self, tie_break="fifo"):
+        ''' Initialize an empty open list with one of the TIE_BREAKS policies '''
+        super().__init__(tie_break)
+        self._index = {} # the position of every node in the heap
+
+    def push(self, node, priority, g=0):
+        ''' Add a node or lower its priority, g is only used by the high_g tie break '''
+        old = self._priority.get(node)
+        if old is not None and old <= priority:
+            return
+        self._priority[node] = priority
+        entry = self._entry(node, priority, g)
+        if old is None:
+            self._heap.append(entry)
+            self._sift_up(len(self._heap) - 1, entry)
+        else:
+            self._sift_up(self._index[node], entry)
+
+    def pop(self):
+        ''' Remove and return the node with the lowest priority '''
+        heap = self._heap
+        if not heap:
+            raise IndexError("pop from an empty open list")
+        node = heap[0][3]
+        last = heap.pop()
+        if heap:
+            self._sift_down(0, last)
+        del self._index[node]
+        del self._priority[node]
+        self.pops += 1
+        return node
+
+    def peek(self):
+        ''' Return the lowest priority in the open list without removing its node '''
+        if not self._heap:
+            raise IndexError("peek at an empty open list")
+        return self._heap[0][0]
+
+    def remove(self, node):
+        ''' Take a node out of the open list, the last entry of the heap takes its place '''
+        position = self._index.pop(node)
+        del self._priority[node]
+        last = self._heap.pop()
+        if position < len(self._heap):
+            self._sift_down(position, last)
+            self._sift_up(self._index[last[3]], last) # the last entry may also be smaller than the parent of the gap
+
+    def _sift_up(self, position, entry):
+        ''' Move an entry towards the root until its parent is smaller '''
+        heap = self._heap
+        index = self._index
+        while position > 0:
+            parent = (position - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[position] = heap[parent]
+            index[heap[position][3]] = position
+            position = parent
+        heap[position] = entry
+        index[entry[3]] = position
+
+    def _sift_down(self, position, entry):
+        ''' Move an entry towards the leaves until both of its children are larger '''
+        heap = self._heap
+        index = self._index
+        size = len(heap)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[position] = heap[child]
+            index[heap[position][3]] = position
+            position = child
+        heap[position] = entry
+        index[entry[3]] = position
+
+class PeakTracking:
+    ''' Mixed into an open list to remember the largest number of nodes it held. It is only used when statistics are asked for,
+    so the plain open lists skip the size check on every push (they still count their pushes, pops and stale pops). '''
+    peak = 0
+
+    def push(self, node, priority, g=0):
+        ''' Add a node or lower its priority and update the peak size '''
+        super().push(node, priority, g)
+        if len(self._priority) > self.peak:
+            self.peak = len(self._priority)
+
+class PeakOpenList(PeakTracking, OpenList):
+    ''' An OpenList that tracks its peak size '''
+
+class PeakIndexedOpenList(PeakTracking, IndexedOpenList):
+    ''' An IndexedOpenList that tracks its peak size '''
+
+def empty_like(open_list, peak=False):
+    ''' Return a new empty open list of the same kind and tie break as open_list, with peak it also tracks its peak size.
+    The searches are handed one of these instead of the open list they were given, which still holds the nodes and
+    priorities of the last search that used it '''
+    indexed = isinstance(open_list, IndexedOpenList)
+    if peak:
+        kind = PeakIndexedOpenList if indexed else PeakOpenList
+    elif isinstance(open_list, PeakTracking):
+        kind = IndexedOpenList if indexed else OpenList
+    else:
+        kind = type(open_list)
+    return kind(open_list.tie_break)
+
+def tracking_peak(open_list=None):
+    ''' Return an empty open list of the same kind and tie break as open_list (an OpenList by default) that tracks its peak size '''
+    return PeakOpenList() if open_list is None else empty_like(open_list, peak=True)
@@ -1,8 +1,74 @@
-''' This module contains the function used to draw the shortest selected path in purple '''
+''' This module contains the functions used to rebuild the shortest path found by an algorithm. They only build data (lists
+of cells), the gui colors the path afterwards in one go, so pulling the path out of a finished search costs a walk along
+the path and nothing else. '''
 
-def reconstruct_path(came_from, current, draw):
-    ''' Reconstructs the path taken by the algorithm '''
+import numpy as np
+
+def reconstruct_path(came_from, current):
+    ''' Reconstructs the path taken by the algorithm, from the start to the current node '''
+    path = [current]
     while current in came_from:
         current = came_from[current]
-        current.make_path()
-        draw()
\ No newline at end of file
+        path.append(current)
+    path.reverse()
+    return path
+
+def compress_path(path):
+    ''' Return the waypoints of a path: the start, the end and every cell where the direction of the moves changes.
+    path is a sequence of cell numbers or of (row, col) positions, the waypoints come back in the same form as a numpy array.
+    interpolate_path and expand_path turn the waypoints back into the full path. '''
+    path = np.asarray(path)
+    if len(path) < 3:
+        return path.copy()
+    steps = np.diff(path, axis=0).reshape(len(path) - 1, -1) # the move between consecutive cells
+    turns = np.flatnonzero((steps[1:] != steps[:-1]).any(axis=1)) + 1 # the cells where the next move is a different one
+    return np.concatenate((path[:1], path[turns], path[-1:]))
+
+def expand_path(waypoints, cols):
+    ''' Fill in the cells between consecutive waypoints given as cell numbers of a grid with cols columns, like interpolate_path
+    without converting every cell to a position and back '''
+    if not len(waypoints):
+        return []
+    path = [int(waypoints[0])]
+    for first, second in zip(waypoints, waypoints[1:]):
+        (x1, y1), (x2, y2) = divmod(int(first), cols), divmod(int(second), cols)
+        dx = abs(x2 - x1)
+        dy = abs(y2 - y1)
+        sx = cols if x1 < x2 else -cols # a step down or up changes the cell number by a whole row
+        sy = 1 if y1 < y2 else -1
+        err = dx - dy
+
+        current, target = int(first), int(second)
+        while current != target:
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                current += sx
+            if e2 < dx:
+                err += dx
+                current += sy
+            path.append(current)
+    return path
+
+def interpolate_path(waypoints):
+    ''' Fill in the cells between consecutive waypoints with straight Bresenham lines '''
+    if not waypoints:
+        return []
+    path = [waypoints[0]]
+    for (x1, y1), (x2, y2) in zip(waypoints, waypoints[1:]):
+        dx = abs(x2 - x1)
+        dy = abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx - dy
+
+        while (x1, y1) != (x2, y2):
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x1 += sx
+            if e2 < dx:
+                err += dx
+                y1 += sy
+            path.append((x1, y1))
+    return path
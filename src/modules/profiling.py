@@ -0,0 +1,179 @@
+''' Profile searches to see where their time goes: the open list, finding the neighbors, the heuristic, building the path or
+drawing. While a query runs, a Profiler hooks every function call with sys.setprofile and records a timed span for it, put in
+a phase by the module that the function belongs to, so the algorithms do not have to be changed. The spans are written as
+Chrome trace events, which chrome://tracing, Perfetto (https://ui.perfetto.dev) and speedscope show as a flame graph of every
+query. The hook makes every call several times slower, so compare the phases with each other and not with unprofiled times.
+
+With cprofile_dir every query runs under cProfile instead and its statistics are dumped to a .prof file (for pstats or
+snakeviz). cProfile uses the same profiling hook of the interpreter, so those queries only get their outer span in the trace.
+
+Example:
+    from modules.engine import search
+    from modules.profiling import Profiler
+    profiler = Profiler()
+    result = search(grid, (0, 0), (99, 99), "a_star", profiler=profiler)
+    profiler.phase_times()  # {'search': 0.021, 'heap': 0.009, 'neighbors': 0.004, ...}
+    profiler.save("a_star.json") '''
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+
+# the phase of the functions of each module (or package), the functions of the algorithm modules are the search itself
+PHASES = {
+    "heapq": "heap",
+    "_heapq": "heap",
+    "modules.open_list": "heap",
+    "modules.adjacency": "neighbors",
+    "modules.bitset": "neighbors",
+    "modules.line_of_sight": "neighbors",
+    "modules.distance_formulas": "heuristic",
+    "modules.path_reconstructer": "path",
+    "modules.search_result": "path",
+    "modules.grid": "grid",
+    "modules.algorithms": "search",
+    "modules.renderer": "draw",
+    "modules.spot": "draw",
+    "modules.gui": "draw",
+    "pygame": "draw",
+}
+# the functions of the algorithm modules that only look for the neighbors of a node
+NEIGHBOR_FUNCTIONS = {"jump", "jump_plus", "walkable", "pruned_directions", "line_of_sight"}
+MAX_EVENTS = 1_000_000 # the spans kept for the trace, later spans still count towards phase_times
+
+def phase_of(module, function):
+    ''' Return the phase of a function from the name of its module, None for modules outside of PHASES '''
+    if function in NEIGHBOR_FUNCTIONS:
+        return "neighbors"
+    while module:
+        if module in PHASES:
+            return PHASES[module]
+        module = module.rpartition(".")[0] # the package of the module
+    return None
+
+class Profiler:
+    ''' Records the function calls of the queries run under it, pass it to engine.search or use query() directly '''
+    def __init__(self, cprofile_dir=None, max_events=MAX_EVENTS):
+        ''' Initialize an empty profile, with cprofile_dir every query is run under cProfile and dumped there instead '''
+        self.cprofile_dir = cprofile_dir
+        self.max_events = max_events
+        self.spans = [] # (name, phase, start ns, duration ns, thread id) of every recorded call
+        self.queries = [] # (name, start ns, duration ns, thread id, args) of every query
+        self.totals = {} # the time spent in the functions of each phase in ns, without the calls they made
+        self.dropped = 0 # the spans that did not fit in max_events
+        self.origin = None # the start of the first query, the trace starts there
+        self.names = {} # the (name, phase) of every code object and C function seen so far
+        self.lock = threading.Lock() # queries can run on several threads at once, like the gui's search and drawing
+
+    def describe(self, code, module):
+        ''' Return the (name, phase) of a python function, calls of modules outside of PHASES are "other" '''
+        function = code.co_name
+        name = f"{module}.{getattr(code, 'co_qualname', function)}" # co_qualname is new in python 3.11
+        self.names[code] = entry = (name, phase_of(module, function) or "other")
+        return entry
+
+    def describe_c(self, function):
+        ''' Return the (name, phase) of a C function, or None for the ones that are not worth a span (list.append and the like) '''
+        owner = getattr(function, "__self__", None)
+        if not isinstance(owner, ModuleType): # methods of objects, too many and too short to say anything
+            self.names[function] = None
+            return None
+        phase = phase_of(owner.__name__, function.__name__)
+        self.names[function] = entry = (f"{owner.__name__}.{function.__name__}", phase) if phase else None
+        return entry
+
+    def hook(self, thread, totals):
+        ''' Return the function given to sys.setprofile, it keeps a stack of the open calls of one thread and adds the time
+        of each phase to totals, which belongs to the thread too so that queries on other threads cannot lose an update '''
+        stack = [] # [entry, start, time spent in the calls it made] of every open call
+        names, spans = self.names, self.spans
+        clock = time.perf_counter_ns
+        max_events = self.max_events
+
+        def close():
+            now = clock()
+            entry, start, children = stack.pop()
+            duration = now - start
+            totals[entry[1]] = totals.get(entry[1], 0) + duration - children
+            if stack:
+                stack[-1][2] += duration
+            if len(spans) < max_events:
+                spans.append((entry[0], entry[1], start, duration, thread))
+            else:
+                self.dropped += 1
+
+        def profile(frame, event, arg):
+            if event == "call":
+                code = frame.f_code
+                entry = names.get(code) or self.describe(code, frame.f_globals.get("__name__", "?"))
+                stack.append([entry, clock(), 0])
+            elif event == "return":
+                if stack: # calls that started before the hook have no span
+                    close()
+            elif event == "c_call":
+                entry = names.get(arg, False)
+                if entry is False:
+                    entry = self.describe_c(arg)
+                if entry:
+                    stack.append([entry, clock(), 0])
+            elif names.get(arg) and stack: # c_return and c_exception of a recorded C function
+                close()
+        return profile
+
+    @contextmanager
+    def query(self, name, **args):
+        ''' Profile the code run inside the with block as one query called name, args are shown on its span in the trace '''
+        thread = threading.get_ident()
+        start = time.perf_counter_ns()
+        if self.origin is None:
+            self.origin = start
+        if self.cprofile_dir is None:
+            previous = sys.getprofile()
+            totals = {}
+            sys.setprofile(self.hook(thread, totals))
+            try:
+                yield self
+            finally:
+                sys.setprofile(previous) # the calls still open here belong to the with statement and are dropped
+                with self.lock:
+                    for phase, total in totals.items():
+                        self.totals[phase] = self.totals.get(phase, 0) + total
+        else:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            args["cprofile"] = os.path.join(self.cprofile_dir, f"{len(self.queries):04d}-{name}.prof")
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield self
+            finally:
+                profile.disable()
+                profile.dump_stats(args["cprofile"])
+        self.queries.append((name, start, time.perf_counter_ns() - start, thread, args))
+
+    def phase_times(self):
+        ''' Return the seconds spent in each phase, the slowest first, the time of a call does not include the calls it made '''
+        return {phase: total / 1e9 for phase, total in sorted(self.totals.items(), key=lambda item: -item[1])}
+
+    def trace_events(self):
+        ''' Return the queries and the recorded calls as a list of Chrome trace events, times are in microseconds '''
+        pid = os.getpid()
+        origin = self.origin or 0
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "pathfinding"}}]
+        for name, start, duration, thread, args in self.queries:
+            events.append({"name": name, "cat": "query", "ph": "X", "ts": (start - origin) / 1000, "dur": duration / 1000,
+                           "pid": pid, "tid": thread, "args": {key: str(value) for key, value in args.items()}})
+        for name, phase, start, duration, thread in self.spans:
+            events.append({"name": name, "cat": phase, "ph": "X", "ts": (start - origin) / 1000, "dur": duration / 1000,
+                           "pid": pid, "tid": thread})
+        return events
+
+    def save(self, path):
+        ''' Write the trace as Chrome trace event JSON, open it in chrome://tracing or https://ui.perfetto.dev '''
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms",
+                       "otherData": {"phase_seconds": self.phase_times(), "dropped_spans": self.dropped}}, file)
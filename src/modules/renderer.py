@@ -0,0 +1,80 @@
+''' This module contains the Renderer class which draws the grid and the settings panel for the gui.
+Instead of redrawing the whole window on every call it compares the grid with what is on screen, redraws only the
+cells that changed and hands just their rectangles to pygame.display.update. The gui draws a frame on every pass of its
+loop, the search runs on a SearchWorker thread and only decides how much of it shows up in each frame. '''
+
+import numpy as np
+import pygame
+from assets.colors import *
+from modules.spot import PALETTE, TERRAIN, cell_rect, draw_grid_cells
+from modules.grid import EMPTY
+
+FULL_REDRAW_FRACTION = 0.25 # above this fraction of changed cells one blit of the whole grid is cheaper
+
+class Renderer:
+    ''' Draws only what changed since the last frame '''
+    def __init__(self, window, size, draw_lines, draw_panel, panel_rect):
+        ''' Initialize the renderer, the grid is drawn in a size x size square in the top left corner of the window.
+        draw_lines(surface, rows) draws the grid lines and draw_panel(window) draws the settings panel inside panel_rect. '''
+        self.window = window
+        self.size = size
+        self.draw_lines = draw_lines
+        self.draw_panel = draw_panel
+        self.panel_rect = panel_rect
+        self.drawn = None # a copy of the grid state that is currently on screen
+        self.drawn_cost = None # a copy of the terrain costs that are currently on screen
+        self.lines = None # the grid lines drawn once on a transparent layer, with the number of rows they were drawn for
+        self.panel_key = None # what the panel showed when it was last drawn
+
+    def invalidate(self):
+        ''' Force a full redraw on the next frame, for example after the grid was replaced '''
+        self.drawn = None
+
+    def line_layer(self, rows):
+        ''' Return the transparent layer with the grid lines, it is only drawn again when the number of rows changes '''
+        if self.lines is None or self.lines[0] != rows:
+            layer = pygame.Surface((int(self.size), int(self.size)), pygame.SRCALPHA)
+            self.draw_lines(layer, rows)
+            self.lines = rows, layer
+        return self.lines[1]
+
+    def draw(self, grid, panel_key):
+        ''' Draw a frame, panel_key is anything that changes whenever the panel has to be redrawn '''
+        lines = self.line_layer(grid.rows)
+        if self.drawn is None or self.drawn.shape != grid.state.shape:
+            self.window.fill(WHITE)
+            draw_grid_cells(self.window, grid, self.size)
+            self.window.blit(lines, (0, 0))
+            self.draw_panel(self.window)
+            pygame.display.flip()
+            self.drawn = grid.state.copy()
+            self.drawn_cost = grid.cost.copy()
+            self.panel_key = panel_key
+            return
+
+        rects = []
+        changed = np.argwhere((grid.state != self.drawn) | (grid.cost != self.drawn_cost))
+        if len(changed) > FULL_REDRAW_FRACTION * grid.state.size:
+            draw_grid_cells(self.window, grid, self.size)
+            self.window.blit(lines, (0, 0))
+            rects.append(pygame.Rect(0, 0, self.size + 1, self.size + 1))
+        else:
+            gap = self.size / grid.rows
+            self.window.set_clip(pygame.Rect(0, 0, int(self.size), int(self.size)))
+            for row, col in changed.tolist():
+                rect = cell_rect(row, col, gap)
+                state = grid.state[row, col]
+                pygame.draw.rect(self.window, TERRAIN[grid.cost[row, col]] if state == EMPTY else PALETTE[state], rect)
+                self.window.blit(lines, rect, rect) # the grid lines on the sides of the cell
+                rects.append(rect)
+            self.window.set_clip(None)
+        self.drawn[...] = grid.state
+        self.drawn_cost[...] = grid.cost
+
+        if panel_key != self.panel_key:
+            self.draw_panel(self.window)
+            rects.append(self.panel_rect)
+            self.panel_key = panel_key
+
+        if rects:
+            pygame.display.update(rects)
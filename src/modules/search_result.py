@@ -0,0 +1,69 @@
+''' This module contains the SearchResult class which every algorithm returns instead of recoloring spots '''
+
+import numpy as np
+from modules.path_reconstructer import compress_path
+
+class SearchResult:
+    ''' The outcome of a single search: the path found, its cost and statistics about the search '''
+    def __init__(self, path=None, cost=float("inf"), expanded=0, generated=0, heap_pushes=0, heap_pops=0, stale_pops=0,
+                 reconstruct_time=0.0):
+        ''' Initialize the result, an empty path means that no path was found '''
+        self.path = path or [] # the cells from start to end as (row, col)
+        self.indices = None # the same cells as an array of cell numbers (row * cols + col), set by the engine
+        self.cost = cost # the length of the path, inf if there is no path
+        self.expanded = expanded # the number of nodes taken out of the open set
+        self.generated = generated # the number of nodes added to the open set
+        self.heap_pushes = heap_pushes # the number of entries pushed on the open list heap
+        self.heap_pops = heap_pops # the number of nodes popped from the open list heap
+        self.stale_pops = stale_pops # the number of outdated heap entries that were skipped (lazy deletion)
+        self.peak_open = None # the largest size of the open list or frontier, None when it was not measured
+        self.peak_memory = None # the peak of the memory allocated during the search in bytes, set by the engine with memory=True
+        self.reconstruct_time = reconstruct_time # the part of the wall time spent building the path after the search
+        self.elapsed = 0.0 # the wall time of the search in seconds, set by the engine
+        self.algorithm = None # the name of the algorithm that produced the result, set by the engine
+
+    @property
+    def found(self):
+        ''' If the search reached the end point '''
+        return bool(self.path)
+
+    @property
+    def search_time(self):
+        ''' The part of the wall time spent searching, before the path was built '''
+        return max(0.0, self.elapsed - self.reconstruct_time)
+
+    def locate(self, cols):
+        ''' Turn the path of cell numbers that the algorithms build into (row, col) positions for a grid with cols columns,
+        keeping the cell numbers in indices '''
+        self.indices = np.asarray(self.path, dtype=np.int64)
+        rows, columns = np.divmod(self.indices, cols)
+        self.path = list(zip(rows.tolist(), columns.tolist()))
+
+    def waypoints(self):
+        ''' Return the compressed path: the start, the end and the cells where the path turns, as (row, col) positions '''
+        if not self.path:
+            return []
+        return [tuple(point) for point in compress_path(self.path).tolist()]
+
+    def stats(self):
+        ''' Return every statistic of the search as a dict, for printing or saving as JSON '''
+        return {
+            "algorithm": self.algorithm,
+            "found": self.found,
+            "cost": self.cost if self.found else None,
+            "path_cells": len(self.path),
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "heap_pushes": self.heap_pushes,
+            "heap_pops": self.heap_pops,
+            "stale_pops": self.stale_pops,
+            "peak_open": self.peak_open,
+            "peak_memory": self.peak_memory,
+            "search_time": self.search_time,
+            "reconstruct_time": self.reconstruct_time,
+            "elapsed": self.elapsed,
+        }
+
+    def __repr__(self):
+        return (f"SearchResult(algorithm={self.algorithm!r}, found={self.found}, cost={self.cost}, "
+                f"expanded={self.expanded}, generated={self.generated}, elapsed={self.elapsed:.6f})")
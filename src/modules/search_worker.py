@@ -0,0 +1,124 @@
+''' This module runs a search on a background thread so that the thread that draws never waits for it. The search reports
+the cells it visits through its visit callback, the worker turns every call into a (cell, state) delta on a queue and the
+drawing thread takes all of them once per frame. The same callback is where the worker pauses, steps and cancels the search,
+so it works with every algorithm without changing them.
+
+Example:
+    from modules.engine import search
+    from modules.search_worker import SearchWorker
+    worker = SearchWorker(lambda visit: search(grid, grid.start, grid.end, "a_star", visit))
+    worker.start()
+    while not worker.done:
+        for pos, state in worker.drain():
+            ...  # color the cell
+        worker.frame()
+    result = worker.join() # None if the search was cancelled '''
+
+import threading
+from collections import deque
+
+class SearchCancelled(Exception):
+    ''' Raised inside the search by the visit callback to stop it once the worker was cancelled '''
+
+class SearchWorker:
+    ''' Runs run(visit) on a daemon thread and queues every visit as a delta, run is usually a call to engine.search '''
+    def __init__(self, run, expansions_per_frame=0):
+        ''' Initialize the worker, with expansions_per_frame the search waits after that many expansions until the next
+        frame() call, which slows it down to an animation instead of running it at full speed '''
+        self.run = run
+        self.expansions_per_frame = expansions_per_frame
+        self.deltas = deque() # appending and popping from the two ends of a deque is thread safe
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.expansions = 0 # the expansions reported so far
+        self.frame_limit = expansions_per_frame # the search waits once it has made this many expansions
+        self.paused = False
+        self.steps = 0 # the expansions that may still be made while paused
+        self.cancelled = False
+        self.result = None
+        self.error = None # an exception raised by the search, raised again by join
+
+    def start(self):
+        ''' Start the search on its thread '''
+        self.thread.start()
+
+    def work(self):
+        ''' The body of the thread '''
+        try:
+            self.result = self.run(self.visit)
+        except SearchCancelled:
+            self.result = None
+        except Exception as error: # handed to the thread that joins
+            self.error = error
+
+    def visit(self, cell, state):
+        ''' The visit callback of the search, called on the worker thread for every cell that is opened or closed '''
+        self.deltas.append((cell, state))
+        if state != "closed": # the search only waits between expansions
+            return
+        if self.cancelled:
+            raise SearchCancelled()
+        self.expansions += 1
+        if self.paused or (self.expansions_per_frame and self.expansions >= self.frame_limit):
+            self.wait()
+
+    def wait(self):
+        ''' Block the search until it is resumed, stepped, given a new frame or cancelled '''
+        with self.condition:
+            while not self.cancelled:
+                if self.paused:
+                    if self.steps:
+                        self.steps -= 1
+                        break
+                elif not self.expansions_per_frame or self.expansions < self.frame_limit:
+                    break
+                self.condition.wait()
+        if self.cancelled:
+            raise SearchCancelled()
+
+    def drain(self):
+        ''' Take every delta queued since the last call, oldest first '''
+        deltas = self.deltas
+        return [deltas.popleft() for _ in range(len(deltas))]
+
+    def frame(self):
+        ''' Tell the search that a frame was drawn, so it may make the expansions of the next one '''
+        if self.expansions_per_frame:
+            with self.condition:
+                self.frame_limit = self.expansions + self.expansions_per_frame
+                self.condition.notify()
+
+    def pause(self):
+        ''' Stop the search at its next expansion '''
+        self.paused = True
+
+    def resume(self):
+        ''' Let a paused search run on '''
+        with self.condition:
+            self.paused = False
+            self.steps = 0
+            self.condition.notify()
+
+    def step(self):
+        ''' Let a paused search make one more expansion '''
+        with self.condition:
+            self.steps += 1
+            self.condition.notify()
+
+    def cancel(self):
+        ''' Stop the search at its next expansion, join returns None '''
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify()
+
+    @property
+    def done(self):
+        ''' If the search has finished, was cancelled or failed '''
+        return self.thread.ident is not None and not self.thread.is_alive()
+
+    def join(self, timeout=None):
+        ''' Wait for the search to end and return its result, None if it was cancelled '''
+        self.thread.join(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.result
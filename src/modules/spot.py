@@ -1,100 +1,134 @@
-''' This module contains the Spot class which is used to represent each square on the grid. 
-Each spot has a color, position, neighbors and other attributes. 
-The class also contains methods to check the state of the spot and to update the state of the spot. '''
+''' This module contains the Spot class which is a thin view over one cell of a Grid.
+The state of the cell lives in the grid's state array, the spot only knows where the cell is and how to draw it.
+The module also contains the palettes used to draw the whole grid at once. '''
 
+import numpy as np
 import pygame
 from assets.colors import *
+from modules.grid import EMPTY, BARRIER, OPEN, CLOSED, PATH, START, END, MAX_COST
+
+# the color of each cell state, indexed by the values stored in Grid.state
+PALETTE = np.zeros((END + 1, 3), dtype=np.uint8)
+PALETTE[EMPTY] = WHITE
+PALETTE[BARRIER] = BLACK
+PALETTE[OPEN] = GREEN
+PALETTE[CLOSED] = RED
+PALETTE[PATH] = PURPLE
+PALETTE[START] = ORANGE
+PALETTE[END] = TURQUOISE
+
+# the color of empty cells for every terrain cost, fading from white on plain ground to brown at TERRAIN_SHADES and above
+TERRAIN_SHADES = 9
+_fade = np.clip((np.arange(MAX_COST + 1) - 1) / (TERRAIN_SHADES - 1), 0, 1)[:, None]
+TERRAIN = np.round(np.array(WHITE) * (1 - _fade) + np.array(BROWN) * _fade).astype(np.uint8)
+
+def cell_colors(state, cost):
+	''' Return the color of every cell, empty cells are shaded by their terrain cost '''
+	colors = PALETTE[state]
+	empty = state == EMPTY
+	colors[empty] = TERRAIN[cost[empty]]
+	return colors
 
 class Spot:
-	''' A class to represent each square on the grid '''
-	def __init__(self, row, col, width, total_rows): # we need width only as all the spots will be squares
+	''' A view of one square on the grid '''
+	def __init__(self, grid, row, col, width): # we need width only as all the spots will be squares
 		''' Initialize the spot '''
+		self.grid = grid
 		self.row = row
 		self.col = col
 		self.x = row * width
 		self.y = col * width
-		self.color = WHITE
-		self.neighbors = []
 		self.width = width
-		self.total_rows = total_rows
-		
+		self.total_rows = grid.rows
+
+	@property
+	def color(self):
+		''' The color of the spot, derived from the state of its cell and its terrain cost when it is empty '''
+		state = self.grid.get((self.row, self.col))
+		if state == EMPTY:
+			return tuple(TERRAIN[self.grid.cost[self.row, self.col]])
+		return tuple(PALETTE[state])
+
 	def get_pos(self):
 		''' Return the position of the spot as row, col'''
 		return self.row, self.col
-	
+
 	def is_closed(self):
 		''' Id the spot is not in the open set and has already been considered'''
-		return self.color == RED
-	
+		return self.grid.get((self.row, self.col)) == CLOSED
+
 	def is_open(self):
 		''' If the spot is in the open set and is yet to be considered'''
-		return self.color == GREEN
-	
+		return self.grid.get((self.row, self.col)) == OPEN
+
 	def is_barrier(self):
 		''' If the spot is a wall that the algorithm cannot visit '''
-		return self.color == BLACK
-	
+		return self.grid.get((self.row, self.col)) == BARRIER
+
 	def is_start(self):
 		''' If the spot is the origin point '''
-		return self.color == ORANGE
-	
+		return self.grid.get((self.row, self.col)) == START
+
 	def is_end(self):
 		''' If the spot is the destination point '''
-		return self.color == TURQUOISE
+		return self.grid.get((self.row, self.col)) == END
 
 	def is_path(self):
 		''' If the spot is part of the path '''
-		return self.color == PURPLE
-	
+		return self.grid.get((self.row, self.col)) == PATH
+
 	def reset(self):
 		''' Reset the spot to its default state '''
-		self.color = WHITE
-		
+		self.grid.set((self.row, self.col), EMPTY)
+
 	def make_closed(self):
 		''' Mark the spot as considered '''
-		self.color = RED
-	
+		self.grid.set((self.row, self.col), CLOSED)
+
 	def make_open(self):
 		''' Mark the spot as to be considered '''
-		self.color = GREEN
-	
+		self.grid.set((self.row, self.col), OPEN)
+
 	def make_barrier(self):
 		''' Mark the spot as a wall '''
-		self.color = BLACK
-		
+		self.grid.set((self.row, self.col), BARRIER)
+
 	def make_start(self):
 		''' Mark the spot as the origin point '''
-		self.color = ORANGE
-	
+		self.grid.set((self.row, self.col), START)
+
 	def make_end(self):
 		''' Mark the spot as the destination point '''
-		self.color = TURQUOISE
-	
+		self.grid.set((self.row, self.col), END)
+
 	def make_path(self):
 		''' Mark the spot as part of the path '''
-		self.color = PURPLE
-		
+		self.grid.set((self.row, self.col), PATH)
+
 	def draw(self, window):
 		''' Draw the spot on the window '''
-		# +1 because one pixel of the rectangle covered by the line so it leaves some extra space on the other side
-		pygame.draw.rect(window, self.color, (self.x, self.y, self.width + 1, self.width + 1)) 
-  
-	def update_neighbors(self, grid):
-		''' Update the neighbors of the spot '''
-		self.neighbors = []
-		
-		if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier(): # DOWN
-			self.neighbors.append(grid[self.row + 1][self.col])
-
-		if self.row > 0 and not grid[self.row - 1][self.col].is_barrier(): # UP
-			self.neighbors.append(grid[self.row - 1][self.col])
-
-		if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier(): # RIGHT
-			self.neighbors.append(grid[self.row][self.col + 1])
-
-		if self.col > 0 and not grid[self.row][self.col - 1].is_barrier(): # LEFT
-			self.neighbors.append(grid[self.row][self.col - 1])
-	
-	def __It__(self, other):
-		''' Compare the spots '''
-		return False
+		pygame.draw.rect(window, self.color, cell_rect(self.row, self.col, self.width))
+
+	def __eq__(self, other):
+		''' Two views are equal if they look at the same cell of the same grid '''
+		return isinstance(other, Spot) and self.grid is other.grid and self.get_pos() == other.get_pos()
+
+	def __hash__(self):
+		return hash((id(self.grid), self.row, self.col))
+
+def cell_edges(rows, gap):
+	''' Return the pixel where every cell starts plus where the last one ends, the grid lines are drawn on these pixels '''
+	return [int(i * gap) for i in range(rows + 1)]
+
+def cell_rect(row, col, gap):
+	''' Return the rectangle of a cell, from the grid line before it up to and including the grid line after it '''
+	x, y = int(row * gap), int(col * gap)
+	return pygame.Rect(x, y, int((row + 1) * gap) - x + 1, int((col + 1) * gap) - y + 1)
+
+def draw_grid_cells(window, grid, size):
+	''' Draw every cell of the grid in one go by mapping every pixel of a size x size square to its cell through the palette '''
+	edges = np.array(cell_edges(grid.rows, size / grid.rows)[:-1])
+	pixels = np.arange(int(size))
+	cell_of_pixel = np.searchsorted(edges, pixels, side="right") - 1
+	colors = cell_colors(grid.state, grid.cost)
+	window.blit(pygame.surfarray.make_surface(colors[cell_of_pixel][:, cell_of_pixel]), (0, 0))
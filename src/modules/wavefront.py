@@ -0,0 +1,74 @@
+''' The wavefront engine computes the distance field of a whole map with numpy instead of one python pop at a time.
+Every step moves the whole frontier one cell in every direction at once, so the cost of a step is a few numpy calls on the
+frontier instead of a python loop over its cells. The distances count moves (unit costs, terrain is ignored) like a breadth
+first search from the sources, and every reached cell also records the direction of the move that reached it, so the
+shortest path from a source to any cell can be read back from the field.
+
+Example:
+    from modules.wavefront import distance_field, trace
+    distances, parents = distance_field(grid, (0, 0))
+    distances[9, 9], trace(distances, parents, (9, 9)) '''
+
+import numpy as np
+from modules.adjacency import movement as movement_model
+from modules.grid import Grid
+
+UNREACHED = -1 # the distance of a cell that no source can reach
+NO_PARENT = 255 # the parent direction of a source or of an unreached cell
+
+def distance_field(grid, sources, movement="four_way"):
+    ''' Return (distances, parents) for the cells of a grid, both of the shape of the grid.
+    grid is a Grid or any 2D sequence or array where a truthy cell is a barrier, sources is a (row, col) position or a list of them.
+    distances holds the number of moves from the closest source (int32, UNREACHED where no source can reach the cell) and
+    parents the index of the move in the directions of the movement model that reached the cell (uint8, NO_PARENT for
+    sources and unreached cells). '''
+    barriers = grid.barrier_mask() if isinstance(grid, Grid) else np.asarray(grid).astype(bool)
+    directions, cut_corners, _ = movement_model(movement) # every move counts as one
+    rows, cols = barriers.shape
+    width = cols + 2 # the grid is padded with a ring of barriers, so no move has to be checked against the bounds
+    walkable = np.zeros((rows + 2, width), dtype=bool)
+    walkable[1:-1, 1:-1] = ~barriers
+    walkable = walkable.ravel()
+    distances = np.full(walkable.shape, UNREACHED, dtype=np.int32)
+    parents = np.full(walkable.shape, NO_PARENT, dtype=np.uint8)
+
+    sources = np.atleast_2d(np.asarray(sources, dtype=np.int64))
+    if ((sources < 0) | (sources >= (rows, cols))).any():
+        raise ValueError(f"a source is outside of the {rows}x{cols} grid")
+    frontier = (sources[:, 0] + 1) * width + sources[:, 1] + 1
+    frontier = np.unique(frontier[walkable[frontier]]) # a source on a barrier reaches nothing
+    distances[frontier] = 0
+
+    step = 0
+    while frontier.size:
+        step += 1
+        layer = []
+        for k, (dr, dc) in enumerate(directions): # the first direction that reaches a cell becomes its parent
+            targets = frontier + (dr * width + dc)
+            allowed = walkable[targets] & (distances[targets] == UNREACHED)
+            if dr and dc and not cut_corners: # a diagonal move needs both of the cells beside it to be free
+                allowed &= walkable[frontier + dr * width] & walkable[frontier + dc]
+            targets = targets[allowed] # one frontier cell reaches one target per direction, so the targets are unique
+            distances[targets] = step
+            parents[targets] = k
+            layer.append(targets)
+        frontier = np.concatenate(layer)
+
+    distances = distances.reshape(rows + 2, width)[1:-1, 1:-1].copy()
+    parents = parents.reshape(rows + 2, width)[1:-1, 1:-1].copy()
+    return distances, parents
+
+def trace(distances, parents, target, movement="four_way"):
+    ''' Return the shortest path from the closest source to target as a list of (row, col), or [] if target was not reached.
+    distances and parents are the arrays returned by distance_field with the same movement model '''
+    row, col = target
+    if distances[row, col] == UNREACHED:
+        return []
+    directions = movement_model(movement)[0]
+    path = [(row, col)]
+    while parents[row, col] != NO_PARENT:
+        dr, dc = directions[parents[row, col]]
+        row, col = row - dr, col - dc # back along the move that reached the cell
+        path.append((row, col))
+    path.reverse()
+    return path
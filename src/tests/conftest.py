@@ -0,0 +1,25 @@
+''' Fixtures shared by the tests '''
+
+import numpy as np
+import pytest
+from modules.grid import Grid, MAX_COST
+
+@pytest.fixture
+def random_grid():
+    ''' Return a function that builds a seeded random grid, with max_cost > 1 its cells get random costs up to max_cost '''
+    def build(seed, rows=12, cols=None, density=0.25, max_cost=1):
+        rng = np.random.default_rng(seed)
+        cols = rows if cols is None else cols
+        costs = rng.integers(1, min(max_cost, MAX_COST) + 1, size=(rows, cols))
+        return Grid.from_array(rng.random((rows, cols)) < density, costs)
+    return build
+
+@pytest.fixture
+def random_queries():
+    ''' Return a function that picks count seeded (start, end) pairs of walkable cells of a grid '''
+    def pick(grid, seed, count=8):
+        rng = np.random.default_rng(seed)
+        free = np.argwhere(grid.state != 1)
+        pairs = rng.integers(0, len(free), size=(count, 2))
+        return [(tuple(free[a].tolist()), tuple(free[b].tolist())) for a, b in pairs]
+    return pick
@@ -0,0 +1,66 @@
+''' Tests for the adjacency of the grids and keeping it up to date when cells change '''
+
+import numpy as np
+import pytest
+from modules.adjacency import Adjacency, MOVEMENTS
+from modules.engine import search
+from modules.grid import Grid, BARRIER, EMPTY
+
+def test_moves_of_a_cell():
+    adjacency = Grid.from_array([[0, 0, 0],
+                                 [1, 0, 0],
+                                 [0, 0, 1]]).adjacency("eight_way_no_corners")
+    assert adjacency.neighbors(4).tolist() == [7, 1, 5, 2] # down, up, right and up right, the other diagonals touch a barrier
+    assert adjacency.neighbors(3).tolist() == []
+    assert adjacency.weights[4 * adjacency.slots:5 * adjacency.slots].tolist() == [10, 10, 10, 14, 0, 0, 0, 0]
+
+@pytest.mark.parametrize("name", MOVEMENTS)
+@pytest.mark.parametrize("seed", range(4))
+def test_update_matches_a_fresh_build(random_grid, name, seed):
+    grid = random_grid(seed, rows=10, cols=13, density=0.3)
+    adjacency = grid.adjacency(name)
+    starts, ends, indices = adjacency.lists()
+    weights = adjacency.weight_list()
+    rng = np.random.default_rng(seed)
+    for row, col in zip(rng.integers(0, grid.rows, 40).tolist(), rng.integers(0, grid.cols, 40).tolist()):
+        grid.set((row, col), EMPTY if grid.get((row, col)) == BARRIER else BARRIER)
+        fresh = Adjacency(~grid.barrier_mask(), *MOVEMENTS[name])
+        assert np.array_equal(adjacency.counts, fresh.counts)
+        assert np.array_equal(adjacency.indices, fresh.indices)
+        assert np.array_equal(adjacency.weights, fresh.weights)
+        assert adjacency.lists() == fresh.lists() and adjacency.weight_list() == fresh.weight_list()
+    # the python lists were patched where they are instead of being built again
+    assert adjacency.lists()[1] is ends and adjacency.lists()[2] is indices and adjacency.weight_list() is weights
+
+def test_edits_patch_the_derived_data(random_grid):
+    grid = random_grid(7, density=0.3, max_cost=5)
+    search(grid, (0, 0), (11, 11), "jps") # builds the rows of the barrier mask
+    caches = grid.blocked_rows(), grid.walkable_bits(), grid.costs()
+    rng = np.random.default_rng(7)
+    for row, col, cost in rng.integers(0, grid.rows, size=(30, 3)).tolist():
+        grid.set((row, col), EMPTY if grid.get((row, col)) == BARRIER else BARRIER)
+        grid.set_cost((row, col), cost + 1)
+    fresh = Grid.from_array(grid.barrier_mask(), grid.cost)
+    assert (grid.blocked_rows(), grid.walkable_bits(), grid.costs()) == caches # the same objects
+    assert grid.blocked_rows() == fresh.blocked_rows()
+    assert grid.walkable_bits().bits == fresh.walkable_bits().bits
+    assert grid.costs() == fresh.costs()
+    assert grid.min_cost() <= fresh.min_cost() # edits never raise the scale of the heuristics
+
+@pytest.mark.parametrize("algorithm, options", [("dijkstra", {}), ("a_star", {"movement": "eight_way"}),
+                                                ("bidirectional_a_star", {}), ("theta_star", {}), ("jps", {"plus": True})])
+@pytest.mark.parametrize("seed", range(3))
+def test_searches_after_edits(random_grid, random_queries, algorithm, options, seed):
+    ''' A grid that was searched before some edits answers like a grid built from scratch after them '''
+    grid = random_grid(seed, density=0.25, max_cost=1 if algorithm in ("theta_star", "jps") else 4)
+    queries = random_queries(grid, seed)
+    for start, end in queries:
+        search(grid, start, end, algorithm, **options)
+    ends = {point for query in queries for point in query}
+    rng = np.random.default_rng(seed)
+    for row, col in rng.integers(0, grid.rows, size=(12, 2)).tolist():
+        if (row, col) not in ends:
+            grid.set((row, col), EMPTY if grid.get((row, col)) == BARRIER else BARRIER)
+    fresh = Grid.from_array(grid.barrier_mask(), grid.cost)
+    for start, end in queries:
+        assert search(grid, start, end, algorithm, **options).cost == search(fresh, start, end, algorithm, **options).cost
@@ -0,0 +1,17 @@
+''' Tests for answering many queries at once '''
+
+from modules.batch import batch_search
+from modules.engine import search
+from modules.grid import Grid
+from modules.open_list import OpenList
+
+def test_batch_search_with_open_list():
+    ''' Every query of a chunk gets a fresh open list, so the results match searching them one by one '''
+    grid = Grid(20)
+    queries = [((0, 0), (19, 19)), ((0, 0), (0, 3)), ((5, 5), (12, 2)), ((19, 0), (0, 19))]
+    open_list = OpenList("high_g")
+    results = dict(batch_search(grid, queries, "a_star", workers=1, open_list=open_list))
+    assert sorted(results) == list(range(len(queries)))
+    for number, (start, end) in enumerate(queries):
+        assert results[number].path[-1] == end
+        assert results[number].cost == search(grid, start, end, "a_star").cost
@@ -0,0 +1,50 @@
+''' Tests for the bidirectional searches '''
+
+import pytest
+from modules.adjacency import MOVEMENTS
+from modules.engine import search
+from modules.grid import Grid, BARRIER
+
+def check_path(grid, result, start, end):
+    path = result.path
+    assert path[0] == start and path[-1] == end
+    assert all(max(abs(r1 - r2), abs(c1 - c2)) == 1 and grid.get((r2, c2)) != BARRIER
+               for (r1, c1), (r2, c2) in zip(path, path[1:]))
+
+@pytest.mark.parametrize("seed", range(8))
+def test_breadth_first_finds_the_fewest_moves(random_grid, random_queries, seed):
+    grid = random_grid(seed, rows=14, cols=19, density=0.3, max_cost=4) # the costs are ignored
+    plain = Grid.from_array(grid.barrier_mask())
+    for start, end in random_queries(grid, seed):
+        result = search(grid, start, end, "bidirectional_search")
+        assert result.cost == search(plain, start, end, "dijkstra").cost
+        if result.found:
+            check_path(grid, result, start, end)
+            assert len(result.path) == result.cost + 1
+
+@pytest.mark.parametrize("movement", MOVEMENTS)
+@pytest.mark.parametrize("seed", range(8))
+def test_bidirectional_a_star_is_optimal(random_grid, random_queries, movement, seed):
+    grid = random_grid(seed, rows=14, cols=19, density=0.3, max_cost=4)
+    for start, end in random_queries(grid, seed):
+        result = search(grid, start, end, "bidirectional_a_star", movement=movement)
+        assert result.cost == search(grid, start, end, "dijkstra", movement=movement).cost
+        if result.found:
+            check_path(grid, result, start, end)
+
+@pytest.mark.parametrize("algorithm", ["bidirectional_search", "bidirectional_a_star"])
+def test_termination(algorithm):
+    grid = Grid.from_array([[0, 0, 1, 0],
+                            [0, 0, 1, 0],
+                            [1, 1, 1, 0]])
+    assert not search(grid, (0, 0), (2, 3), algorithm).found # the sides run out of nodes
+    same = search(grid, (1, 1), (1, 1), algorithm)
+    assert same.path == [(1, 1)] and same.cost == 0
+
+def test_fewer_expansions_than_one_side():
+    ''' On a grid two searches to half the depth each cover about half the area of one search to the full depth '''
+    grid = Grid(201)
+    one_side = search(grid, (100, 70), (100, 130), "dijkstra")
+    both_sides = search(grid, (100, 70), (100, 130), "bidirectional_search")
+    assert both_sides.cost == one_side.cost
+    assert both_sides.expanded * 1.5 < one_side.expanded
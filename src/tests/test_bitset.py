@@ -0,0 +1,67 @@
+''' Tests for the compact search state '''
+
+import numpy as np
+import pytest
+from modules.adjacency import FOUR_WAY
+from modules.bitset import Bitset, PackedArray, bits_for, four_way_moves, trace_parents
+from modules.engine import search
+from modules.grid import BARRIER
+
+def test_bitset_matches_a_set():
+    rng = np.random.default_rng(0)
+    bits, reference = Bitset(1001), set()
+    for number in rng.integers(0, 1001, 3000).tolist():
+        if number % 3:
+            bits.add(number)
+            reference.add(number)
+        else:
+            bits.discard(number)
+            reference.discard(number)
+    assert len(bits) == len(reference)
+    assert all((i in bits) == (i in reference) for i in range(1001))
+    assert set(np.flatnonzero(bits.to_mask()).tolist()) == reference
+
+def test_bitset_from_mask_round_trip():
+    mask = np.random.default_rng(1).random((13, 7)) < 0.4
+    bits = Bitset.from_mask(mask)
+    assert np.array_equal(bits.to_mask(mask.shape), mask)
+    assert len(bits) == mask.sum()
+
+@pytest.mark.parametrize("width", range(1, 9))
+def test_packed_array_matches_a_list(width):
+    rng = np.random.default_rng(width)
+    packed, reference = PackedArray(517, width), [0] * 517
+    for i, value in zip(rng.integers(0, 517, 2000).tolist(), rng.integers(0, 1 << width, 2000).tolist()):
+        packed[i] = value
+        reference[i] = value
+    assert [packed[i] for i in range(517)] == reference
+    assert len(packed) == 517
+
+def test_packed_array_width():
+    assert [bits_for(count) for count in (1, 2, 4, 5, 8, 9)] == [1, 1, 2, 3, 3, 4]
+    with pytest.raises(ValueError):
+        PackedArray(10, 9)
+
+def test_moves_and_parents(random_grid):
+    grid = random_grid(3, rows=9, cols=11, density=0.3)
+    walkable = grid.walkable_bits().bits
+    size, cols = grid.rows * grid.cols, grid.cols
+    adjacency = grid.adjacency()
+    for cell in range(size):
+        if grid.state.flat[cell] != BARRIER:
+            assert [neighbor for _, neighbor in four_way_moves(walkable, size, cols, cell)] == adjacency.neighbors(cell).tolist()
+    deltas = [dr * cols + dc for dr, dc in FOUR_WAY]
+    parents = PackedArray(size, bits_for(len(FOUR_WAY)))
+    parents[1], parents[1 + cols], parents[2 + cols] = 2, 0, 2 # right, down, right
+    assert trace_parents(parents, deltas, 0, 2 + cols) == [0, 1, 1 + cols, 2 + cols]
+
+@pytest.mark.parametrize("seed", range(6))
+def test_dfs_paths(random_grid, random_queries, seed):
+    grid = random_grid(seed, density=0.3)
+    for start, end in random_queries(grid, seed):
+        result = search(grid, start, end, "dfs")
+        assert result.found == search(grid, start, end, "dijkstra").found
+        if result.found:
+            assert result.path[0] == start and result.path[-1] == end
+            assert all(abs(r1 - r2) + abs(c1 - c2) == 1 and grid.get((r2, c2)) != BARRIER
+                       for (r1, c1), (r2, c2) in zip(result.path, result.path[1:]))
@@ -0,0 +1,30 @@
+''' Tests for recording and replaying searches '''
+
+import numpy as np
+from modules.event_log import EventLog, HEADER
+from modules.grid import OPEN, CLOSED, PATH
+
+def test_apply_keeps_the_last_event_of_a_cell():
+    log = EventLog(2, 3)
+    for cell, kind in [(1, "open"), (4, "open"), (1, "closed"), (4, "closed"), (1, "open")]:
+        log.visit(cell, kind)
+    log.add_path([4, 5])
+    state = np.zeros((2, 3), dtype=np.uint8)
+    log.apply(state)
+    assert state.tolist() == [[0, OPEN, 0], [0, PATH, PATH]]
+    state[...] = 0
+    log.apply(state, 0, 4)
+    assert state.tolist() == [[0, CLOSED, 0], [0, CLOSED, 0]]
+
+def test_save_and_load(tmp_path):
+    name = "a" * 31 + "é" # the two bytes of é do not both fit in the 32 bytes of the header
+    log = EventLog(4, 5, name)
+    log.visit(3, "open")
+    log.visit(3, "closed")
+    log.add_path([3, 7])
+    path = tmp_path / "search.events"
+    log.save(path)
+    assert path.stat().st_size == 56 + 4 * len(log) == HEADER.size + 4 * len(log)
+    loaded = EventLog.load(path)
+    assert loaded.name == "a" * 31
+    assert (loaded.rows, loaded.cols) == (4, 5) and loaded.events == log.events
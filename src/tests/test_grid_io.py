@@ -0,0 +1,37 @@
+''' Tests for saving and loading grids '''
+
+import numpy as np
+import pytest
+from modules import grid_io
+from modules.grid import Grid, START, END
+
+def test_round_trip(tmp_path):
+    grid = Grid.from_array([[0, 1, 0], [0, 1, 0], [0, 0, 0]], costs=[[1, 1, 1], [2, 1, 3], [1, 1, 9]])
+    grid.set((0, 0), START)
+    grid.set((0, 2), END)
+    path = tmp_path / "level.grid"
+    grid_io.save(grid, path)
+    assert path.stat().st_size == 36 + 2 + 9 # the 36 byte header, 9 barrier bits in 2 bytes, 9 costs
+    loaded = grid_io.load(path)
+    assert (loaded.state == grid.state).all() and (loaded.cost == grid.cost).all()
+    assert (loaded.start, loaded.end) == ((0, 0), (0, 2))
+
+def test_plain_map_has_no_cost_section(tmp_path):
+    barriers = np.random.default_rng(0).random((20, 30)) < 0.3
+    path = tmp_path / "plain.grid"
+    grid_io.save(Grid.from_array(barriers), path)
+    assert path.stat().st_size == 36 + 75 # the header and 600 barrier bits
+    loaded = grid_io.load(path)
+    assert np.array_equal(loaded.barrier_mask(), barriers) and (loaded.cost == 1).all()
+    assert loaded.start is None and loaded.end is None
+
+def test_bad_files_are_rejected(tmp_path):
+    path = tmp_path / "level.grid"
+    grid_io.save(Grid.from_array([[0, 1], [1, 0]], costs=[[1, 2], [3, 4]]), path)
+    data = path.read_bytes()
+    broken = tmp_path / "broken.grid"
+    for content, message in [(data[:35], "too short"), (b"XXXX" + data[4:], "not a saved grid"),
+                             (data[:4] + b"\x09" + data[5:], "version 9"), (data[:-1], "truncated")]:
+        broken.write_bytes(content)
+        with pytest.raises(ValueError, match=message):
+            grid_io.load(broken)
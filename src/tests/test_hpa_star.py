@@ -0,0 +1,61 @@
+''' Tests for hierarchical pathfinding '''
+
+import numpy as np
+import pytest
+from modules.algorithms.hpa_star import Hierarchy, hierarchy
+from modules.engine import search
+from modules.grid import Grid, BARRIER, EMPTY
+
+def check_path(grid, result, start, end):
+    ''' The refined path leads from start to end in single moves and costs what the search says '''
+    path = result.path
+    assert path[0] == start and path[-1] == end
+    assert all(abs(r1 - r2) + abs(c1 - c2) == 1 and grid.get((r2, c2)) != BARRIER
+               for (r1, c1), (r2, c2) in zip(path, path[1:]))
+    assert sum(int(grid.cost[cell]) for cell in path[1:]) == result.cost
+
+def across(abstraction):
+    ''' The cells across a border from every entrance cell, ignoring the order they were found in '''
+    return {cell: set(others) for cell, others in abstraction.inter.items() if others}
+
+@pytest.mark.parametrize("seed", range(5))
+def test_paths_are_valid(random_grid, random_queries, seed):
+    grid = random_grid(seed, rows=24, cols=30, density=0.2, max_cost=3)
+    for start, end in random_queries(grid, seed):
+        shortest = search(grid, start, end, "dijkstra")
+        result = search(grid, start, end, "hpa_star", cluster_size=6)
+        assert result.found == shortest.found
+        if result.found:
+            check_path(grid, result, start, end)
+            assert result.cost >= shortest.cost
+
+def test_open_map_paths_are_the_shortest():
+    grid = Grid(64)
+    for start, end in [((0, 0), (63, 63)), ((5, 60), (60, 2)), ((31, 0), (31, 63))]:
+        assert search(grid, start, end, "hpa_star").cost == search(grid, start, end, "dijkstra").cost
+
+@pytest.mark.parametrize("seed", range(5))
+def test_update_matches_a_fresh_build(random_grid, random_queries, seed):
+    grid = random_grid(seed, rows=24, cols=30, density=0.2, max_cost=3)
+    abstraction = hierarchy(grid, 6)
+    queries = random_queries(grid, seed)
+    ends = {point for query in queries for point in query}
+    rng = np.random.default_rng(seed)
+    for row, col, cost in zip(rng.integers(0, grid.rows, 25).tolist(), rng.integers(0, grid.cols, 25).tolist(),
+                              rng.integers(1, 4, 25).tolist()):
+        if (row, col) in ends:
+            continue
+        if cost == 3:
+            grid.set_cost((row, col), cost)
+        else:
+            grid.set((row, col), EMPTY if grid.get((row, col)) == BARRIER else BARRIER)
+    fresh = Hierarchy(grid, 6)
+    assert abstraction.entrances == fresh.entrances
+    assert across(abstraction) == across(fresh)
+    assert abstraction.intra == fresh.intra
+    rebuilt = Grid.from_array(grid.barrier_mask(), grid.cost)
+    for start, end in queries:
+        result = search(grid, start, end, "hpa_star", cluster_size=6)
+        assert result.path == search(rebuilt, start, end, "hpa_star", cluster_size=6).path
+        if result.found:
+            check_path(grid, result, start, end)
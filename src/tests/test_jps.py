@@ -0,0 +1,38 @@
+''' Tests for Jump Point Search and JPS+ '''
+
+import numpy as np
+import pytest
+from modules.algorithms.JPS import jump_tables
+from modules.engine import search
+from modules.grid import Grid, BARRIER, EMPTY
+
+@pytest.mark.parametrize("plus", [False, True])
+@pytest.mark.parametrize("seed", range(6))
+def test_jps_is_optimal(random_grid, random_queries, seed, plus):
+    grid = random_grid(seed, density=0.3)
+    for start, end in random_queries(grid, seed):
+        expected = search(grid, start, end, "dijkstra")
+        result = search(grid, start, end, "jps", plus=plus)
+        assert result.cost == expected.cost
+        if result.found: # the jumps are filled in to a path of single moves
+            assert result.path[0] == start and result.path[-1] == end
+            assert len(result.path) == result.cost + 1
+            assert all(abs(r1 - r2) + abs(c1 - c2) == 1 for (r1, c1), (r2, c2) in zip(result.path, result.path[1:]))
+
+def test_jps_expands_fewer_nodes_on_open_maps():
+    grid = Grid(60)
+    assert search(grid, (0, 0), (59, 59), "jps").expanded * 10 < search(grid, (0, 0), (59, 59), "a_star").expanded
+
+@pytest.mark.parametrize("seed", range(4))
+def test_jump_tables_are_rebuilt_after_an_edit(random_grid, random_queries, seed):
+    grid = random_grid(seed, density=0.2)
+    queries = random_queries(grid, seed)
+    for start, end in queries:
+        search(grid, start, end, "jps", plus=True) # builds the tables before the edits
+    rng = np.random.default_rng(seed)
+    for row, col in rng.integers(0, grid.rows, size=(5, 2)).tolist():
+        if (row, col) not in {point for query in queries for point in query}:
+            grid.set((row, col), EMPTY if grid.get((row, col)) == BARRIER else BARRIER)
+    assert np.array_equal(jump_tables(grid), jump_tables(Grid.from_array(grid.barrier_mask())))
+    for start, end in queries:
+        assert search(grid, start, end, "jps", plus=True).cost == search(grid, start, end, "dijkstra").cost
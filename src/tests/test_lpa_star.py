@@ -0,0 +1,72 @@
+''' Tests for replanning with LPA* and D* Lite '''
+
+import numpy as np
+import pytest
+from modules.algorithms.lpa_star import LPAStar, DStarLite
+from modules.engine import search
+from modules.grid import Grid, BARRIER, EMPTY
+
+def check_path(grid, result, start, end):
+    ''' The path of a planner leads from start to end in single moves and costs what the planner says '''
+    path = [grid.position(cell) for cell in result.path]
+    assert path[0] == start and path[-1] == end
+    assert all(abs(r1 - r2) + abs(c1 - c2) == 1 and grid.get((r2, c2)) != BARRIER
+               for (r1, c1), (r2, c2) in zip(path, path[1:]))
+    assert sum(int(grid.cost[cell]) for cell in path[1:]) == result.cost
+
+def edit(grid, rng, keep):
+    ''' Flip a random cell between barrier and ground or give it a new cost, return its number '''
+    while True:
+        row, col = rng.integers(0, grid.rows), rng.integers(0, grid.cols)
+        if (row, col) not in keep:
+            break
+    if rng.random() < 0.6:
+        grid.set((row, col), EMPTY if grid.get((row, col)) == BARRIER else BARRIER)
+    else:
+        grid.set_cost((row, col), int(rng.integers(1, 6)))
+    return grid.index((row, col))
+
+@pytest.mark.parametrize("planner", [LPAStar, DStarLite])
+@pytest.mark.parametrize("seed", range(5))
+def test_replanning_matches_dijkstra(random_grid, random_queries, planner, seed):
+    grid = random_grid(seed, density=0.25, max_cost=5)
+    rng = np.random.default_rng(seed)
+    queries = random_queries(grid, seed, count=2)
+    ends = {point for query in queries for point in query}
+    for start, end in queries:
+        plan = planner(grid, grid.index(start), grid.index(end))
+        for _ in range(15):
+            result = plan.plan()
+            assert result.cost == search(grid, start, end, "dijkstra").cost
+            if result.found:
+                check_path(grid, result, start, end)
+            plan.cells_changed([edit(grid, rng, ends)])
+
+def test_repairing_is_cheaper_than_searching_again():
+    grid = Grid(40)
+    plan = LPAStar(grid, grid.index((0, 0)), grid.index((39, 39)))
+    first = plan.plan()
+    grid.set((39, 20), BARRIER)
+    plan.cells_changed([grid.index((39, 20))])
+    repaired = plan.plan()
+    assert repaired.cost == first.cost == 78
+    assert repaired.expanded * 5 < first.expanded
+
+@pytest.mark.parametrize("seed", range(5))
+def test_d_star_lite_moving_start(random_grid, seed):
+    ''' Walk along the planned path, changing cells on the way, every plan is optimal from where the walker stands '''
+    grid = random_grid(seed, rows=16, density=0.2, max_cost=4)
+    free = [tuple(cell) for cell in np.argwhere(grid.state != BARRIER).tolist()]
+    start, end = free[0], free[-1]
+    plan = DStarLite(grid, grid.index(start), grid.index(end))
+    rng = np.random.default_rng(seed)
+    for step in range(30):
+        result = plan.plan()
+        assert result.cost == search(grid, start, end, "dijkstra").cost
+        if not result.found or start == end:
+            break
+        check_path(grid, result, start, end)
+        start = grid.position(result.path[1]) # take one step
+        plan.move_start(grid.index(start))
+        if step % 3 == 0:
+            plan.cells_changed([edit(grid, rng, {start, end})])
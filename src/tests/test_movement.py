@@ -0,0 +1,33 @@
+''' Tests for the movement models and their heuristics '''
+
+import pytest
+from modules.distance_formulas import STRAIGHT, chebyshev, octile
+from modules.engine import search
+from modules.grid import Grid
+
+@pytest.mark.parametrize("movement", ["eight_way", "eight_way_no_corners", "eight_way_uniform"])
+@pytest.mark.parametrize("seed", range(5))
+def test_heuristics_never_overestimate(random_grid, random_queries, movement, seed):
+    ''' chebyshev is at most octile, which is at most the cost of the path Dijkstra finds, in STRAIGHT units '''
+    grid = random_grid(seed, density=0.25, max_cost=4)
+    scale = grid.min_cost()
+    for start, end in random_queries(grid, seed):
+        cost = search(grid, start, end, "dijkstra", movement=movement).cost * STRAIGHT
+        assert chebyshev(start, end, scale) <= cost + 1e-9
+        if movement != "eight_way_uniform": # a diagonal move costs DIAGONAL in the other models
+            assert octile(start, end, scale) <= cost + 1e-9
+
+@pytest.mark.parametrize("algorithm", ["a_star", "bidirectional_a_star"])
+@pytest.mark.parametrize("seed", range(5))
+def test_uniform_diagonals(random_grid, random_queries, algorithm, seed):
+    grid = random_grid(seed, density=0.25, max_cost=4)
+    for start, end in random_queries(grid, seed):
+        expected = search(grid, start, end, "dijkstra", movement="eight_way_uniform")
+        assert search(grid, start, end, algorithm, movement="eight_way_uniform").cost == expected.cost
+
+def test_chebyshev_is_exact_on_an_open_map():
+    grid = Grid(30)
+    for end in [(29, 29), (3, 17), (29, 0), (12, 12)]:
+        result = search(grid, (0, 0), end, "a_star", movement="eight_way_uniform")
+        assert result.cost * STRAIGHT == chebyshev((0, 0), end)
+        assert len(result.path) == max(end) + 1
@@ -0,0 +1,18 @@
+''' Tests for the open lists and how the searches use them '''
+
+import pytest
+from modules.engine import search
+from modules.grid import Grid
+from modules.open_list import IndexedOpenList, OpenList
+
+@pytest.mark.parametrize("kind", [OpenList, IndexedOpenList])
+@pytest.mark.parametrize("stats", [False, True])
+def test_open_list_option_is_reusable(kind, stats):
+    ''' Two searches given the same open list both find their paths and the open list is left untouched '''
+    grid = Grid(20)
+    open_list = kind("high_g")
+    first = search(grid, (0, 0), (0, 3), "a_star", stats=stats, open_list=open_list)
+    second = search(grid, (0, 0), (19, 19), "a_star", stats=stats, open_list=open_list)
+    assert first.path[-1] == (0, 3)
+    assert second.path[-1] == (19, 19)
+    assert len(open_list) == 0 and open_list.pushes == 0
@@ -0,0 +1,10 @@
+''' Tests for profiling searches '''
+
+from modules.profiling import Profiler
+
+class OldCode:
+    ''' A code object of python 3.10 and older, which has no co_qualname '''
+    co_name = "a_star"
+
+def test_describe_without_qualname():
+    assert Profiler().describe(OldCode(), "modules.algorithms.a_star") == ("modules.algorithms.a_star.a_star", "search")
@@ -0,0 +1,65 @@
+''' Tests for Theta*, Lazy Theta* and the line of sight check '''
+
+import math
+from fractions import Fraction
+import numpy as np
+import pytest
+from modules import line_of_sight
+from modules.engine import search
+from modules.grid import Grid, BARRIER
+
+def touches(start, end, cell):
+    ''' If the segment between the centres of two cells meets the closed square of a cell, by clipping it to the square '''
+    low, high = Fraction(0), Fraction(1)
+    for p, q, centre in zip(start, end, cell):
+        if p == q:
+            if abs(p - centre) > Fraction(1, 2):
+                return False
+            continue
+        t1 = Fraction(centre - p) / (q - p) - Fraction(1, 2) / abs(q - p)
+        low, high = max(low, t1), min(high, t1 + Fraction(1) / abs(q - p))
+    return low <= high
+
+@pytest.mark.parametrize("seed", range(3))
+def test_line_of_sight_matches_the_geometry(random_grid, seed):
+    ''' A line of sight exists when the segment does not even touch a barrier, so a line through the corner shared by
+    four cells needs all four of them to be free and never squeezes between two barriers that meet at a corner '''
+    grid = random_grid(seed, rows=8, density=0.2)
+    blocked = grid.blocked_rows()
+    barriers = [tuple(cell) for cell in np.argwhere(grid.barrier_mask()).tolist()]
+    free = [tuple(cell) for cell in np.argwhere(~grid.barrier_mask()).tolist()]
+    for start in free[::3]:
+        for end in free:
+            expected = not any(touches(start, end, cell) for cell in barriers)
+            assert line_of_sight.line_of_sight(blocked, start, end) == expected, (start, end)
+
+@pytest.mark.parametrize("algorithm", ["theta_star", "lazy_theta_star"])
+def test_no_squeezing_past_corners(algorithm):
+    grid = Grid.from_array([[0, 1],
+                            [1, 0]])
+    assert not search(grid, (0, 0), (1, 1), algorithm).found
+
+@pytest.mark.parametrize("algorithm", ["theta_star", "lazy_theta_star"])
+@pytest.mark.parametrize("seed", range(6))
+def test_any_angle_paths(random_grid, random_queries, algorithm, seed):
+    ''' The any-angle paths are never longer than the 4-way paths, never shorter than a straight line and avoid barriers '''
+    grid = random_grid(seed, density=0.25)
+    for start, end in random_queries(grid, seed):
+        grid_path = search(grid, start, end, "dijkstra")
+        result = search(grid, start, end, algorithm)
+        assert result.found == grid_path.found
+        if result.found:
+            assert math.dist(start, end) - 1e-9 <= result.cost <= grid_path.cost + 1e-9
+            assert result.path[0] == start and result.path[-1] == end
+            assert all(grid.get(cell) != BARRIER for cell in result.path)
+
+def test_straight_line_on_an_open_map():
+    result = search(Grid(20), (0, 0), (19, 7), "theta_star")
+    assert result.cost == pytest.approx(math.hypot(19, 7))
+
+def test_line_of_sight_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(line_of_sight, "MAX_CACHED", 50)
+    grid = Grid(30)
+    for end in range(1, 30):
+        search(grid, (0, 0), (29, end), "theta_star")
+        assert len(grid.derived["line_of_sight"]) <= 50